@@ -0,0 +1,86 @@
+"""Load test: sync (threadpool) vs async (ASYNC_CRUD=true) generic routers.
+Starts one uvicorn process per mode against the database referenced by DATABASE_URL
+(tables must exist), drives GET /patients/page with N concurrent clients and reports
+req/s and latency percentiles.
+Usage: python Scripts/Bench/bench_async_router.py [requests] [concurrency]
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(async_crud: bool):
+    port = free_port()
+    env = dict(os.environ, ASYNC_CRUD="true" if async_crud else "false")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    base = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if httpx.get(f"{base}/health").status_code == 200:
+                return proc, base
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+
+async def drive(base, total, concurrency):
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def worker(client):
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            r = await client.get("/patients/page", params={"limit": 50})
+            r.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=60) as client:
+        await client.get("/patients/page")  # warm up the pool and the registry
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    print(f"requests: {total}  concurrency: {concurrency}")
+    for label, async_crud in (("sync  (threadpool)", False), ("async (AsyncSession)", True)):
+        proc, base = start_server(async_crud)
+        try:
+            res = asyncio.run(drive(base, total, concurrency))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f"{label:22}: {res['rps']:8.1f} req/s  p50 {res['p50']:7.2f} ms  p99 {res['p99']:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
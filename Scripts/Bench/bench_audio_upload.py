@@ -0,0 +1,102 @@
+"""Benchmark: throughput and peak Python memory of streamed audio uploads and ranged reads.
+Serves the app with uvicorn in a background thread against the database referenced by DATABASE_URL
+(run `python -m app.bootstrap` first), with audio stored in a temporary directory through
+LocalStorage or the local S3 stand-in, and streams to it with httpx. Peak memory (tracemalloc,
+client and server together) should track the chunk/spool size, not the file size.
+Usage: python Scripts/Bench/bench_audio_upload.py [size_mb] [chunk_kb]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import httpx
+import uvicorn
+from app import audio_storage as storage_module
+from app import models
+from app.audio_storage import LocalObjectStore, LocalStorage, ObjectStorage
+from app.database import SessionLocal
+from app.main import app
+
+
+def create_dictation():
+    with SessionLocal() as db:
+        hosp = models.Hospital(name="Bench Hospital", code=f"BENCH_{uuid.uuid4().hex[:8]}")
+        user = models.User(name="Bench Doctor", password="x")
+        db.add_all([hosp, user])
+        db.flush()
+        dept = models.Department(hospital_id=hosp.id, name="Bench")
+        db.add(dept)
+        db.flush()
+        doc = models.Doctor(hospital_id=hosp.id, department_id=dept.id, userid=user.id)
+        db.add(doc)
+        db.flush()
+        dictation = models.Dictation(hospital_id=hosp.id, department_id=dept.id, doctor_id=doc.id, status="recorded")
+        db.add(dictation)
+        db.commit()
+        return dictation.id
+
+
+def body(size, chunk):
+    block = os.urandom(chunk)
+    for offset in range(0, size, chunk):
+        yield block[:min(chunk, size - offset)]
+
+
+PORT = 8765
+
+
+def serve():
+    server = uvicorn.Server(uvicorn.Config(app, port=PORT, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    for _ in range(100):
+        if server.started:
+            return server
+        time.sleep(0.05)
+    raise RuntimeError("uvicorn did not start")
+
+
+def run(name, backend, size, chunk):
+    storage_module._storage = backend
+    client = httpx.Client(base_url=f"http://127.0.0.1:{PORT}", timeout=300)
+    dictation_id = create_dictation()
+    tracemalloc.start()
+    started = time.perf_counter()
+    r = client.put(f"/dictations/{dictation_id}/audio", params={"filename": "bench.wav"}, content=body(size, chunk))
+    upload_s = time.perf_counter() - started
+    _, upload_peak = tracemalloc.get_traced_memory()
+    assert r.status_code == 200, r.text
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    read = 0
+    with client.stream("GET", f"/dictations/{dictation_id}/audio", headers={"Range": f"bytes={size // 2}-"}) as response:
+        for data in response.iter_bytes():
+            read += len(data)
+    read_s = time.perf_counter() - started
+    _, read_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert read == size - size // 2
+    print(f"{name:8} upload {size / upload_s / 1e6:7.1f} MB/s  peak {upload_peak / 1e6:6.2f} MB   "
+          f"range read {read / read_s / 1e6:7.1f} MB/s  peak {read_peak / 1e6:6.2f} MB")
+
+
+def main():
+    size = int(float(sys.argv[1]) * 1024 * 1024) if len(sys.argv) > 1 else 256 * 1024 * 1024
+    chunk = int(sys.argv[2]) * 1024 if len(sys.argv) > 2 else 64 * 1024
+    print(f"{size / 1024 / 1024:.0f} MB file, {chunk // 1024} KB request chunks")
+    server = serve()
+    with tempfile.TemporaryDirectory() as local_dir, tempfile.TemporaryDirectory() as object_dir:
+        run("local", LocalStorage(local_dir), size, chunk)
+        run("s3-like", ObjectStorage(LocalObjectStore(object_dir), "audio"), size, chunk)
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Benchmark: per-row POST vs POST /{prefix}/bulk throughput (rows/sec).
+Runs in-process against the database referenced by DATABASE_URL (tables must exist).
+Usage: python Scripts/Bench/bench_bulk_insert.py [rows]
+"""
+import os
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from fastapi.testclient import TestClient
+from app.main import app
+
+
+def patient_rows(hospital_id, count):
+    return [
+        {"hospital_id": hospital_id, "external_id": f"MRN-{uuid.uuid4().hex[:10]}", "first_name": "Bench", "last_name": str(i)}
+        for i in range(count)
+    ]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    client = TestClient(app)
+    r = client.post("/hospitals/", json={"name": "Bench Hospital", "code": f"BENCH_{uuid.uuid4().hex[:8]}"})
+    r.raise_for_status()
+    hospital_id = r.json()["id"]
+
+    started = time.perf_counter()
+    for row in patient_rows(hospital_id, rows):
+        client.post("/patients/", json=row).raise_for_status()
+    per_row = rows / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    r = client.post("/patients/bulk", json=patient_rows(hospital_id, rows))
+    r.raise_for_status()
+    bulk = r.json()["written"] / (time.perf_counter() - started)
+
+    print(f"rows: {rows}")
+    print(f"per-row POST /patients/     : {per_row:10.1f} rows/sec")
+    print(f"POST /patients/bulk         : {bulk:10.1f} rows/sec ({bulk / per_row:.1f}x)")
+    print(f"server-side bulk write rate : {r.json()['rows_per_sec']:10.1f} rows/sec")
+
+
+if __name__ == "__main__":
+    main()
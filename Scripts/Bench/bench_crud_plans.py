@@ -0,0 +1,51 @@
+"""Micro-benchmark: per-request statement/parameter building in the generic CRUD router.
+Compares the previous per-call construction (walk columns, build text(), build params)
+with the precompiled EntityPlan used by create_crud_router.
+Usage: python Scripts/Bench/bench_crud_plans.py [iterations]
+"""
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import text
+from app import models
+from app.crud_plans import EntityPlan, sa_type_to_pg, proc_columns
+
+
+def legacy_build(model, payload):
+    """Per-request work done before precompiled plans existed."""
+    cols = proc_columns(model)
+    args = ["CAST(:p_id AS bigint)"]
+    for c in cols:
+        args.append(f"CAST(:p_{c.name} AS {sa_type_to_pg(c)})")
+    stmt = text(f"SELECT Save{model.__name__}({', '.join(args)})")
+    merged = {c.name: payload.get(c.name, None) for c in proc_columns(model)}
+    params = {"p_id": None}
+    for k, v in merged.items():
+        params[f"p_{k}"] = v
+    return stmt, params
+
+
+def sample_payload(model):
+    return {c.name: None for c in proc_columns(model)}
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{'entity':<20} {'columns':>7} {'legacy us/op':>13} {'plan us/op':>11} {'speedup':>8}")
+    for model in (models.Hospital, models.Dictation, models.SNOMEDAnnotation, models.ClinicalDocument):
+        payload = sample_payload(model)
+        plan = EntityPlan(model)
+        legacy = timeit.timeit(lambda: legacy_build(model, payload), number=iterations)
+        planned = timeit.timeit(lambda: (plan.save_stmt, plan.bind(payload)), number=iterations)
+        legacy_us = legacy / iterations * 1e6
+        plan_us = planned / iterations * 1e6
+        print(f"{model.__name__:<20} {len(plan.columns):>7} {legacy_us:>13.2f} {plan_us:>11.2f} {legacy_us / plan_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
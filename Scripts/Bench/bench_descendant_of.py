@@ -0,0 +1,107 @@
+"""Benchmark: `descendant_of` annotation filters through snomed_closure vs a recursive CTE over snomed_is_a.
+Runs against the database referenced by DATABASE_URL (run `python -m app.bootstrap` first). REPLACES the
+SNOMED tables with a synthetic deep hierarchy (a spine of `depth` levels with side branches), seeds
+annotations, then reports the median time to count the annotations under ancestors at several depths.
+Usage: python Scripts/Bench/bench_descendant_of.py [depth] [concepts] [annotations] [repeats]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import delete, func, select, text
+from app import models
+from app.database import SessionLocal, engine
+from app.pagination import scope_filters
+from app.snomed import build_closure
+
+BASE_ID = 900000000
+
+RECURSIVE = text(
+    "WITH RECURSIVE down(id) AS ("
+    " SELECT :ancestor UNION SELECT i.source_id FROM snomed_is_a i JOIN down ON i.destination_id = down.id"
+    ") SELECT count(*) FROM snomed_annotations WHERE snomed_concept_id IN (SELECT id FROM down)"
+)
+
+
+def seed_hierarchy(depth, concepts, rng):
+    """Spine BASE_ID (root) .. BASE_ID + depth - 1; every other concept hangs off a random earlier one."""
+    is_a = [(BASE_ID + i, BASE_ID + i - 1) for i in range(1, depth)]
+    for i in range(depth, concepts):
+        parent = BASE_ID + rng.randrange(i)
+        is_a.append((BASE_ID + i, parent))
+        if i % 5 == 0:  # some concepts have a second parent, as in SNOMED
+            is_a.append((BASE_ID + i, BASE_ID + rng.randrange(i)))
+    is_a = sorted({pair for pair in is_a if pair[0] != pair[1]})
+    with engine.begin() as conn:
+        for model in (models.SnomedClosure, models.SnomedIsA, models.SnomedDescription, models.SnomedConcept):
+            conn.execute(delete(model.__table__))
+        conn.execute(models.SnomedConcept.__table__.insert(), [
+            {"id": BASE_ID + i, "fsn": f"Concept {i} (disorder)", "preferred_term": f"Concept {i}"} for i in range(concepts)
+        ])
+        conn.execute(models.SnomedIsA.__table__.insert(), [{"source_id": s, "destination_id": d} for s, d in is_a])
+        started = time.perf_counter()
+        rows = build_closure(conn)
+    print(f"hierarchy: {concepts} concepts, {len(is_a)} is-a, depth {depth}; closure {rows} rows in {time.perf_counter() - started:.2f}s")
+
+
+def seed_annotations(count, concepts, rng):
+    with SessionLocal() as db:
+        hosp = models.Hospital(name="Bench Hospital", code=f"BENCH_{uuid.uuid4().hex[:8]}")
+        user = models.User(name="Bench Doctor", password="x")
+        db.add_all([hosp, user])
+        db.flush()
+        dept = models.Department(hospital_id=hosp.id, name="Bench")
+        db.add(dept)
+        db.flush()
+        doc = models.Doctor(hospital_id=hosp.id, department_id=dept.id, userid=user.id)
+        db.add(doc)
+        db.flush()
+        dictation = models.Dictation(hospital_id=hosp.id, department_id=dept.id, doctor_id=doc.id, status="recorded")
+        db.add(dictation)
+        db.commit()
+        ids = (dictation.id, doc.id)
+    with engine.begin() as conn:
+        conn.execute(models.SNOMEDAnnotation.__table__.insert(), [
+            {"dictation_id": ids[0], "doctor_id": ids[1], "snomed_concept_id": BASE_ID + rng.randrange(concepts), "term": "bench"}
+            for _ in range(count)
+        ])
+
+
+def timed(run, repeats):
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = run()
+        samples.append(time.perf_counter() - t0)
+    return result, statistics.median(samples) * 1000
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    concepts = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    annotations = int(sys.argv[3]) if len(sys.argv) > 3 else 100000
+    repeats = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+    rng = random.Random(3)
+    seed_hierarchy(depth, concepts, rng)
+    seed_annotations(annotations, concepts, rng)
+
+    with engine.connect() as conn:
+        for level in (0, depth // 4, depth // 2, depth - 1):
+            ancestor = BASE_ID + level
+            closure_stmt = select(func.count()).select_from(models.SNOMEDAnnotation).where(*scope_filters(models.SNOMEDAnnotation, descendant_of=ancestor))
+            matched, closure_ms = timed(lambda: conn.execute(closure_stmt).scalar(), repeats)
+            check, recursive_ms = timed(lambda: conn.execute(RECURSIVE, {"ancestor": ancestor}).scalar(), repeats)
+            assert matched == check, (matched, check)
+            print(f"level {level:3}: {matched:7} annotations  closure {closure_ms:8.2f} ms  recursive CTE {recursive_ms:8.2f} ms"
+                  f"  ({recursive_ms / closure_ms if closure_ms else float('inf'):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark: reading doctor pages with the photo on the row (old shape) vs from `doctor_photos`.
+Runs against the database referenced by DATABASE_URL (run `python -m app.bootstrap` first). Inserts
+`doctors` doctors with a `photo_kb` KB photo each, then reports the median time to load every doctor
+through the ORM, with and without the photo bytes alongside.
+Usage: python Scripts/Bench/bench_doctor_photos.py [doctors] [photo_kb] [repeats]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import select
+from app import models
+from app.database import SessionLocal, engine
+from app.doctor_photos import photo_values
+
+
+def seed(doctors, photo_kb, rng):
+    with SessionLocal() as db:
+        hosp = models.Hospital(name="Bench Hospital", code=f"BENCH_{uuid.uuid4().hex[:8]}")
+        user = models.User(name="Bench Doctor", password="x")
+        db.add_all([hosp, user])
+        db.commit()
+        hospital_id, user_id = hosp.id, user.id
+    with engine.begin() as conn:
+        ids = conn.execute(
+            models.Doctor.__table__.insert().returning(models.Doctor.id),
+            [{"hospital_id": hospital_id, "userid": user_id, "first_name": f"Doc{i}", "last_name": "Bench"} for i in range(doctors)],
+        ).scalars().all()
+        for doctor_id in ids:
+            data = b"\xff\xd8\xff" + rng.randbytes(photo_kb * 1024)
+            conn.execute(models.DoctorPhoto.__table__.insert().values(doctor_id=doctor_id, **photo_values(data, "image/jpeg")))
+    return hospital_id
+
+
+def timed(run, repeats):
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    doctors = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    photo_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    hospital_id = seed(doctors, photo_kb, random.Random(7))
+    d, p = models.Doctor, models.DoctorPhoto
+    narrow = select(d).where(d.hospital_id == hospital_id).order_by(d.id)
+    # The old row shape: every doctor read also carried the image bytes
+    wide = select(d, p.data).outerjoin(p, p.doctor_id == d.id).where(d.hospital_id == hospital_id).order_by(d.id)
+    with SessionLocal() as db:
+        narrow_ms = timed(lambda: db.execute(narrow).all(), repeats)
+        db.expunge_all()
+        wide_ms = timed(lambda: db.execute(wide).all(), repeats)
+    print(f"{doctors} doctors, {photo_kb} KB photos")
+    print(f"doctors only {narrow_ms:8.2f} ms   with photo bytes {wide_ms:8.2f} ms   ({wide_ms / narrow_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark: default (pydantic orm_mode + jsonable_encoder) vs fast_json responses for large pages.
+Runs in-process against the database referenced by DATABASE_URL (run `python -m app.bootstrap` first).
+Seeds SNOMED annotations, then reports req/s and p50/p99 of GET /snomed_annotations/page?limit=N.
+Usage: python Scripts/Bench/bench_fast_json.py [requests] [page_size]
+"""
+import os
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app import models, schemas
+from app.database import SessionLocal
+from app.router_factory import create_crud_router
+
+
+def seed(rows):
+    with SessionLocal() as db:
+        hosp = models.Hospital(name="Bench Hospital", code=f"BENCH_{uuid.uuid4().hex[:8]}")
+        user = models.User(name="Bench Doctor", password="x")
+        db.add_all([hosp, user])
+        db.flush()
+        dept = models.Department(hospital_id=hosp.id, name="Bench")
+        db.add(dept)
+        db.flush()
+        doc = models.Doctor(hospital_id=hosp.id, department_id=dept.id, userid=user.id)
+        db.add(doc)
+        db.flush()
+        dictation = models.Dictation(hospital_id=hosp.id, department_id=dept.id, doctor_id=doc.id, status="recorded")
+        db.add(dictation)
+        db.flush()
+        db.add_all([
+            models.SNOMEDAnnotation(
+                dictation_id=dictation.id, doctor_id=doc.id, snomed_concept_id=22298006 + i,
+                term=f"Myocardial infarction {i}", category="disorder", start_char=i, end_char=i + 21,
+                confidence=Decimal("0.912"), model_used="bench", extra={"source": "bench", "rank": i},
+            )
+            for i in range(rows)
+        ])
+        db.commit()
+        return hosp.id
+
+
+def client_for(fast_json):
+    app = FastAPI()
+    app.include_router(create_crud_router(
+        model=models.SNOMEDAnnotation,
+        create_schema=schemas.SNOMEDAnnotationCreate,
+        update_schema=schemas.SNOMEDAnnotationUpdate,
+        out_schema=schemas.SNOMEDAnnotationOut,
+        prefix="snomed_annotations",
+        fast_json=fast_json,
+    ))
+    return TestClient(app)
+
+
+def run(client, hospital_id, requests, page_size):
+    params = {"hospital_id": hospital_id, "limit": page_size}
+    client.get("/snomed_annotations/page", params=params).raise_for_status()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        client.get("/snomed_annotations/page", params=params).raise_for_status()
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return requests / elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99) - 1] * 1000
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    hospital_id = seed(page_size)
+    print(f"requests: {requests}  page size: {page_size}")
+    results = {}
+    for label, fast in (("default (orm_mode)", False), ("fast_json", True)):
+        rps, p50, p99 = run(client_for(fast), hospital_id, requests, page_size)
+        results[label] = rps
+        print(f"{label:20}: {rps:8.1f} req/s  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+    print(f"speed-up: {results['fast_json'] / results['default (orm_mode)']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
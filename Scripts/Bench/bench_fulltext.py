@@ -0,0 +1,100 @@
+"""Benchmark: `GET /search` full-text queries over synthetic transcriptions.
+Runs against the database referenced by DATABASE_URL (run `python -m app.bootstrap` first). Seeds
+`docs` transcriptions of ~`words` words each, drawn from a Zipf-distributed vocabulary, then reports
+p50/p99 of `app.fulltext.search` for rare, mid-frequency and common terms, two-word queries, a
+doctor-filtered query and a page fetched through a cursor.
+Usage: python Scripts/Bench/bench_fulltext.py [docs] [words] [repeats]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app import models
+from app.database import SessionLocal, engine
+from app.fulltext import search
+
+VOCABULARY = 50000
+SEED_CHUNK = 5000
+
+
+def make_vocabulary(rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < VOCABULARY:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(4, 11))))
+    return sorted(words)
+
+
+def seed(docs, words, vocabulary, rng):
+    with SessionLocal() as db:
+        hosp = models.Hospital(name="Bench Hospital", code=f"BENCH_{uuid.uuid4().hex[:8]}")
+        users = [models.User(name=f"Bench Doctor {i}", password="x") for i in range(10)]
+        db.add_all([hosp, *users])
+        db.flush()
+        dept = models.Department(hospital_id=hosp.id, name="Bench")
+        db.add(dept)
+        db.flush()
+        doctors = [models.Doctor(hospital_id=hosp.id, department_id=dept.id, userid=user.id) for user in users]
+        db.add_all(doctors)
+        db.flush()
+        dictation = models.Dictation(hospital_id=hosp.id, department_id=dept.id, doctor_id=doctors[0].id, status="transcribed")
+        db.add(dictation)
+        db.commit()
+        dictation_id, doctor_ids = dictation.id, [d.id for d in doctors]
+
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY)]
+    started = time.perf_counter()
+    for offset in range(0, docs, SEED_CHUNK):
+        rows = []
+        for _ in range(min(SEED_CHUNK, docs - offset)):
+            text = " ".join(rng.choices(vocabulary, weights, k=words))
+            rows.append({"dictation_id": dictation_id, "doctor_id": rng.choice(doctor_ids), "raw_text": text})
+        with engine.begin() as conn:
+            conn.execute(models.Transcription.__table__.insert(), rows)
+    elapsed = time.perf_counter() - started
+    print(f"seeded {docs} transcriptions ({docs * words / 1e6:.1f}M words) in {elapsed:.1f}s, index maintained on write")
+    return doctor_ids[0]
+
+
+def timed(run, repeats):
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = run()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return result, statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+
+
+def main():
+    docs = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    words = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    rng = random.Random(7)
+    vocabulary = make_vocabulary(rng)
+    doctor_id = seed(docs, words, vocabulary, rng)
+
+    with SessionLocal() as db:
+        first_page = search(db, "transcriptions", vocabulary[200])
+        cases = [
+            ("rare term", {"q": vocabulary[30000]}),
+            ("mid-frequency term", {"q": vocabulary[2000]}),
+            ("common term", {"q": vocabulary[200]}),
+            ("two terms", {"q": f"{vocabulary[200]} {vocabulary[2000]}"}),
+            ("common term, doctor filter", {"q": vocabulary[200], "doctor_id": doctor_id}),
+            ("common term, second page", {"q": vocabulary[200], "cursor": first_page["next_cursor"]}),
+        ]
+        for name, params in cases:
+            page, p50, p99 = timed(lambda: search(db, "transcriptions", **params), repeats)
+            print(f"{name:28} {len(page['items']):3} hits  p50 {p50:8.2f} ms  p99 {p99:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
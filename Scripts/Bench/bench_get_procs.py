@@ -0,0 +1,87 @@
+"""Benchmark (PostgreSQL only): single-row Get{Entity} access at realistic table sizes.
+Seeds `patients`, then compares the previous `WHERE p_id IS NULL OR id = p_id` shape with the
+split single-row/range shape used by Scripts/StoredProc/Get*.sql:
+  - the generic (cached) plan each shape gets inside PL/pgSQL, via EXPLAIN EXECUTE
+  - average latency of GetPatient(id) calls vs an equivalent legacy function
+Usage: python Scripts/Bench/bench_get_procs.py [rows] [lookups]
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import text
+from app.database import engine
+
+LEGACY_FN = """
+CREATE OR REPLACE FUNCTION pg_temp.getpatient_legacy(p_id BIGINT DEFAULT NULL)
+RETURNS SETOF patients AS $$
+BEGIN
+    RETURN QUERY SELECT * FROM patients p WHERE p_id IS NULL OR p.id = p_id;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def plan_nodes(conn, stmt_name):
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) EXECUTE {stmt_name}(:id)"), {"id": 1}).scalar()
+    node = plan[0]["Plan"]
+    nodes = []
+    while node:
+        nodes.append(f"{node['Node Type']}" + (f" using {node['Index Name']}" if "Index Name" in node else ""))
+        node = (node.get("Plans") or [None])[0]
+    return " -> ".join(nodes)
+
+
+def time_calls(conn, sql, ids):
+    stmt = text(sql)
+    started = time.perf_counter()
+    for pid in ids:
+        conn.execute(stmt, {"id": pid}).fetchall()
+    return (time.perf_counter() - started) / len(ids) * 1e6
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("This benchmark needs DATABASE_URL to point at PostgreSQL")
+
+    with engine.begin() as conn:
+        hospital_id = conn.execute(
+            text("INSERT INTO hospitals (name, code, is_active) VALUES ('Bench', :code, true) RETURNING id"),
+            {"code": f"B{int(time.time())}"[-20:]},
+        ).scalar()
+        conn.execute(
+            text("INSERT INTO patients (hospital_id, first_name) SELECT :h, 'P' || g FROM generate_series(1, :n) g"),
+            {"h": hospital_id, "n": rows},
+        )
+        conn.execute(text("ANALYZE patients"))
+
+    with engine.connect() as conn:
+        total = conn.execute(text("SELECT count(*) FROM patients")).scalar()
+        lo, hi = conn.execute(text("SELECT min(id), max(id) FROM patients")).one()
+        ids = [random.randint(lo, hi) for _ in range(lookups)]
+
+        # PL/pgSQL caches a generic plan per statement; force the same here to inspect it
+        conn.execute(text("SET plan_cache_mode = force_generic_plan"))
+        conn.execute(text("PREPARE legacy_shape(bigint) AS SELECT * FROM patients p WHERE $1 IS NULL OR p.id = $1"))
+        conn.execute(text("PREPARE single_shape(bigint) AS SELECT * FROM patients p WHERE p.id = $1"))
+        print(f"patients rows: {total}")
+        print(f"legacy shape generic plan : {plan_nodes(conn, 'legacy_shape')}")
+        print(f"single-row generic plan   : {plan_nodes(conn, 'single_shape')}")
+        conn.execute(text("RESET plan_cache_mode"))
+
+        conn.execute(text(LEGACY_FN))
+        legacy_us = time_calls(conn, "SELECT * FROM pg_temp.getpatient_legacy(CAST(:id AS bigint))", ids)
+        current_us = time_calls(conn, "SELECT * FROM GetPatient(CAST(:id AS bigint))", ids)
+        print(f"legacy GetPatient(id)     : {legacy_us:10.1f} us/call")
+        print(f"GetPatient(id)            : {current_us:10.1f} us/call ({legacy_us / current_us:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
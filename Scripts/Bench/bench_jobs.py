@@ -0,0 +1,58 @@
+"""Benchmark: transcription job throughput of `python -m app.jobs` by number of worker processes.
+Runs against the database referenced by DATABASE_URL (run `python -m app.bootstrap` first). For each
+worker count, queues `jobs` dictations and drains the queue with the process pool. The stub
+transcriber burns STUB_TRANSCRIBER_WORK hash rounds per job to stand in for a CPU-bound model.
+Usage: python Scripts/Bench/bench_jobs.py [jobs] [work] [max_workers]
+"""
+import os
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app import models
+from app.database import SessionLocal, engine
+from app.jobs import enqueue_recorded, run_pool
+
+
+def seed(jobs):
+    with SessionLocal() as db:
+        hosp = models.Hospital(name="Bench Hospital", code=f"BENCH_{uuid.uuid4().hex[:8]}")
+        user = models.User(name="Bench Doctor", password="x")
+        db.add_all([hosp, user])
+        db.flush()
+        dept = models.Department(hospital_id=hosp.id, name="Bench")
+        db.add(dept)
+        db.flush()
+        doc = models.Doctor(hospital_id=hosp.id, department_id=dept.id, userid=user.id)
+        db.add(doc)
+        db.commit()
+        row = {"hospital_id": hosp.id, "department_id": dept.id, "doctor_id": doc.id, "status": "recorded"}
+    with engine.begin() as conn:
+        conn.execute(models.Dictation.__table__.insert(), [{**row, "audio_path": f"bench/{i}.wav"} for i in range(jobs)])
+    with SessionLocal() as db:
+        return enqueue_recorded(db)
+
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    work = sys.argv[2] if len(sys.argv) > 2 else "20000"
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+    # Read by the stub in each spawned worker process
+    os.environ["STUB_TRANSCRIBER_WORK"] = work
+    print(f"{jobs} jobs, {work} hash rounds each, {os.cpu_count()} CPU cores")
+    workers = 1
+    while workers <= max_workers:
+        queued = seed(jobs)
+        started = time.perf_counter()
+        processed = run_pool(workers=workers, idle_exit=True)
+        elapsed = time.perf_counter() - started
+        print(f"{workers:3d} workers: {processed} of {queued} jobs in {elapsed:6.2f}s ({processed / elapsed:8.1f} jobs/s)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
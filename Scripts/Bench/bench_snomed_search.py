@@ -0,0 +1,77 @@
+"""Benchmark: SNOMED type-ahead search (app/snomed_search.py TermIndex) over a synthetic dictionary.
+Builds an in-memory index of N generated descriptions (default 320000; no database needed), then
+reports the build time and p50/p99 latency of prefix, multi-word and misspelled queries.
+Words follow a Zipf-like distribution over a generated vocabulary, as in real terminologies.
+Usage: python Scripts/Bench/bench_snomed_search.py [descriptions] [queries per kind]
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.snomed_search import TermIndex
+
+SYLLABLES = ["car", "di", "o", "my", "pul", "mo", "na", "ry", "re", "hep", "at", "ic", "ce", "bral", "gas", "tro",
+             "fem", "ret", "in", "al", "spi", "thy", "roid", "pan", "cre", "cor", "bron", "chi", "cu", "ta", "ne",
+             "ous", "va", "scu", "lar", "fib", "ro", "sis", "sten", "em", "bo", "lism", "hy", "per", "troph",
+             "neu", "ral", "gi", "a", "ost", "e", "itis", "oma", "path", "y", "plas", "ec", "to", "my", "lo"]
+
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))))
+    return sorted(words)
+
+
+def descriptions(count, rng):
+    # Zipf-like word frequencies, as in clinical terminologies: a few very common words, a long tail
+    words = vocabulary(count // 12, rng)
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    for i in range(count):
+        term = " ".join(rng.choices(words, weights, k=rng.randint(2, 5)))
+        yield 100000000 + i // 3, term.capitalize(), term.capitalize(), i % 3 == 0
+
+
+def typo(word, rng):
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:]
+
+
+def run(index, queries):
+    latencies = []
+    for q in queries:
+        t0 = time.perf_counter()
+        index.search(q, 10)
+        latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000, latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 320000
+    per_kind = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    rng = random.Random(7)
+    rows = list(descriptions(count, rng))
+    started = time.perf_counter()
+    index = TermIndex(rows)
+    print(f"descriptions: {len(index)}  build: {time.perf_counter() - started:.2f}s")
+
+    sample = [rows[rng.randrange(len(rows))][1].lower().split() for _ in range(per_kind)]
+    kinds = {
+        "prefix (3-6 chars)": [w[0][:rng.randint(3, 6)] for w in sample],
+        "two-word prefix": [f"{w[0][:4]} {w[1][:4]}" for w in sample],
+        "misspelled": [" ".join(typo(word, rng) if len(word) > 3 else word for word in w[:2]) for w in sample],
+        "no match": [f"zq{i}xv" for i in range(per_kind)],
+    }
+    for label, queries in kinds.items():
+        p50, p99 = run(index, queries)
+        print(f"{label:20}: p50 {p50:7.3f} ms  p99 {p99:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark: documents/sec of the SNOMED annotation stage (app/tagger.py), in-process and with a process pool.
+Runs against the database referenced by DATABASE_URL (run `python -m app.bootstrap` first). REPLACES the
+SNOMED tables with `terms` synthetic synonyms of 1-4 words, then for each worker count inserts `docs`
+transcriptions of about 150 words (a few dictionary terms each) and runs the stage until they are tagged.
+Usage: python Scripts/Bench/bench_tagger.py [terms] [docs] [max_workers]
+"""
+import os
+import random
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import delete
+from app import models
+from app.database import SessionLocal, engine
+from app.snomed import SYNONYM
+from app.tagger import DictionaryTagger, run_stage
+
+BASE_ID = 930000000
+CHUNK = 10000
+SYLLABLES = "car dio my o pul mo neph ro gas tro hep a to derm al itis osis emia algia pathy plasia".split()
+
+
+def word(rng):
+    return "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+
+
+def seed_dictionary(terms, rng):
+    rows = [" ".join(word(rng) for _ in range(rng.randint(1, 4))) for _ in range(terms)]
+    with engine.begin() as conn:
+        for table in (models.SnomedClosure, models.SnomedIsA, models.SnomedDescription, models.SnomedConcept):
+            conn.execute(delete(table))
+        concepts = [{"id": BASE_ID + i, "fsn": f"{term} (disorder)", "preferred_term": term} for i, term in enumerate(rows)]
+        descriptions = [
+            {"id": BASE_ID + i, "concept_id": BASE_ID + i, "term": term, "type_id": SYNONYM, "preferred": True}
+            for i, term in enumerate(rows)
+        ]
+        for i in range(0, terms, CHUNK):
+            conn.execute(models.SnomedConcept.__table__.insert(), concepts[i:i + CHUNK])
+            conn.execute(models.SnomedDescription.__table__.insert(), descriptions[i:i + CHUNK])
+    return rows
+
+
+def seed_transcriptions(docs, terms, rng):
+    with SessionLocal() as db:
+        hosp = models.Hospital(name="Bench Hospital", code=f"BENCH_{uuid.uuid4().hex[:8]}")
+        user = models.User(name="Bench Doctor", password="x")
+        db.add_all([hosp, user])
+        db.flush()
+        dept = models.Department(hospital_id=hosp.id, name="Bench")
+        db.add(dept)
+        db.flush()
+        doc = models.Doctor(hospital_id=hosp.id, department_id=dept.id, userid=user.id,
+                            custom_vocab={"synonyms": {terms[0].split()[0]: BASE_ID}})
+        db.add(doc)
+        db.flush()
+        dictation = models.Dictation(hospital_id=hosp.id, department_id=dept.id, doctor_id=doc.id, status="transcribed")
+        db.add(dictation)
+        db.commit()
+        dictation_id, doctor_id = dictation.id, doc.id
+    filler = "patient reports since two days with no fever and the exam was otherwise normal".split()
+    rows = []
+    for _ in range(docs):
+        words = rng.choices(filler, k=140)
+        for term in rng.sample(terms, 5):
+            words.insert(rng.randrange(len(words)), term)
+        rows.append({"dictation_id": dictation_id, "doctor_id": doctor_id, "raw_text": " ".join(words)})
+    with engine.begin() as conn:
+        for i in range(0, docs, CHUNK):
+            conn.execute(models.Transcription.__table__.insert(), rows[i:i + CHUNK])
+
+
+def main():
+    terms = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    docs = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else os.cpu_count() or 1
+    rng = random.Random(5)
+    dictionary = seed_dictionary(terms, rng)
+    started = time.perf_counter()
+    tagger = DictionaryTagger.from_db()
+    print(f"{terms} terms, automaton built in {time.perf_counter() - started:.1f}s; {docs} docs per run, {os.cpu_count()} CPU cores")
+    # Drain whatever was pending before the benchmark
+    run_stage(tagger=tagger, settle_sec=0)
+    for workers in sorted({1, *[2 ** i for i in range(1, max_workers.bit_length()) if 2 ** i <= max_workers]}):
+        seed_transcriptions(docs, dictionary, rng)
+        stats = run_stage(workers=workers, tagger=tagger if workers == 1 else None, settle_sec=0)
+        print(f"{workers:3d} workers: {stats['documents']} docs, {stats['spans']} spans in {stats['seconds']:6.2f}s "
+              f"({stats['docs_per_sec']:8.1f} docs/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark: per-doctor daily dashboard totals from `transcription_daily_stats` vs scanning `raw_text`.
+Runs against the database referenced by DATABASE_URL (run `python -m app.bootstrap` first). Inserts
+`docs` transcriptions spread over `doctors` doctors and `days` days (the insert rate includes the
+stats triggers), then reports the median time of the dashboard query both ways.
+Usage: python Scripts/Bench/bench_text_stats.py [docs] [doctors] [days] [repeats]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import func, select
+from app import models
+from app.database import SessionLocal, engine
+from app.text_stats import count_words, daily_stats
+
+SEED_CHUNK = 5000
+WORDS = "patient reports chest pain radiating to left arm no fever denies dyspnea exam normal plan ecg troponin".split()
+
+
+def seed(docs, doctors, days, rng):
+    with SessionLocal() as db:
+        hosp = models.Hospital(name="Bench Hospital", code=f"BENCH_{uuid.uuid4().hex[:8]}")
+        users = [models.User(name=f"Bench Doctor {i}", password="x") for i in range(doctors)]
+        db.add_all([hosp, *users])
+        db.flush()
+        dept = models.Department(hospital_id=hosp.id, name="Bench")
+        db.add(dept)
+        db.flush()
+        doctor_rows = [models.Doctor(hospital_id=hosp.id, department_id=dept.id, userid=user.id) for user in users]
+        db.add_all(doctor_rows)
+        db.flush()
+        dictation = models.Dictation(hospital_id=hosp.id, department_id=dept.id, doctor_id=doctor_rows[0].id, status="transcribed")
+        db.add(dictation)
+        db.commit()
+        dictation_id, doctor_ids, hospital_id = dictation.id, [d.id for d in doctor_rows], hosp.id
+
+    start = datetime.now(timezone.utc) - timedelta(days=days)
+    started = time.perf_counter()
+    for offset in range(0, docs, SEED_CHUNK):
+        rows = [
+            {
+                "dictation_id": dictation_id,
+                "doctor_id": rng.choice(doctor_ids),
+                "raw_text": " ".join(rng.choices(WORDS, k=rng.randint(50, 400))),
+                "created_at": start + timedelta(seconds=rng.randrange(days * 86400)),
+            }
+            for _ in range(min(SEED_CHUNK, docs - offset))
+        ]
+        with engine.begin() as conn:
+            conn.execute(models.Transcription.__table__.insert(), rows)
+    elapsed = time.perf_counter() - started
+    print(f"inserted {docs} transcriptions in {elapsed:.1f}s ({docs / elapsed:,.0f} rows/s with stats triggers)")
+    return hospital_id
+
+
+def scan(db, hospital_id):
+    # What dashboards did before: read every transcription and count in the client
+    t = models.Transcription
+    doctors = select(models.Doctor.id).where(models.Doctor.hospital_id == hospital_id)
+    totals = {}
+    for doctor_id, created_at, raw_text in db.execute(select(t.doctor_id, t.created_at, t.raw_text).where(t.doctor_id.in_(doctors))):
+        key = (doctor_id, str(created_at)[:10])
+        n, words, chars = totals.get(key, (0, 0, 0))
+        totals[key] = (n + 1, words + count_words(raw_text), chars + len(raw_text))
+    return len(totals)
+
+
+def timed(run, repeats):
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = run()
+        samples.append(time.perf_counter() - t0)
+    return result, statistics.median(samples) * 1000
+
+
+def main():
+    docs = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    doctors = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    days = int(sys.argv[3]) if len(sys.argv) > 3 else 90
+    repeats = int(sys.argv[4]) if len(sys.argv) > 4 else 5
+    hospital_id = seed(docs, doctors, days, random.Random(11))
+    with SessionLocal() as db:
+        rows, rollup_ms = timed(lambda: len(daily_stats(db, hospital_id=hospital_id)), repeats)
+        groups, scan_ms = timed(lambda: scan(db, hospital_id), repeats)
+        words = db.execute(select(func.sum(models.Transcription.word_count))).scalar()
+    print(f"{rows} doctor-days ({groups} by scan), {words:,} words")
+    print(f"rollup {rollup_ms:8.2f} ms   raw_text scan {scan_ms:8.2f} ms   ({scan_ms / rollup_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
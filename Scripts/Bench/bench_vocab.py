@@ -0,0 +1,92 @@
+"""Benchmark: per-request latency of tagging a text with a doctor's custom_vocab (app/vocab.py).
+Runs against the database referenced by DATABASE_URL (run `python -m app.bootstrap` first). Inserts
+`doctors` doctors with `synonyms` synthetic synonyms each, then tags `requests` texts of about 150 words
+for random doctors: compiling the vocabulary on every request (load custom_vocab, build the automaton)
+vs the cached compiled matcher, which only reads `vocab_version`.
+Usage: python Scripts/Bench/bench_vocab.py [doctors] [synonyms] [requests]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import select
+from app import models
+from app.database import SessionLocal
+from app.snomed_search import doctor_synonyms
+from app.tagger import synonym_automaton
+from app.vocab import VocabMatchers, tag_text
+
+BASE_ID = 940000000
+SYLLABLES = "car dio my o pul mo neph ro gas tro hep a to derm al itis osis emia algia pathy plasia".split()
+
+
+def word(rng):
+    return "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+
+
+def seed_doctors(doctors, synonyms, rng):
+    with SessionLocal() as db:
+        hosp = models.Hospital(name="Bench Hospital", code=f"BENCH_{uuid.uuid4().hex[:8]}")
+        user = models.User(name="Bench Doctor", password="x")
+        db.add_all([hosp, user])
+        db.flush()
+        vocabs, rows = [], []
+        for _ in range(doctors):
+            terms = {" ".join(word(rng) for _ in range(rng.randint(1, 3))): BASE_ID + i for i in range(synonyms)}
+            vocabs.append(list(terms))
+            rows.append(models.Doctor(hospital_id=hosp.id, userid=user.id, custom_vocab={"synonyms": terms}))
+        db.add_all(rows)
+        db.commit()
+        return [(row.id, terms) for row, terms in zip(rows, vocabs)]
+
+
+def per_request(db, doctor_id, text):
+    custom_vocab = db.execute(select(models.Doctor.custom_vocab).where(models.Doctor.id == doctor_id)).scalar()
+    return tag_text(synonym_automaton(doctor_synonyms(custom_vocab)), text)
+
+
+def timed(fn, requests):
+    latencies = []
+    spans = 0
+    with SessionLocal() as db:
+        for doctor_id, text in requests:
+            started = time.perf_counter()
+            spans += len(fn(db, doctor_id, text))
+            db.rollback()
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1], spans
+
+
+def main():
+    doctors = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    synonyms = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+    rng = random.Random(7)
+    seeded = seed_doctors(doctors, synonyms, rng)
+    filler = "patient reports since two days with no fever and the exam was otherwise normal".split()
+    requests = []
+    for _ in range(count):
+        doctor_id, terms = rng.choice(seeded)
+        words = rng.choices(filler, k=140)
+        for term in rng.sample(terms, 5):
+            words.insert(rng.randrange(len(words)), term)
+        requests.append((doctor_id, " ".join(words)))
+    matchers = VocabMatchers(maxsize=doctors)
+    print(f"{doctors} doctors x {synonyms} synonyms, {count} requests of ~150 words")
+    for name, fn in (("compile per request", per_request),
+                     ("cached matcher", lambda db, doctor_id, text: tag_text(matchers.get(db, doctor_id), text))):
+        p50, p99, spans = timed(fn, requests)
+        print(f"{name:20s} p50 {p50:7.3f} ms  p99 {p99:7.3f} ms  ({spans} spans)")
+    print(matchers.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Bulk-load a CSV/NDJSON backfill into dictations, transcriptions or snomed_annotations.
+Rows are staged with COPY FROM STDIN (executemany on SQLite) and merged set-based with the
+same conflict rules as the Save procedures; see app/copy_import.py.
+Usage: python Scripts/Import/bulk_import.py <entity> <file> [--format csv|ndjson] [--chunk-rows N] [--rejects out.ndjson]
+"""
+import argparse
+import json
+import os
+import sys
+from sqlalchemy import create_engine
+from dotenv import load_dotenv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.copy_import import IMPORT_TARGETS, import_records, read_records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="COPY-based bulk import")
+    parser.add_argument("entity", choices=sorted(IMPORT_TARGETS))
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="defaults to the file extension")
+    parser.add_argument("--chunk-rows", type=int, help="rows per staging/merge transaction")
+    parser.add_argument("--rejects", help="write rejected rows (line and error) to this NDJSON file")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise SystemExit("DATABASE_URL not set; aborting")
+    fmt = args.format or ("csv" if args.file.lower().endswith(".csv") else "ndjson")
+
+    engine = create_engine(database_url)
+    with open(args.file, newline="", encoding="utf-8") as f:
+        report = import_records(engine, args.entity, read_records(f, fmt), args.chunk_rows)
+
+    summary = report.summary()
+    print(f"{summary['entity']}: received {summary['received']}, inserted {summary['inserted']}, "
+          f"updated {summary['updated']}, rejected {summary['rejected']} "
+          f"in {summary['elapsed_ms'] / 1000:.2f}s ({summary['rows_per_sec']} rows/sec)")
+    if args.rejects:
+        with open(args.rejects, "w", encoding="utf-8") as out:
+            for rejected in report.rejected:
+                out.write(json.dumps(rejected, default=str) + "\n")
+    else:
+        for rejected in report.rejected[:20]:
+            print(f"  line {rejected['line']}: {rejected['error']}")
+        if len(report.rejected) > 20:
+            print(f"  ... {len(report.rejected) - 20} more (use --rejects to write them all)")
+    return 1 if report.rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
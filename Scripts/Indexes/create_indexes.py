@@ -0,0 +1,33 @@
+"""Create the indexes declared on app.models in an existing database (create_all only
+adds them to new tables). Missing indexes are created, existing ones are left alone.
+On PostgreSQL they are built CONCURRENTLY so writes are not blocked.
+Usage: python Scripts/Indexes/create_indexes.py
+"""
+import os
+import sys
+from sqlalchemy import create_engine
+from dotenv import load_dotenv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.bootstrap import index_ddl
+from app.models import Base
+
+load_dotenv()
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    raise SystemExit("DATABASE_URL not set; aborting")
+
+engine = create_engine(DATABASE_URL)
+concurrently = engine.dialect.name == "postgresql"
+
+# CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+    for table in Base.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            conn.exec_driver_sql(index_ddl(index, engine.dialect, concurrently))
+            print(f"ok  {index.name}")
+
+print("Indexes up to date.")
@@ -0,0 +1,28 @@
+"""Load an RF2 snapshot (Concept, Description, Relationship, Language refset files) into the
+snomed_concepts / snomed_descriptions / snomed_is_a tables, replacing their previous content,
+and rebuild the snomed_closure table.
+Running API workers pick up the new release after `POST /admin/snomed/reload`.
+Usage: python Scripts/Snomed/load_rf2.py <snapshot directory>
+"""
+import os
+import sys
+from sqlalchemy import create_engine
+from dotenv import load_dotenv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.snomed import load_rf2
+
+if len(sys.argv) != 2 or not os.path.isdir(sys.argv[1]):
+    raise SystemExit("Usage: python Scripts/Snomed/load_rf2.py <snapshot directory>")
+
+load_dotenv()
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    raise SystemExit("DATABASE_URL not set; aborting")
+
+stats = load_rf2(sys.argv[1], create_engine(DATABASE_URL))
+print(f"Loaded {stats['concepts']} concepts, {stats['descriptions']} descriptions, "
+      f"{stats['is_a']} is-a relationships ({stats['closure']} closure rows) in {stats['elapsed_ms'] / 1000:.2f}s")
@@ -1,4 +1,17 @@
-CREATE OR REPLACE FUNCTION GetClinicalDocument(p_id BIGINT DEFAULT NULL)
+-- GetClinicalDocument.sql
+-- Single-row lookup by id, or a keyset page (id > p_after_id ORDER BY id LIMIT p_limit) optionally
+-- restricted to one hospital.
+-- Each shape has its own RETURN QUERY, so each gets its own plan: the id lookup is a
+-- primary-key index probe and a call without p_id never materialises the whole table.
+
+DROP FUNCTION IF EXISTS GetClinicalDocument;
+
+CREATE OR REPLACE FUNCTION GetClinicalDocument(
+    p_id BIGINT DEFAULT NULL,
+    p_after_id BIGINT DEFAULT NULL,
+    p_limit INT DEFAULT 100,
+    p_hospital_id BIGINT DEFAULT NULL
+)
 RETURNS TABLE (
     id BIGINT,
     dictation_id BIGINT,
@@ -7,26 +20,58 @@ RETURNS TABLE (
     doctor_id BIGINT,
     patient_id BIGINT,
     encounter_id BIGINT,
-    document_type TEXT,
+    document_type VARCHAR,
     version INT,
-    status TEXT,
+    status VARCHAR,
     final_text TEXT,
-    fhir_resource_type TEXT,
+    fhir_resource_type VARCHAR,
     fhir_json JSONB,
     doctor_signature TEXT,
     signed_at TIMESTAMPTZ,
     created_at TIMESTAMPTZ,
     updated_at TIMESTAMPTZ
 ) AS $$
+DECLARE
+    v_limit INT := LEAST(GREATEST(COALESCE(p_limit, 100), 1), 1000);
 BEGIN
-    RETURN QUERY
-    SELECT c.id, c.dictation_id, c.hospital_id, c.department_id,
-           c.doctor_id, c.patient_id, c.encounter_id,
-           c.document_type, c.version, c.status, c.final_text,
-           c.fhir_resource_type, c.fhir_json,
-           c.doctor_signature, c.signed_at,
-           c.created_at, c.updated_at
-    FROM clinical_documents c
-    WHERE p_id IS NULL OR c.id = p_id;
+    IF p_id IS NOT NULL AND p_id <> 0 THEN
+        RETURN QUERY
+        SELECT c.id, c.dictation_id, c.hospital_id, c.department_id,
+               c.doctor_id, c.patient_id, c.encounter_id,
+               c.document_type, c.version, c.status, c.final_text,
+               c.fhir_resource_type, c.fhir_json,
+               c.doctor_signature, c.signed_at,
+               c.created_at, c.updated_at
+        FROM clinical_documents c
+        WHERE c.id = p_id;
+        RETURN;
+    END IF;
+
+    IF p_hospital_id IS NULL THEN
+        RETURN QUERY
+        SELECT c.id, c.dictation_id, c.hospital_id, c.department_id,
+               c.doctor_id, c.patient_id, c.encounter_id,
+               c.document_type, c.version, c.status, c.final_text,
+               c.fhir_resource_type, c.fhir_json,
+               c.doctor_signature, c.signed_at,
+               c.created_at, c.updated_at
+        FROM clinical_documents c
+        WHERE c.id > COALESCE(p_after_id, 0)
+        ORDER BY c.id
+        LIMIT v_limit;
+    ELSE
+        -- Tenant-scoped range
+        RETURN QUERY
+        SELECT c.id, c.dictation_id, c.hospital_id, c.department_id,
+               c.doctor_id, c.patient_id, c.encounter_id,
+               c.document_type, c.version, c.status, c.final_text,
+               c.fhir_resource_type, c.fhir_json,
+               c.doctor_signature, c.signed_at,
+               c.created_at, c.updated_at
+        FROM clinical_documents c
+        WHERE c.hospital_id = p_hospital_id AND c.id > COALESCE(p_after_id, 0)
+        ORDER BY c.id
+        LIMIT v_limit;
+    END IF;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
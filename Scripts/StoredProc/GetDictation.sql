@@ -1,4 +1,17 @@
-CREATE OR REPLACE FUNCTION GetDictation(p_id BIGINT DEFAULT NULL)
+-- GetDictation.sql
+-- Single-row lookup by id, or a keyset page (id > p_after_id ORDER BY id LIMIT p_limit) optionally
+-- restricted to one hospital.
+-- Each shape has its own RETURN QUERY, so each gets its own plan: the id lookup is a
+-- primary-key index probe and a call without p_id never materialises the whole table.
+
+DROP FUNCTION IF EXISTS GetDictation;
+
+CREATE OR REPLACE FUNCTION GetDictation(
+    p_id BIGINT DEFAULT NULL,
+    p_after_id BIGINT DEFAULT NULL,
+    p_limit INT DEFAULT 100,
+    p_hospital_id BIGINT DEFAULT NULL
+)
 RETURNS TABLE (
     id BIGINT,
     hospital_id BIGINT,
@@ -6,21 +19,49 @@ RETURNS TABLE (
     doctor_id BIGINT,
     patient_id BIGINT,
     encounter_id BIGINT,
-    dictation_number TEXT,
-    language TEXT,
-    status TEXT,
+    dictation_number VARCHAR,
+    language VARCHAR,
+    status VARCHAR,
     audio_path TEXT,
     duration_sec INT,
     created_at TIMESTAMPTZ,
     updated_at TIMESTAMPTZ
 ) AS $$
+DECLARE
+    v_limit INT := LEAST(GREATEST(COALESCE(p_limit, 100), 1), 1000);
 BEGIN
-    RETURN QUERY
-    SELECT d.id, d.hospital_id, d.department_id, d.doctor_id,
-           d.patient_id, d.encounter_id, d.dictation_number,
-           d.language, d.status, d.audio_path, d.duration_sec,
-           d.created_at, d.updated_at
-    FROM dictations d
-    WHERE p_id IS NULL OR d.id = p_id;
+    IF p_id IS NOT NULL AND p_id <> 0 THEN
+        RETURN QUERY
+        SELECT d.id, d.hospital_id, d.department_id, d.doctor_id,
+               d.patient_id, d.encounter_id, d.dictation_number,
+               d.language, d.status, d.audio_path, d.duration_sec,
+               d.created_at, d.updated_at
+        FROM dictations d
+        WHERE d.id = p_id;
+        RETURN;
+    END IF;
+
+    IF p_hospital_id IS NULL THEN
+        RETURN QUERY
+        SELECT d.id, d.hospital_id, d.department_id, d.doctor_id,
+               d.patient_id, d.encounter_id, d.dictation_number,
+               d.language, d.status, d.audio_path, d.duration_sec,
+               d.created_at, d.updated_at
+        FROM dictations d
+        WHERE d.id > COALESCE(p_after_id, 0)
+        ORDER BY d.id
+        LIMIT v_limit;
+    ELSE
+        -- Tenant-scoped range
+        RETURN QUERY
+        SELECT d.id, d.hospital_id, d.department_id, d.doctor_id,
+               d.patient_id, d.encounter_id, d.dictation_number,
+               d.language, d.status, d.audio_path, d.duration_sec,
+               d.created_at, d.updated_at
+        FROM dictations d
+        WHERE d.hospital_id = p_hospital_id AND d.id > COALESCE(p_after_id, 0)
+        ORDER BY d.id
+        LIMIT v_limit;
+    END IF;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
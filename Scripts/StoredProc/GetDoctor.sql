@@ -1,28 +1,68 @@
-CREATE OR REPLACE FUNCTION GetDoctor(p_id BIGINT DEFAULT NULL)
+-- GetDoctor.sql
+-- Single-row lookup by id, or a keyset page (id > p_after_id ORDER BY id LIMIT p_limit) optionally
+-- restricted to one hospital.
+-- Each shape has its own RETURN QUERY, so each gets its own plan: the id lookup is a
+-- primary-key index probe and a call without p_id never materialises the whole table.
+
+DROP FUNCTION IF EXISTS GetDoctor;
+
+CREATE OR REPLACE FUNCTION GetDoctor(
+    p_id BIGINT DEFAULT NULL,
+    p_after_id BIGINT DEFAULT NULL,
+    p_limit INT DEFAULT 100,
+    p_hospital_id BIGINT DEFAULT NULL
+)
 RETURNS TABLE (
     id BIGINT,
     hospital_id BIGINT,
     department_id BIGINT,
-    abha_professional_id TEXT,
-    first_name TEXT,
-    last_name TEXT,
-    email TEXT,
-    phone TEXT,
-    license_number TEXT,
-    specialty TEXT,
+    abha_professional_id VARCHAR,
+    first_name VARCHAR,
+    last_name VARCHAR,
+    email VARCHAR,
+    phone VARCHAR,
+    license_number VARCHAR,
+    specialty VARCHAR,
     custom_vocab JSONB,
     is_active BOOLEAN,
     created_at TIMESTAMPTZ,
-    userid BIGINT,
-    photo BYTEA
+    userid BIGINT
 ) AS $$
+DECLARE
+    v_limit INT := LEAST(GREATEST(COALESCE(p_limit, 100), 1), 1000);
 BEGIN
-    RETURN QUERY
-    SELECT d.id, d.hospital_id, d.department_id, d.abha_professional_id,
-           d.first_name, d.last_name, d.email, d.phone,
-           d.license_number, d.specialty, d.custom_vocab,
-           d.is_active, d.created_at, d.userid, d.photo
-    FROM doctors d
-    WHERE p_id IS NULL OR d.id = p_id;
+    IF p_id IS NOT NULL AND p_id <> 0 THEN
+        RETURN QUERY
+        SELECT d.id, d.hospital_id, d.department_id, d.abha_professional_id,
+               d.first_name, d.last_name, d.email, d.phone,
+               d.license_number, d.specialty, d.custom_vocab,
+               d.is_active, d.created_at, d.userid
+        FROM doctors d
+        WHERE d.id = p_id;
+        RETURN;
+    END IF;
+
+    IF p_hospital_id IS NULL THEN
+        RETURN QUERY
+        SELECT d.id, d.hospital_id, d.department_id, d.abha_professional_id,
+               d.first_name, d.last_name, d.email, d.phone,
+               d.license_number, d.specialty, d.custom_vocab,
+               d.is_active, d.created_at, d.userid
+        FROM doctors d
+        WHERE d.id > COALESCE(p_after_id, 0)
+        ORDER BY d.id
+        LIMIT v_limit;
+    ELSE
+        -- Tenant-scoped range
+        RETURN QUERY
+        SELECT d.id, d.hospital_id, d.department_id, d.abha_professional_id,
+               d.first_name, d.last_name, d.email, d.phone,
+               d.license_number, d.specialty, d.custom_vocab,
+               d.is_active, d.created_at, d.userid
+        FROM doctors d
+        WHERE d.hospital_id = p_hospital_id AND d.id > COALESCE(p_after_id, 0)
+        ORDER BY d.id
+        LIMIT v_limit;
+    END IF;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
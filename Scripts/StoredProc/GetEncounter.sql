@@ -1,22 +1,61 @@
-CREATE OR REPLACE FUNCTION GetEncounter(p_id BIGINT DEFAULT NULL)
+-- GetEncounter.sql
+-- Single-row lookup by id, or a keyset page (id > p_after_id ORDER BY id LIMIT p_limit) optionally
+-- restricted to one hospital.
+-- Each shape has its own RETURN QUERY, so each gets its own plan: the id lookup is a
+-- primary-key index probe and a call without p_id never materialises the whole table.
+
+DROP FUNCTION IF EXISTS GetEncounter;
+
+CREATE OR REPLACE FUNCTION GetEncounter(
+    p_id BIGINT DEFAULT NULL,
+    p_after_id BIGINT DEFAULT NULL,
+    p_limit INT DEFAULT 100,
+    p_hospital_id BIGINT DEFAULT NULL
+)
 RETURNS TABLE (
     id BIGINT,
     hospital_id BIGINT,
     patient_id BIGINT,
     doctor_id BIGINT,
-    external_id TEXT,
-    encounter_type TEXT,
+    external_id VARCHAR,
+    encounter_type VARCHAR,
     department_id BIGINT,
     started_at TIMESTAMPTZ,
     ended_at TIMESTAMPTZ,
     created_at TIMESTAMPTZ
 ) AS $$
+DECLARE
+    v_limit INT := LEAST(GREATEST(COALESCE(p_limit, 100), 1), 1000);
 BEGIN
-    RETURN QUERY
-    SELECT e.id, e.hospital_id, e.patient_id, e.doctor_id,
-           e.external_id, e.encounter_type, e.department_id,
-           e.started_at, e.ended_at, e.created_at
-    FROM encounters e
-    WHERE p_id IS NULL OR e.id = p_id;
+    IF p_id IS NOT NULL AND p_id <> 0 THEN
+        RETURN QUERY
+        SELECT e.id, e.hospital_id, e.patient_id, e.doctor_id,
+               e.external_id, e.encounter_type, e.department_id,
+               e.started_at, e.ended_at, e.created_at
+        FROM encounters e
+        WHERE e.id = p_id;
+        RETURN;
+    END IF;
+
+    IF p_hospital_id IS NULL THEN
+        RETURN QUERY
+        SELECT e.id, e.hospital_id, e.patient_id, e.doctor_id,
+               e.external_id, e.encounter_type, e.department_id,
+               e.started_at, e.ended_at, e.created_at
+        FROM encounters e
+        WHERE e.id > COALESCE(p_after_id, 0)
+        ORDER BY e.id
+        LIMIT v_limit;
+    ELSE
+        -- Tenant-scoped range
+        RETURN QUERY
+        SELECT e.id, e.hospital_id, e.patient_id, e.doctor_id,
+               e.external_id, e.encounter_type, e.department_id,
+               e.started_at, e.ended_at, e.created_at
+        FROM encounters e
+        WHERE e.hospital_id = p_hospital_id AND e.id > COALESCE(p_after_id, 0)
+        ORDER BY e.id
+        LIMIT v_limit;
+    END IF;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
@@ -1,12 +1,26 @@
 -- GetHospital.sql
--- Returns hospital row for given id. If p_id is NULL or 0, returns all hospitals.
+-- Returns the hospital row for a given id. If p_id is NULL or 0, returns a keyset page of
+-- hospitals (id > p_after_id ORDER BY id LIMIT p_limit) instead of the whole table.
+-- Each shape has its own RETURN QUERY, so each gets its own plan: the id lookup is a
+-- primary-key index probe.
 
-CREATE OR REPLACE FUNCTION GetHospital(p_id bigint) RETURNS SETOF hospitals AS $$
+DROP FUNCTION IF EXISTS GetHospital;
+
+CREATE OR REPLACE FUNCTION GetHospital(
+    p_id bigint DEFAULT NULL,
+    p_after_id bigint DEFAULT NULL,
+    p_limit int DEFAULT 100
+) RETURNS SETOF hospitals AS $$
+DECLARE
+    v_limit int := LEAST(GREATEST(COALESCE(p_limit, 100), 1), 1000);
 BEGIN
     IF p_id IS NULL OR p_id = 0 THEN
-        RETURN QUERY SELECT * FROM hospitals;
+        RETURN QUERY SELECT * FROM hospitals h
+            WHERE h.id > COALESCE(p_after_id, 0)
+            ORDER BY h.id
+            LIMIT v_limit;
     ELSE
         RETURN QUERY SELECT * FROM hospitals WHERE id = p_id;
     END IF;
 END;
-$$ LANGUAGE plpgsql;    
\ No newline at end of file
+$$ LANGUAGE plpgsql;
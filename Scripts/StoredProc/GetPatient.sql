@@ -1,19 +1,56 @@
-CREATE OR REPLACE FUNCTION GetPatient(p_id BIGINT DEFAULT NULL)
+-- GetPatient.sql
+-- Single-row lookup by id, or a keyset page (id > p_after_id ORDER BY id LIMIT p_limit) optionally
+-- restricted to one hospital.
+-- Each shape has its own RETURN QUERY, so each gets its own plan: the id lookup is a
+-- primary-key index probe and a call without p_id never materialises the whole table.
+
+DROP FUNCTION IF EXISTS GetPatient;
+
+CREATE OR REPLACE FUNCTION GetPatient(
+    p_id BIGINT DEFAULT NULL,
+    p_after_id BIGINT DEFAULT NULL,
+    p_limit INT DEFAULT 100,
+    p_hospital_id BIGINT DEFAULT NULL
+)
 RETURNS TABLE (
     id BIGINT,
     hospital_id BIGINT,
-    external_id TEXT,
-    first_name TEXT,
-    last_name TEXT,
+    external_id VARCHAR,
+    first_name VARCHAR,
+    last_name VARCHAR,
     date_of_birth DATE,
-    sex TEXT,
+    sex VARCHAR,
     created_at TIMESTAMPTZ
 ) AS $$
+DECLARE
+    v_limit INT := LEAST(GREATEST(COALESCE(p_limit, 100), 1), 1000);
 BEGIN
-    RETURN QUERY
-    SELECT p.id, p.hospital_id, p.external_id, p.first_name,
-           p.last_name, p.date_of_birth, p.sex, p.created_at
-    FROM patients p
-    WHERE p_id IS NULL OR p.id = p_id;
+    IF p_id IS NOT NULL AND p_id <> 0 THEN
+        RETURN QUERY
+        SELECT p.id, p.hospital_id, p.external_id, p.first_name,
+               p.last_name, p.date_of_birth, p.sex, p.created_at
+        FROM patients p
+        WHERE p.id = p_id;
+        RETURN;
+    END IF;
+
+    IF p_hospital_id IS NULL THEN
+        RETURN QUERY
+        SELECT p.id, p.hospital_id, p.external_id, p.first_name,
+               p.last_name, p.date_of_birth, p.sex, p.created_at
+        FROM patients p
+        WHERE p.id > COALESCE(p_after_id, 0)
+        ORDER BY p.id
+        LIMIT v_limit;
+    ELSE
+        -- Tenant-scoped range
+        RETURN QUERY
+        SELECT p.id, p.hospital_id, p.external_id, p.first_name,
+               p.last_name, p.date_of_birth, p.sex, p.created_at
+        FROM patients p
+        WHERE p.hospital_id = p_hospital_id AND p.id > COALESCE(p_after_id, 0)
+        ORDER BY p.id
+        LIMIT v_limit;
+    END IF;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
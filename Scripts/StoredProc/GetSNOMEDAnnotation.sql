@@ -1,4 +1,17 @@
-CREATE OR REPLACE FUNCTION GetSNOMEDAnnotation(p_id BIGINT DEFAULT NULL)
+-- GetSNOMEDAnnotation.sql
+-- Single-row lookup by id, or a keyset page (id > p_after_id ORDER BY id LIMIT p_limit) optionally
+-- restricted to one hospital (through the owning dictation).
+-- Each shape has its own RETURN QUERY, so each gets its own plan: the id lookup is a
+-- primary-key index probe and a call without p_id never materialises the whole table.
+
+DROP FUNCTION IF EXISTS GetSNOMEDAnnotation;
+
+CREATE OR REPLACE FUNCTION GetSNOMEDAnnotation(
+    p_id BIGINT DEFAULT NULL,
+    p_after_id BIGINT DEFAULT NULL,
+    p_limit INT DEFAULT 100,
+    p_hospital_id BIGINT DEFAULT NULL
+)
 RETURNS TABLE (
     id BIGINT,
     dictation_id BIGINT,
@@ -6,21 +19,50 @@ RETURNS TABLE (
     transcription_id BIGINT,
     snomed_concept_id BIGINT,
     term TEXT,
-    category TEXT,
+    category VARCHAR,
     start_char INT,
     end_char INT,
     confidence NUMERIC,
-    model_used TEXT,
+    model_used VARCHAR,
     extra JSONB,
     created_at TIMESTAMPTZ
 ) AS $$
+DECLARE
+    v_limit INT := LEAST(GREATEST(COALESCE(p_limit, 100), 1), 1000);
 BEGIN
-    RETURN QUERY
-    SELECT s.id, s.dictation_id, s.doctor_id, s.transcription_id,
-           s.snomed_concept_id, s.term, s.category,
-           s.start_char, s.end_char, s.confidence, s.model_used,
-           s.extra, s.created_at
-    FROM snomed_annotations s
-    WHERE p_id IS NULL OR s.id = p_id;
+    IF p_id IS NOT NULL AND p_id <> 0 THEN
+        RETURN QUERY
+        SELECT s.id, s.dictation_id, s.doctor_id, s.transcription_id,
+               s.snomed_concept_id, s.term, s.category,
+               s.start_char, s.end_char, s.confidence, s.model_used,
+               s.extra, s.created_at
+        FROM snomed_annotations s
+        WHERE s.id = p_id;
+        RETURN;
+    END IF;
+
+    IF p_hospital_id IS NULL THEN
+        RETURN QUERY
+        SELECT s.id, s.dictation_id, s.doctor_id, s.transcription_id,
+               s.snomed_concept_id, s.term, s.category,
+               s.start_char, s.end_char, s.confidence, s.model_used,
+               s.extra, s.created_at
+        FROM snomed_annotations s
+        WHERE s.id > COALESCE(p_after_id, 0)
+        ORDER BY s.id
+        LIMIT v_limit;
+    ELSE
+        -- Tenant-scoped range
+        RETURN QUERY
+        SELECT s.id, s.dictation_id, s.doctor_id, s.transcription_id,
+               s.snomed_concept_id, s.term, s.category,
+               s.start_char, s.end_char, s.confidence, s.model_used,
+               s.extra, s.created_at
+        FROM snomed_annotations s
+        WHERE s.dictation_id IN (SELECT d.id FROM dictations d WHERE d.hospital_id = p_hospital_id)
+          AND s.id > COALESCE(p_after_id, 0)
+        ORDER BY s.id
+        LIMIT v_limit;
+    END IF;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
@@ -1,19 +1,58 @@
-CREATE OR REPLACE FUNCTION GetTranscription(p_id BIGINT DEFAULT NULL)
+-- GetTranscription.sql
+-- Single-row lookup by id, or a keyset page (id > p_after_id ORDER BY id LIMIT p_limit) optionally
+-- restricted to one hospital (through the owning dictation).
+-- Each shape has its own RETURN QUERY, so each gets its own plan: the id lookup is a
+-- primary-key index probe and a call without p_id never materialises the whole table.
+
+DROP FUNCTION IF EXISTS GetTranscription;
+
+CREATE OR REPLACE FUNCTION GetTranscription(
+    p_id BIGINT DEFAULT NULL,
+    p_after_id BIGINT DEFAULT NULL,
+    p_limit INT DEFAULT 100,
+    p_hospital_id BIGINT DEFAULT NULL
+)
 RETURNS TABLE (
     id BIGINT,
     dictation_id BIGINT,
     doctor_id BIGINT,
     raw_text TEXT,
-    model_name TEXT,
+    model_name VARCHAR,
     confidence NUMERIC,
     word_count INT,
+    char_count INT,
     created_at TIMESTAMPTZ
 ) AS $$
+DECLARE
+    v_limit INT := LEAST(GREATEST(COALESCE(p_limit, 100), 1), 1000);
 BEGIN
-    RETURN QUERY
-    SELECT t.id, t.dictation_id, t.doctor_id, t.raw_text,
-           t.model_name, t.confidence, t.word_count, t.created_at
-    FROM transcriptions t
-    WHERE p_id IS NULL OR t.id = p_id;
+    IF p_id IS NOT NULL AND p_id <> 0 THEN
+        RETURN QUERY
+        SELECT t.id, t.dictation_id, t.doctor_id, t.raw_text,
+               t.model_name, t.confidence, t.word_count, t.char_count, t.created_at
+        FROM transcriptions t
+        WHERE t.id = p_id;
+        RETURN;
+    END IF;
+
+    IF p_hospital_id IS NULL THEN
+        RETURN QUERY
+        SELECT t.id, t.dictation_id, t.doctor_id, t.raw_text,
+               t.model_name, t.confidence, t.word_count, t.char_count, t.created_at
+        FROM transcriptions t
+        WHERE t.id > COALESCE(p_after_id, 0)
+        ORDER BY t.id
+        LIMIT v_limit;
+    ELSE
+        -- Tenant-scoped range
+        RETURN QUERY
+        SELECT t.id, t.dictation_id, t.doctor_id, t.raw_text,
+               t.model_name, t.confidence, t.word_count, t.char_count, t.created_at
+        FROM transcriptions t
+        WHERE t.dictation_id IN (SELECT d.id FROM dictations d WHERE d.hospital_id = p_hospital_id)
+          AND t.id > COALESCE(p_after_id, 0)
+        ORDER BY t.id
+        LIMIT v_limit;
+    END IF;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
@@ -1,16 +1,40 @@
-CREATE OR REPLACE FUNCTION GetUser(p_id BIGINT DEFAULT NULL)
+-- GetUser.sql
+-- Single-row lookup by id, or a keyset page (id > p_after_id ORDER BY id LIMIT p_limit).
+-- Each shape has its own RETURN QUERY, so each gets its own plan: the id lookup is a
+-- primary-key index probe and a call without p_id never materialises the whole table.
+
+DROP FUNCTION IF EXISTS GetUser;
+
+CREATE OR REPLACE FUNCTION GetUser(
+    p_id BIGINT DEFAULT NULL,
+    p_after_id BIGINT DEFAULT NULL,
+    p_limit INT DEFAULT 100
+)
 RETURNS TABLE (
     id BIGINT,
-    name TEXT,
-    email TEXT,
-    password TEXT,
-    created_at TIMESTAMPTZ,
-    updated_at TIMESTAMPTZ
+    name VARCHAR,
+    email VARCHAR,
+    phone VARCHAR,
+    gender VARCHAR,
+    is_active BOOLEAN,
+    created_at TIMESTAMPTZ
 ) AS $$
+DECLARE
+    v_limit INT := LEAST(GREATEST(COALESCE(p_limit, 100), 1), 1000);
 BEGIN
+    IF p_id IS NOT NULL AND p_id <> 0 THEN
+        RETURN QUERY
+        SELECT u.id, u.name, u.email, u.phone, u.gender, u.is_active, u.created_at
+        FROM users u
+        WHERE u.id = p_id;
+        RETURN;
+    END IF;
+
     RETURN QUERY
-    SELECT u.id, u.name, u.email, u.password, u.created_at, u.updated_at
+    SELECT u.id, u.name, u.email, u.phone, u.gender, u.is_active, u.created_at
     FROM users u
-    WHERE (p_id IS NULL OR p_id = 0 OR u.id = p_id);
+    WHERE u.id > COALESCE(p_after_id, 0)
+    ORDER BY u.id
+    LIMIT v_limit;
 END;
 $$ LANGUAGE plpgsql;
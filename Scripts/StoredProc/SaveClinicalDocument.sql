@@ -1,3 +1,9 @@
+-- SaveClinicalDocument.sql
+-- Performs a merge (insert or update) for clinical_documents and returns the affected row,
+-- so callers get the saved clinical document back without a second query.
+
+DROP FUNCTION IF EXISTS SaveClinicalDocument;
+
 CREATE OR REPLACE FUNCTION SaveClinicalDocument(
     p_id BIGINT,
     p_dictation_id BIGINT,
@@ -14,32 +20,64 @@ CREATE OR REPLACE FUNCTION SaveClinicalDocument(
     p_fhir_json JSONB,
     p_doctor_signature TEXT,
     p_signed_at TIMESTAMPTZ
-)
-RETURNS BIGINT AS $$
-DECLARE v_id BIGINT;
+) RETURNS clinical_documents AS $$
+DECLARE
+    v_row clinical_documents;
 BEGIN
-    INSERT INTO clinical_documents (
-        dictation_id, hospital_id, department_id, doctor_id,
-        patient_id, encounter_id, document_type, version,
-        status, final_text, fhir_resource_type, fhir_json,
-        doctor_signature, signed_at
-    )
-    VALUES (
-        p_dictation_id, p_hospital_id, p_department_id, p_doctor_id,
-        p_patient_id, p_encounter_id, p_document_type, p_version,
-        p_status, p_final_text, p_fhir_resource_type, p_fhir_json,
-        p_doctor_signature, p_signed_at
-    )
-    ON CONFLICT (id) DO UPDATE SET
-        version = EXCLUDED.version,
-        status = EXCLUDED.status,
-        final_text = EXCLUDED.final_text,
-        fhir_json = EXCLUDED.fhir_json,
-        doctor_signature = EXCLUDED.doctor_signature,
-        signed_at = EXCLUDED.signed_at,
-        updated_at = now()
-    RETURNING id INTO v_id;
+    IF p_id IS NULL THEN
+        INSERT INTO clinical_documents (
+            dictation_id, hospital_id, department_id, doctor_id,
+            patient_id, encounter_id, document_type, version, status,
+            final_text, fhir_resource_type, fhir_json, doctor_signature,
+            signed_at
+        )
+        VALUES (
+            p_dictation_id, p_hospital_id, p_department_id, p_doctor_id,
+            p_patient_id, p_encounter_id, p_document_type, p_version,
+            p_status, p_final_text, p_fhir_resource_type, p_fhir_json,
+            p_doctor_signature, p_signed_at
+        )
+        RETURNING * INTO v_row;
+    ELSE
+        -- Try to update; unspecified (NULL) parameters keep existing values
+        UPDATE clinical_documents
+        SET
+            dictation_id = COALESCE(p_dictation_id, dictation_id),
+            hospital_id = COALESCE(p_hospital_id, hospital_id),
+            department_id = COALESCE(p_department_id, department_id),
+            doctor_id = COALESCE(p_doctor_id, doctor_id),
+            patient_id = COALESCE(p_patient_id, patient_id),
+            encounter_id = COALESCE(p_encounter_id, encounter_id),
+            document_type = COALESCE(p_document_type, document_type),
+            version = COALESCE(p_version, version),
+            status = COALESCE(p_status, status),
+            final_text = COALESCE(p_final_text, final_text),
+            fhir_resource_type = COALESCE(p_fhir_resource_type, fhir_resource_type),
+            fhir_json = COALESCE(p_fhir_json, fhir_json),
+            doctor_signature = COALESCE(p_doctor_signature, doctor_signature),
+            signed_at = COALESCE(p_signed_at, signed_at),
+            updated_at = now()
+        WHERE id = p_id
+        RETURNING * INTO v_row;
+
+        IF NOT FOUND THEN
+            INSERT INTO clinical_documents (
+                id, dictation_id, hospital_id, department_id, doctor_id,
+                patient_id, encounter_id, document_type, version,
+                status, final_text, fhir_resource_type, fhir_json,
+                doctor_signature, signed_at
+            )
+            VALUES (
+                p_id, p_dictation_id, p_hospital_id, p_department_id,
+                p_doctor_id, p_patient_id, p_encounter_id,
+                p_document_type, p_version, p_status, p_final_text,
+                p_fhir_resource_type, p_fhir_json, p_doctor_signature,
+                p_signed_at
+            )
+            RETURNING * INTO v_row;
+        END IF;
+    END IF;
 
-    RETURN v_id;
+    RETURN v_row;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
@@ -1,3 +1,9 @@
+-- SaveDictation.sql
+-- Performs a merge (insert or update) for dictations and returns the affected row,
+-- so callers get the saved dictation back without a second query.
+
+DROP FUNCTION IF EXISTS SaveDictation;
+
 CREATE OR REPLACE FUNCTION SaveDictation(
     p_id BIGINT,
     p_hospital_id BIGINT,
@@ -10,25 +16,60 @@ CREATE OR REPLACE FUNCTION SaveDictation(
     p_status TEXT,
     p_audio_path TEXT,
     p_duration_sec INT
-)
-RETURNS BIGINT AS $$
-DECLARE v_id BIGINT;
+) RETURNS dictations AS $$
+DECLARE
+    v_row dictations;
 BEGIN
-    INSERT INTO dictations (
-        hospital_id, department_id, doctor_id, patient_id, encounter_id,
-        dictation_number, language, status, audio_path, duration_sec
-    )
-    VALUES (
-        p_hospital_id, p_department_id, p_doctor_id, p_patient_id, p_encounter_id,
-        p_dictation_number, p_language, p_status, p_audio_path, p_duration_sec
-    )
-    ON CONFLICT (dictation_number) DO UPDATE SET
-        status = EXCLUDED.status,
-        audio_path = EXCLUDED.audio_path,
-        duration_sec = EXCLUDED.duration_sec,
-        updated_at = now()
-    RETURNING id INTO v_id;
+    IF p_id IS NULL THEN
+        INSERT INTO dictations (
+            hospital_id, department_id, doctor_id, patient_id,
+            encounter_id, dictation_number, language, status,
+            audio_path, duration_sec
+        )
+        VALUES (
+            p_hospital_id, p_department_id, p_doctor_id, p_patient_id,
+            p_encounter_id, p_dictation_number, p_language, p_status,
+            p_audio_path, p_duration_sec
+        )
+        ON CONFLICT (dictation_number) DO UPDATE SET
+            status = EXCLUDED.status,
+            audio_path = EXCLUDED.audio_path,
+            duration_sec = EXCLUDED.duration_sec,
+            updated_at = now()
+        RETURNING * INTO v_row;
+    ELSE
+        -- Try to update; unspecified (NULL) parameters keep existing values
+        UPDATE dictations
+        SET
+            hospital_id = COALESCE(p_hospital_id, hospital_id),
+            department_id = COALESCE(p_department_id, department_id),
+            doctor_id = COALESCE(p_doctor_id, doctor_id),
+            patient_id = COALESCE(p_patient_id, patient_id),
+            encounter_id = COALESCE(p_encounter_id, encounter_id),
+            dictation_number = COALESCE(p_dictation_number, dictation_number),
+            language = COALESCE(p_language, language),
+            status = COALESCE(p_status, status),
+            audio_path = COALESCE(p_audio_path, audio_path),
+            duration_sec = COALESCE(p_duration_sec, duration_sec),
+            updated_at = now()
+        WHERE id = p_id
+        RETURNING * INTO v_row;
+
+        IF NOT FOUND THEN
+            INSERT INTO dictations (
+                id, hospital_id, department_id, doctor_id, patient_id,
+                encounter_id, dictation_number, language, status,
+                audio_path, duration_sec
+            )
+            VALUES (
+                p_id, p_hospital_id, p_department_id, p_doctor_id,
+                p_patient_id, p_encounter_id, p_dictation_number,
+                p_language, p_status, p_audio_path, p_duration_sec
+            )
+            RETURNING * INTO v_row;
+        END IF;
+    END IF;
 
-    RETURN v_id;
+    RETURN v_row;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
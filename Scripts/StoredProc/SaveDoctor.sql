@@ -1,3 +1,10 @@
+-- SaveDoctor.sql
+-- Performs a merge (insert or update) for doctors and returns the affected row,
+-- so callers get the saved doctor back without a second query.
+-- Photos are stored in doctor_photos (PUT /doctors/{id}/photo), not here.
+
+DROP FUNCTION IF EXISTS SaveDoctor;
+
 CREATE OR REPLACE FUNCTION SaveDoctor(
     p_id BIGINT,
     p_hospital_id BIGINT,
@@ -11,38 +18,59 @@ CREATE OR REPLACE FUNCTION SaveDoctor(
     p_specialty TEXT,
     p_custom_vocab JSONB,
     p_is_active BOOLEAN,
-    p_userid BIGINT,
-    p_photo BYTEA
-)
-RETURNS BIGINT AS $$
-DECLARE v_id BIGINT;
+    p_userid BIGINT
+) RETURNS doctors AS $$
+DECLARE
+    v_row doctors;
 BEGIN
-    INSERT INTO doctors (
-        id, hospital_id, department_id, abha_professional_id,
-        first_name, last_name, email, phone,
-        license_number, specialty, custom_vocab, is_active, userid, photo
-    )
-    VALUES (
-        p_id, p_hospital_id, p_department_id, p_abha_professional_id,
-        p_first_name, p_last_name, p_email, p_phone,
-        p_license_number, p_specialty, p_custom_vocab, p_is_active, p_userid, p_photo
-    )
-    ON CONFLICT (id) DO UPDATE SET
-        hospital_id = EXCLUDED.hospital_id,
-        department_id = EXCLUDED.department_id,
-        abha_professional_id = EXCLUDED.abha_professional_id,
-        first_name = EXCLUDED.first_name,
-        last_name = EXCLUDED.last_name,
-        email = EXCLUDED.email,
-        phone = EXCLUDED.phone,
-        license_number = EXCLUDED.license_number,
-        specialty = EXCLUDED.specialty,
-        custom_vocab = EXCLUDED.custom_vocab,
-        is_active = EXCLUDED.is_active,
-        userid = EXCLUDED.userid,
-        photo = EXCLUDED.photo
-    RETURNING id INTO v_id;
+    IF p_id IS NULL THEN
+        INSERT INTO doctors (
+            hospital_id, department_id, abha_professional_id,
+            first_name, last_name, email, phone, license_number,
+            specialty, custom_vocab, is_active, userid
+        )
+        VALUES (
+            p_hospital_id, p_department_id, p_abha_professional_id,
+            p_first_name, p_last_name, p_email, p_phone,
+            p_license_number, p_specialty, p_custom_vocab, p_is_active,
+            p_userid
+        )
+        RETURNING * INTO v_row;
+    ELSE
+        -- Try to update; unspecified (NULL) parameters keep existing values
+        UPDATE doctors
+        SET
+            hospital_id = COALESCE(p_hospital_id, hospital_id),
+            department_id = COALESCE(p_department_id, department_id),
+            abha_professional_id = COALESCE(p_abha_professional_id, abha_professional_id),
+            first_name = COALESCE(p_first_name, first_name),
+            last_name = COALESCE(p_last_name, last_name),
+            email = COALESCE(p_email, email),
+            phone = COALESCE(p_phone, phone),
+            license_number = COALESCE(p_license_number, license_number),
+            specialty = COALESCE(p_specialty, specialty),
+            custom_vocab = COALESCE(p_custom_vocab, custom_vocab),
+            is_active = COALESCE(p_is_active, is_active),
+            userid = COALESCE(p_userid, userid)
+        WHERE id = p_id
+        RETURNING * INTO v_row;
+
+        IF NOT FOUND THEN
+            INSERT INTO doctors (
+                id, hospital_id, department_id, abha_professional_id,
+                first_name, last_name, email, phone, license_number,
+                specialty, custom_vocab, is_active, userid
+            )
+            VALUES (
+                p_id, p_hospital_id, p_department_id,
+                p_abha_professional_id, p_first_name, p_last_name,
+                p_email, p_phone, p_license_number, p_specialty,
+                p_custom_vocab, p_is_active, p_userid
+            )
+            RETURNING * INTO v_row;
+        END IF;
+    END IF;
 
-    RETURN v_id;
+    RETURN v_row;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
@@ -1,3 +1,9 @@
+-- SaveEncounter.sql
+-- Performs a merge (insert or update) for encounters and returns the affected row,
+-- so callers get the saved encounter back without a second query.
+
+DROP FUNCTION IF EXISTS SaveEncounter;
+
 CREATE OR REPLACE FUNCTION SaveEncounter(
     p_id BIGINT,
     p_hospital_id BIGINT,
@@ -8,26 +14,49 @@ CREATE OR REPLACE FUNCTION SaveEncounter(
     p_department_id BIGINT,
     p_started_at TIMESTAMPTZ,
     p_ended_at TIMESTAMPTZ
-)
-RETURNS BIGINT AS $$
-DECLARE v_id BIGINT;
+) RETURNS encounters AS $$
+DECLARE
+    v_row encounters;
 BEGIN
-    INSERT INTO encounters (
-        hospital_id, patient_id, doctor_id, external_id,
-        encounter_type, department_id, started_at, ended_at
-    )
-    VALUES (
-        p_hospital_id, p_patient_id, p_doctor_id, p_external_id,
-        p_encounter_type, p_department_id, p_started_at, p_ended_at
-    )
-    ON CONFLICT (id) DO UPDATE SET
-        doctor_id = EXCLUDED.doctor_id,
-        encounter_type = EXCLUDED.encounter_type,
-        department_id = EXCLUDED.department_id,
-        started_at = EXCLUDED.started_at,
-        ended_at = EXCLUDED.ended_at
-    RETURNING id INTO v_id;
+    IF p_id IS NULL THEN
+        INSERT INTO encounters (
+            hospital_id, patient_id, doctor_id, external_id,
+            encounter_type, department_id, started_at, ended_at
+        )
+        VALUES (
+            p_hospital_id, p_patient_id, p_doctor_id, p_external_id,
+            p_encounter_type, p_department_id, p_started_at, p_ended_at
+        )
+        RETURNING * INTO v_row;
+    ELSE
+        -- Try to update; unspecified (NULL) parameters keep existing values
+        UPDATE encounters
+        SET
+            hospital_id = COALESCE(p_hospital_id, hospital_id),
+            patient_id = COALESCE(p_patient_id, patient_id),
+            doctor_id = COALESCE(p_doctor_id, doctor_id),
+            external_id = COALESCE(p_external_id, external_id),
+            encounter_type = COALESCE(p_encounter_type, encounter_type),
+            department_id = COALESCE(p_department_id, department_id),
+            started_at = COALESCE(p_started_at, started_at),
+            ended_at = COALESCE(p_ended_at, ended_at)
+        WHERE id = p_id
+        RETURNING * INTO v_row;
+
+        IF NOT FOUND THEN
+            INSERT INTO encounters (
+                id, hospital_id, patient_id, doctor_id, external_id,
+                encounter_type, department_id, started_at, ended_at
+            )
+            VALUES (
+                p_id, p_hospital_id, p_patient_id, p_doctor_id,
+                p_external_id, p_encounter_type, p_department_id,
+                p_started_at, p_ended_at
+            )
+            RETURNING * INTO v_row;
+        END IF;
+    END IF;
 
-    RETURN v_id;
+    RETURN v_row;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
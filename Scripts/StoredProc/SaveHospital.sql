@@ -1,29 +1,38 @@
 -- SaveHospital.sql
--- Performs a merge (insert or update) for hospitals and returns the id of the affected row
+-- Performs a merge (insert or update) for hospitals and returns the affected row,
+-- so callers get the saved hospital back without a second query.
+
+DROP FUNCTION IF EXISTS SaveHospital;
 
 CREATE OR REPLACE FUNCTION SaveHospital(
-    p_id bigint,
-    p_name text,
-    p_code text,
-    p_address text,
-    p_city text,
-    p_state text,
-    p_pincode text,
-    p_abha_facility_id text,
-    p_is_active boolean
-) RETURNS bigint AS $$
+    p_id BIGINT,
+    p_name TEXT,
+    p_code TEXT,
+    p_address TEXT,
+    p_city TEXT,
+    p_state TEXT,
+    p_pincode TEXT,
+    p_abha_facility_id TEXT,
+    p_is_active BOOLEAN
+) RETURNS hospitals AS $$
 DECLARE
-    result_id bigint;
+    v_row hospitals;
 BEGIN
     IF p_id IS NULL THEN
-        -- Insert new hospital
-        INSERT INTO hospitals (name, code, address, city, state, pincode, abha_facility_id, is_active)
-        VALUES (p_name, p_code, p_address, p_city, p_state, p_pincode, p_abha_facility_id, p_is_active)
-        RETURNING id INTO result_id;
+        INSERT INTO hospitals (
+            name, code, address, city, state, pincode, abha_facility_id,
+            is_active
+        )
+        VALUES (
+            p_name, p_code, p_address, p_city, p_state, p_pincode,
+            p_abha_facility_id, p_is_active
+        )
+        RETURNING * INTO v_row;
     ELSE
-        -- Try to update; if not found, insert with given id
+        -- Try to update; unspecified (NULL) parameters keep existing values
         UPDATE hospitals
-        SET name = COALESCE(p_name, name),
+        SET
+            name = COALESCE(p_name, name),
             code = COALESCE(p_code, code),
             address = COALESCE(p_address, address),
             city = COALESCE(p_city, city),
@@ -31,17 +40,22 @@ BEGIN
             pincode = COALESCE(p_pincode, pincode),
             abha_facility_id = COALESCE(p_abha_facility_id, abha_facility_id),
             is_active = COALESCE(p_is_active, is_active)
-        WHERE id = p_id;
+        WHERE id = p_id
+        RETURNING * INTO v_row;
 
-        IF FOUND THEN
-            result_id := p_id;
-        ELSE
-            INSERT INTO hospitals (id, name, code, address, city, state, pincode, abha_facility_id, is_active)
-            VALUES (p_id, p_name, p_code, p_address, p_city, p_state, p_pincode, p_abha_facility_id, p_is_active)
-            RETURNING id INTO result_id;
+        IF NOT FOUND THEN
+            INSERT INTO hospitals (
+                id, name, code, address, city, state, pincode,
+                abha_facility_id, is_active
+            )
+            VALUES (
+                p_id, p_name, p_code, p_address, p_city, p_state,
+                p_pincode, p_abha_facility_id, p_is_active
+            )
+            RETURNING * INTO v_row;
         END IF;
     END IF;
 
-    RETURN result_id;
+    RETURN v_row;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
@@ -1,3 +1,9 @@
+-- SavePatient.sql
+-- Performs a merge (insert or update) for patients and returns the affected row,
+-- so callers get the saved patient back without a second query.
+
+DROP FUNCTION IF EXISTS SavePatient;
+
 CREATE OR REPLACE FUNCTION SavePatient(
     p_id BIGINT,
     p_hospital_id BIGINT,
@@ -6,24 +12,46 @@ CREATE OR REPLACE FUNCTION SavePatient(
     p_last_name TEXT,
     p_date_of_birth DATE,
     p_sex TEXT
-)
-RETURNS BIGINT AS $$
-DECLARE v_id BIGINT;
+) RETURNS patients AS $$
+DECLARE
+    v_row patients;
 BEGIN
-    INSERT INTO patients (
-        hospital_id, external_id, first_name, last_name, date_of_birth, sex
-    )
-    VALUES (
-        p_hospital_id, p_external_id, p_first_name, p_last_name, p_date_of_birth, p_sex
-    )
-    ON CONFLICT (id) DO UPDATE SET
-        external_id = EXCLUDED.external_id,
-        first_name = EXCLUDED.first_name,
-        last_name = EXCLUDED.last_name,
-        date_of_birth = EXCLUDED.date_of_birth,
-        sex = EXCLUDED.sex
-    RETURNING id INTO v_id;
+    IF p_id IS NULL THEN
+        INSERT INTO patients (
+            hospital_id, external_id, first_name, last_name,
+            date_of_birth, sex
+        )
+        VALUES (
+            p_hospital_id, p_external_id, p_first_name, p_last_name,
+            p_date_of_birth, p_sex
+        )
+        RETURNING * INTO v_row;
+    ELSE
+        -- Try to update; unspecified (NULL) parameters keep existing values
+        UPDATE patients
+        SET
+            hospital_id = COALESCE(p_hospital_id, hospital_id),
+            external_id = COALESCE(p_external_id, external_id),
+            first_name = COALESCE(p_first_name, first_name),
+            last_name = COALESCE(p_last_name, last_name),
+            date_of_birth = COALESCE(p_date_of_birth, date_of_birth),
+            sex = COALESCE(p_sex, sex)
+        WHERE id = p_id
+        RETURNING * INTO v_row;
+
+        IF NOT FOUND THEN
+            INSERT INTO patients (
+                id, hospital_id, external_id, first_name, last_name,
+                date_of_birth, sex
+            )
+            VALUES (
+                p_id, p_hospital_id, p_external_id, p_first_name,
+                p_last_name, p_date_of_birth, p_sex
+            )
+            RETURNING * INTO v_row;
+        END IF;
+    END IF;
 
-    RETURN v_id;
+    RETURN v_row;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
@@ -1,3 +1,9 @@
+-- SaveSNOMEDAnnotation.sql
+-- Performs a merge (insert or update) for snomed_annotations and returns the affected row,
+-- so callers get the saved SNOMED annotation back without a second query.
+
+DROP FUNCTION IF EXISTS SaveSNOMEDAnnotation;
+
 CREATE OR REPLACE FUNCTION SaveSNOMEDAnnotation(
     p_id BIGINT,
     p_dictation_id BIGINT,
@@ -11,26 +17,55 @@ CREATE OR REPLACE FUNCTION SaveSNOMEDAnnotation(
     p_confidence NUMERIC,
     p_model_used TEXT,
     p_extra JSONB
-)
-RETURNS BIGINT AS $$
-DECLARE v_id BIGINT;
+) RETURNS snomed_annotations AS $$
+DECLARE
+    v_row snomed_annotations;
 BEGIN
-    INSERT INTO snomed_annotations (
-        dictation_id, doctor_id, transcription_id, snomed_concept_id,
-        term, category, start_char, end_char, confidence, model_used, extra
-    )
-    VALUES (
-        p_dictation_id, p_doctor_id, p_transcription_id, p_snomed_concept_id,
-        p_term, p_category, p_start_char, p_end_char, p_confidence, p_model_used, p_extra
-    )
-    ON CONFLICT (id) DO UPDATE SET
-        term = EXCLUDED.term,
-        category = EXCLUDED.category,
-        confidence = EXCLUDED.confidence,
-        model_used = EXCLUDED.model_used,
-        extra = EXCLUDED.extra
-    RETURNING id INTO v_id;
+    IF p_id IS NULL THEN
+        INSERT INTO snomed_annotations (
+            dictation_id, doctor_id, transcription_id,
+            snomed_concept_id, term, category, start_char, end_char,
+            confidence, model_used, extra
+        )
+        VALUES (
+            p_dictation_id, p_doctor_id, p_transcription_id,
+            p_snomed_concept_id, p_term, p_category, p_start_char,
+            p_end_char, p_confidence, p_model_used, p_extra
+        )
+        RETURNING * INTO v_row;
+    ELSE
+        -- Try to update; unspecified (NULL) parameters keep existing values
+        UPDATE snomed_annotations
+        SET
+            dictation_id = COALESCE(p_dictation_id, dictation_id),
+            doctor_id = COALESCE(p_doctor_id, doctor_id),
+            transcription_id = COALESCE(p_transcription_id, transcription_id),
+            snomed_concept_id = COALESCE(p_snomed_concept_id, snomed_concept_id),
+            term = COALESCE(p_term, term),
+            category = COALESCE(p_category, category),
+            start_char = COALESCE(p_start_char, start_char),
+            end_char = COALESCE(p_end_char, end_char),
+            confidence = COALESCE(p_confidence, confidence),
+            model_used = COALESCE(p_model_used, model_used),
+            extra = COALESCE(p_extra, extra)
+        WHERE id = p_id
+        RETURNING * INTO v_row;
+
+        IF NOT FOUND THEN
+            INSERT INTO snomed_annotations (
+                id, dictation_id, doctor_id, transcription_id,
+                snomed_concept_id, term, category, start_char, end_char,
+                confidence, model_used, extra
+            )
+            VALUES (
+                p_id, p_dictation_id, p_doctor_id, p_transcription_id,
+                p_snomed_concept_id, p_term, p_category, p_start_char,
+                p_end_char, p_confidence, p_model_used, p_extra
+            )
+            RETURNING * INTO v_row;
+        END IF;
+    END IF;
 
-    RETURN v_id;
+    RETURN v_row;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
@@ -1,3 +1,11 @@
+-- SaveTranscription.sql
+-- Performs a merge (insert or update) for transcriptions and returns the affected row,
+-- so callers get the saved transcription back without a second query.
+-- word_count / char_count are set from raw_text by the transcriptions_text_stats trigger
+-- (app/text_stats.py); p_word_count is kept for compatibility and overwritten.
+
+DROP FUNCTION IF EXISTS SaveTranscription;
+
 CREATE OR REPLACE FUNCTION SaveTranscription(
     p_id BIGINT,
     p_dictation_id BIGINT,
@@ -6,23 +14,46 @@ CREATE OR REPLACE FUNCTION SaveTranscription(
     p_model_name TEXT,
     p_confidence NUMERIC,
     p_word_count INT
-)
-RETURNS BIGINT AS $$
-DECLARE v_id BIGINT;
+) RETURNS transcriptions AS $$
+DECLARE
+    v_row transcriptions;
 BEGIN
-    INSERT INTO transcriptions (
-        dictation_id, doctor_id, raw_text, model_name, confidence, word_count
-    )
-    VALUES (
-        p_dictation_id, p_doctor_id, p_raw_text, p_model_name, p_confidence, p_word_count
-    )
-    ON CONFLICT (id) DO UPDATE SET
-        raw_text = EXCLUDED.raw_text,
-        model_name = EXCLUDED.model_name,
-        confidence = EXCLUDED.confidence,
-        word_count = EXCLUDED.word_count
-    RETURNING id INTO v_id;
+    IF p_id IS NULL THEN
+        INSERT INTO transcriptions (
+            dictation_id, doctor_id, raw_text, model_name, confidence,
+            word_count
+        )
+        VALUES (
+            p_dictation_id, p_doctor_id, p_raw_text, p_model_name,
+            p_confidence, p_word_count
+        )
+        RETURNING * INTO v_row;
+    ELSE
+        -- Try to update; unspecified (NULL) parameters keep existing values
+        UPDATE transcriptions
+        SET
+            dictation_id = COALESCE(p_dictation_id, dictation_id),
+            doctor_id = COALESCE(p_doctor_id, doctor_id),
+            raw_text = COALESCE(p_raw_text, raw_text),
+            model_name = COALESCE(p_model_name, model_name),
+            confidence = COALESCE(p_confidence, confidence),
+            word_count = COALESCE(p_word_count, word_count)
+        WHERE id = p_id
+        RETURNING * INTO v_row;
+
+        IF NOT FOUND THEN
+            INSERT INTO transcriptions (
+                id, dictation_id, doctor_id, raw_text, model_name,
+                confidence, word_count
+            )
+            VALUES (
+                p_id, p_dictation_id, p_doctor_id, p_raw_text,
+                p_model_name, p_confidence, p_word_count
+            )
+            RETURNING * INTO v_row;
+        END IF;
+    END IF;
 
-    RETURN v_id;
+    RETURN v_row;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
@@ -1,27 +1,54 @@
+-- SaveUser.sql
+-- Performs a merge (insert or update) for users and returns the affected row,
+-- so callers get the saved user back without a second query.
+
+DROP FUNCTION IF EXISTS SaveUser;
+
 CREATE OR REPLACE FUNCTION SaveUser(
     p_id BIGINT,
     p_name TEXT,
     p_email TEXT,
-    p_password TEXT,
-    p_created_at TIMESTAMPTZ DEFAULT NULL,
-    p_updated_at TIMESTAMPTZ DEFAULT NULL
-)
-RETURNS BIGINT AS $$
-DECLARE v_id BIGINT;
+    p_phone TEXT,
+    p_gender TEXT,
+    p_is_active BOOLEAN,
+    p_password TEXT
+) RETURNS users AS $$
+DECLARE
+    v_row users;
 BEGIN
-    INSERT INTO users (
-        id, name, email, password, created_at, updated_at
-    )
-    VALUES (
-        p_id, p_name, p_email, p_password, COALESCE(p_created_at, NOW()), COALESCE(p_updated_at, NOW())
-    )
-    ON CONFLICT (id) DO UPDATE SET
-        name = EXCLUDED.name,
-        email = EXCLUDED.email,
-        password = EXCLUDED.password,
-        updated_at = COALESCE(EXCLUDED.updated_at, NOW())
-    RETURNING id INTO v_id;
+    IF p_id IS NULL THEN
+        INSERT INTO users (
+            name, email, phone, gender, is_active, password
+        )
+        VALUES (
+            p_name, p_email, p_phone, p_gender, p_is_active, p_password
+        )
+        RETURNING * INTO v_row;
+    ELSE
+        -- Try to update; unspecified (NULL) parameters keep existing values
+        UPDATE users
+        SET
+            name = COALESCE(p_name, name),
+            email = COALESCE(p_email, email),
+            phone = COALESCE(p_phone, phone),
+            gender = COALESCE(p_gender, gender),
+            is_active = COALESCE(p_is_active, is_active),
+            password = COALESCE(p_password, password)
+        WHERE id = p_id
+        RETURNING * INTO v_row;
+
+        IF NOT FOUND THEN
+            INSERT INTO users (
+                id, name, email, phone, gender, is_active, password
+            )
+            VALUES (
+                p_id, p_name, p_email, p_phone, p_gender, p_is_active,
+                p_password
+            )
+            RETURNING * INTO v_row;
+        END IF;
+    END IF;
 
-    RETURN v_id;
+    RETURN v_row;
 END;
 $$ LANGUAGE plpgsql;
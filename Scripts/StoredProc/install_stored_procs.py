@@ -1,10 +1,18 @@
 """Install stored procedures in the database referenced by DATABASE_URL env var.
 Usage: python Scripts/StoredProc/install_stored_procs.py
+(`python -m app.bootstrap` also installs them, together with tables and indexes.)
 """
 import os
-from sqlalchemy import create_engine, text
+import sys
+from sqlalchemy import create_engine
 from dotenv import load_dotenv
 
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.bootstrap import install_stored_procs
+
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
@@ -14,15 +22,7 @@ engine = create_engine(DATABASE_URL)
 
 # Execute in a BEGIN/COMMIT block so DDL is persisted
 with engine.begin() as conn:
-    sql_files = [
-        "Scripts/StoredProc/SaveHospital.sql",
-        "Scripts/StoredProc/GetHospital.sql",
-        "Scripts/StoredProc/SaveUser.sql",
-        "Scripts/StoredProc/GetUser.sql"
-    ]
-    for sql_file in sql_files:
-        with open(sql_file) as f:
-            sql = f.read()
-            conn.execute(text(sql))
+    install_stored_procs(conn)
 
-print("Stored procedures installed.")
\ No newline at end of file
+print("Stored procedures installed.")
+print("Running servers pick them up after PROC_REGISTRY_TTL or on POST /admin/stored-procs/refresh.")
@@ -13,6 +13,7 @@ if ROOT not in sys.path:
 
 from app import models
 from app import database
+from app.bootstrap import bootstrap, stored_proc_files
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -21,21 +22,13 @@ from app.main import app
 if database.engine.dialect.name == "postgresql":
     from sqlalchemy import text
     with database.engine.begin() as conn:
-        conn.execute(text("DROP FUNCTION IF EXISTS GetHospital(bigint) CASCADE"))
-        conn.execute(text("DROP FUNCTION IF EXISTS SaveHospital(bigint, text, text, text, text, text, text, text, boolean) CASCADE"))
+        for path in stored_proc_files():
+            name = os.path.splitext(os.path.basename(path))[0]
+            conn.execute(text(f"DROP FUNCTION IF EXISTS {name} CASCADE"))
 
 models.Base.metadata.drop_all(bind=database.engine)
-models.Base.metadata.create_all(bind=database.engine)
-
-# Install stored procs if using PostgreSQL
-if database.engine.dialect.name == "postgresql":
-    from sqlalchemy import text
-    # Ensure DDL is committed
-    with database.engine.begin() as conn:
-        sql_save = open("Scripts/StoredProc/SaveHospital.sql").read()
-        sql_get = open("Scripts/StoredProc/GetHospital.sql").read()
-        conn.execute(text(sql_save))
-        conn.execute(text(sql_get))
+# Tables, indexes, stored procs (PostgreSQL) and the schema version, as a deploy would
+bootstrap(database.engine)
 
 client = TestClient(app)
 unique_code = f"TEST_{uuid.uuid4().hex[:8]}"
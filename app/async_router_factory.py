@@ -0,0 +1,87 @@
+"""Async variant of the generic CRUD router (asyncpg / aiosqlite via AsyncSession).
+
+Exposes the same endpoints and response shapes as `create_crud_router`: both share
+`CrudHandlers`. Here each handler runs through `AsyncSession.run_sync`, so its queries
+are awaited on the async driver instead of occupying a threadpool worker while in
+flight. Bulk bodies are parsed and validated in the threadpool, never on the event loop.
+Select it with `create_crud_router(..., async_=True)`.
+"""
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import get_async_db, get_async_engine
+from .schemas import BulkResult
+from .export import stream_export_async
+
+
+def create_async_crud_router(handlers, update_schema):
+    """Create an APIRouter with the generic CRUD endpoints backed by an AsyncSession.
+
+    `handlers` is the `CrudHandlers` built by `create_crud_router`.
+    """
+    create_schema, out_schema, prefix = handlers.create_schema, handlers.out_schema, handlers.prefix
+    router = APIRouter(prefix=f"/{prefix}", tags=[prefix])
+
+    @router.post("/", response_model=out_schema, status_code=status.HTTP_201_CREATED)
+    async def create_item(item: create_schema, db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(handlers.create, item)
+
+    @router.post("/bulk", response_model=BulkResult)
+    async def bulk_create(request: Request, db: AsyncSession = Depends(get_async_db)):
+        body = await request.body()
+        # Up to BULK_MAX_ROWS rows to parse and validate: CPU work, kept off the event loop
+        prepared = await run_in_threadpool(handlers.prepare_bulk, body, request.headers.get("content-type", ""))
+        return await db.run_sync(handlers.write_bulk, prepared)
+
+    @router.get("/", response_model=list[out_schema])
+    async def list_items(
+        request: Request,
+        response: Response,
+        id: int = None,
+        skip: int = 0,
+        limit: int = 100,
+        hospital_id: int = None,
+        doctor_id: int = None,
+        descendant_of: int = None,
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        return await db.run_sync(handlers.list_items, request, response, id, skip, limit, hospital_id, doctor_id, descendant_of)
+
+    @router.get("/page", response_model=handlers.page_model)
+    async def list_page(
+        request: Request,
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=1000),
+        hospital_id: int = None,
+        doctor_id: int = None,
+        descendant_of: int = None,
+        db: AsyncSession = Depends(get_async_db),
+    ):
+        return await db.run_sync(handlers.list_page, request, response, cursor, limit, hospital_id, doctor_id, descendant_of)
+
+    @router.get("/export")
+    async def export_items(
+        fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+        hospital_id: int = None,
+        doctor_id: int = None,
+        descendant_of: int = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+    ):
+        return handlers.export(
+            stream_export_async, get_async_engine(), fmt, hospital_id, doctor_id, descendant_of, created_from, created_to, after_id,
+        )
+
+    @router.get("/{item_id}", response_model=out_schema)
+    async def get_item(item_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(handlers.get_item, item_id, request, response)
+
+    @router.put("/{item_id}", response_model=out_schema)
+    async def update_item(item_id: int, updates: update_schema, db: AsyncSession = Depends(get_async_db)):
+        return await db.run_sync(handlers.update, item_id, updates)
+
+    return router
@@ -0,0 +1,286 @@
+"""Dictation audio: streaming and resumable uploads, and ranged downloads for playback.
+
+    PUT    /dictations/{id}/audio                        whole file in one streamed request body
+    POST   /dictations/{id}/audio/uploads                open a resumable upload -> upload_id
+    PATCH  /dictations/{id}/audio/uploads/{upload_id}    next chunk; `Upload-Offset` must equal `received`,
+                                                         `Upload-Final: true` marks the last one
+    GET    /dictations/{id}/audio/uploads/{upload_id}    progress, to resume after a failure
+    POST   /dictations/{id}/audio/uploads/{upload_id}/complete
+    DELETE /dictations/{id}/audio/uploads/{upload_id}    abandon
+    GET    /dictations/{id}/audio                        playback; honours a single `Range: bytes=`
+
+Request bodies are streamed straight into the storage backend (app/audio_storage.py), never
+buffered whole. On completion `audio_path` is set to the storage key and `duration_sec` to the
+WAV header's duration (or the client-supplied value for other formats). A `recorded` dictation is
+then queued for transcription (app/jobs.py).
+
+Object storage needs every chunk but the last to be at least `min_chunk_bytes`. A chunk is the last
+one when it carries `Upload-Final: true`, or when its `Content-Length` is exactly the rest of a
+declared `total_size`. After a final chunk the upload accepts no more bytes.
+"""
+import mimetypes
+import os
+import re
+import uuid
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from .audio_storage import audio_storage, wav_duration
+from .database import get_db
+from .jobs import enqueue
+from .models import AudioUpload, Dictation
+from .uploads import parse_content_length
+
+AUDIO_MAX_BYTES = int(os.getenv("AUDIO_MAX_BYTES", str(1024 * 1024 * 1024)))
+AUDIO_MAX_CHUNK_BYTES = int(os.getenv("AUDIO_MAX_CHUNK_BYTES", str(64 * 1024 * 1024)))
+# Bytes of the stored file read back to find the WAV header
+_HEADER_BYTES = 64 * 1024
+
+# Extensions for the usual recorder formats (the mimetypes table lacks some, e.g. audio/wav)
+_AUDIO_EXTENSIONS = {
+    "audio/wav": ".wav", "audio/x-wav": ".wav", "audio/wave": ".wav", "audio/mpeg": ".mp3",
+    "audio/mp4": ".m4a", "audio/ogg": ".ogg", "audio/webm": ".webm", "audio/flac": ".flac",
+}
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+_EXTENSION = re.compile(r"\.[a-z0-9]{1,8}$")
+
+router = APIRouter(prefix="/dictations", tags=["audio"])
+
+
+class UploadStart(BaseModel):
+    content_type: Optional[str] = None
+    filename: Optional[str] = None
+    total_size: Optional[int] = None
+
+
+class UploadComplete(BaseModel):
+    duration_sec: Optional[int] = None
+
+
+def _upload_out(upload: AudioUpload) -> dict:
+    return {
+        "upload_id": upload.id,
+        "dictation_id": upload.dictation_id,
+        "received": upload.received,
+        "total_size": upload.total_size,
+        "status": upload.status,
+        "min_chunk_bytes": audio_storage().min_part_size,
+        "max_chunk_bytes": AUDIO_MAX_CHUNK_BYTES,
+    }
+
+
+def _dictation(db: Session, dictation_id: int) -> Dictation:
+    dictation = db.get(Dictation, dictation_id)
+    if dictation is None:
+        raise HTTPException(status_code=404, detail="Dictation not found")
+    return dictation
+
+
+def _open_upload(db: Session, dictation_id: int, upload_id: str) -> AudioUpload:
+    upload = db.get(AudioUpload, upload_id)
+    if upload is None or upload.dictation_id != dictation_id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if upload.status != "open":
+        raise HTTPException(status_code=409, detail=f"Upload is {upload.status}")
+    return upload
+
+
+def _start_upload(db: Session, dictation_id: int, start: UploadStart) -> AudioUpload:
+    _dictation(db, dictation_id)
+    if start.total_size is not None and not 0 < start.total_size <= AUDIO_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"total_size must be between 1 and {AUDIO_MAX_BYTES} bytes")
+    upload_id = uuid.uuid4().hex
+    content_type = (start.content_type or "").split(";")[0].strip().lower()
+    ext = os.path.splitext(start.filename or "")[1].lower()
+    if not _EXTENSION.match(ext):
+        ext = _AUDIO_EXTENSIONS.get(content_type) or mimetypes.guess_extension(content_type) or ""
+    key = f"dictations/{dictation_id}/{upload_id}{ext}"
+    upload = AudioUpload(
+        id=upload_id, dictation_id=dictation_id, storage_key=key, storage_ref=audio_storage().start(key),
+        content_type=start.content_type, total_size=start.total_size, received=0, parts=[], status="open",
+    )
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+    return upload
+
+
+async def _limited(stream, limit: int):
+    # Request body chunks, failing once more than `limit` bytes have arrived
+    seen = 0
+    async for chunk in stream:
+        seen += len(chunk)
+        if seen > limit:
+            raise HTTPException(status_code=413, detail=f"Body exceeds {limit} bytes")
+        if chunk:
+            yield chunk
+
+
+async def _append(db: Session, upload: AudioUpload, stream, limit: int, final: bool) -> int:
+    storage = audio_storage()
+    try:
+        written, parts = await storage.write(
+            upload.storage_key, upload.storage_ref, upload.received, len(upload.parts or []) + 1, _limited(stream, limit), final,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    offset = upload.received
+
+    values = {"received": offset + written, "parts": (upload.parts or []) + parts}
+    if final:
+        # Nothing may follow a short trailing part: fix the size at what has arrived
+        values["total_size"] = offset + written
+
+    def record():
+        # Conditional on the offset, so of two racing requests for the same chunk only one counts
+        updated = db.query(AudioUpload).filter(AudioUpload.id == upload.id, AudioUpload.received == offset).update(
+            values, synchronize_session=False,
+        )
+        db.commit()
+        return updated
+
+    if not await run_in_threadpool(record):
+        raise HTTPException(status_code=409, detail="Concurrent write to this upload")
+    return offset + written
+
+
+def _complete(db: Session, dictation_id: int, upload_id: str, duration_sec: Optional[int]) -> dict:
+    upload = _open_upload(db, dictation_id, upload_id)
+    if upload.received == 0:
+        raise HTTPException(status_code=400, detail="Nothing was uploaded")
+    if upload.total_size is not None and upload.received != upload.total_size:
+        raise HTTPException(status_code=409, detail=f"Received {upload.received} of {upload.total_size} bytes")
+    storage = audio_storage()
+    try:
+        storage.complete(upload.storage_key, upload.storage_ref, upload.parts or [])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    header = b"".join(storage.read(upload.storage_key, 0, min(_HEADER_BYTES, upload.received) - 1))
+    seconds = wav_duration(header, upload.received)
+    dictation = _dictation(db, dictation_id)
+    dictation.audio_path = upload.storage_key
+    if seconds is not None:
+        dictation.duration_sec = round(seconds)
+    elif duration_sec is not None:
+        dictation.duration_sec = duration_sec
+    upload.status = "complete"
+    if dictation.status == "recorded":
+        enqueue(db, dictation)
+    db.commit()
+    return {"dictation_id": dictation_id, "audio_path": dictation.audio_path, "duration_sec": dictation.duration_sec, "size": upload.received}
+
+
+@router.post("/{dictation_id}/audio/uploads", status_code=201)
+def start_upload(dictation_id: int, start: UploadStart, db: Session = Depends(get_db)):
+    return _upload_out(_start_upload(db, dictation_id, start))
+
+
+@router.get("/{dictation_id}/audio/uploads/{upload_id}")
+def get_upload(dictation_id: int, upload_id: str, db: Session = Depends(get_db)):
+    upload = db.get(AudioUpload, upload_id)
+    if upload is None or upload.dictation_id != dictation_id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return _upload_out(upload)
+
+
+@router.patch("/{dictation_id}/audio/uploads/{upload_id}")
+async def append_chunk(
+    dictation_id: int,
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(...),
+    upload_final: bool = Header(False),
+    content_length: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    length = parse_content_length(content_length)
+    upload = await run_in_threadpool(_open_upload, db, dictation_id, upload_id)
+    if upload_offset != upload.received:
+        # The client resumes from `received` (also returned by GET on the upload)
+        raise HTTPException(status_code=409, detail=f"Upload-Offset must be {upload.received}")
+    remaining = (upload.total_size if upload.total_size is not None else AUDIO_MAX_BYTES) - upload.received
+    limit = min(AUDIO_MAX_CHUNK_BYTES, remaining)
+    final = upload_final or (upload.total_size is not None and length == remaining)
+    received = await _append(db, upload, request.stream(), limit, final)
+    return {"upload_id": upload_id, "received": received, "total_size": received if final else upload.total_size}
+
+
+@router.post("/{dictation_id}/audio/uploads/{upload_id}/complete")
+def complete_upload(dictation_id: int, upload_id: str, body: UploadComplete = None, db: Session = Depends(get_db)):
+    return _complete(db, dictation_id, upload_id, body.duration_sec if body else None)
+
+
+@router.delete("/{dictation_id}/audio/uploads/{upload_id}", status_code=204)
+def abort_upload(dictation_id: int, upload_id: str, db: Session = Depends(get_db)):
+    upload = _open_upload(db, dictation_id, upload_id)
+    audio_storage().abort(upload.storage_key, upload.storage_ref)
+    upload.status = "aborted"
+    db.commit()
+    return Response(status_code=204)
+
+
+@router.put("/{dictation_id}/audio")
+async def put_audio(
+    dictation_id: int,
+    request: Request,
+    duration_sec: Optional[int] = None,
+    filename: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    # One request, any size up to AUDIO_MAX_BYTES (e.g. chunked transfer encoding), still streamed
+    start = UploadStart(content_type=request.headers.get("content-type"), filename=filename)
+    upload = await run_in_threadpool(_start_upload, db, dictation_id, start)
+    try:
+        await _append(db, upload, request.stream(), AUDIO_MAX_BYTES, True)
+    except BaseException:
+        audio_storage().abort(upload.storage_key, upload.storage_ref)
+        raise
+    return await run_in_threadpool(_complete, db, dictation_id, upload.id, duration_sec)
+
+
+def _parse_range(header: str, size: int):
+    """`(start, end)` for a single `bytes=` range, None to serve the whole file; raises ValueError if unsatisfiable."""
+    match = _RANGE.match(header.strip())
+    if match is None:
+        return None  # multiple or malformed ranges: ignore the header
+    first, last = match.groups()
+    if not first:
+        if not last or int(last) == 0:
+            raise ValueError(header)
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+@router.get("/{dictation_id}/audio")
+def get_audio(dictation_id: int, range_header: Optional[str] = Header(None, alias="Range"), db: Session = Depends(get_db)):
+    dictation = _dictation(db, dictation_id)
+    storage = audio_storage()
+    try:
+        if not dictation.audio_path:
+            raise FileNotFoundError(dictation_id)
+        size = storage.size(dictation.audio_path)
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=404, detail="No audio for this dictation")
+    media_type = mimetypes.guess_type(dictation.audio_path)[0] or "application/octet-stream"
+    headers = {"Accept-Ranges": "bytes"}
+    span = None
+    if range_header:
+        try:
+            span = _parse_range(range_header, size)
+        except ValueError:
+            raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    if span is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(storage.read(dictation.audio_path, 0, size - 1), media_type=media_type, headers=headers)
+    start, end = span
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(storage.read(dictation.audio_path, start, end), status_code=206, media_type=media_type, headers=headers)
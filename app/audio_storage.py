@@ -0,0 +1,311 @@
+"""Storage backends for dictation audio (`/dictations/{id}/audio`, see app/audio_api.py).
+
+Uploads arrive as a stream of request-body chunks and are written through as they are read, so
+a worker holds at most one chunk (plus a bounded spool for object storage) per upload.
+
+Backends (AUDIO_STORAGE):
+- `local` (default): `LocalStorage`, files under AUDIO_STORAGE_DIR. Parts are written in place
+  at their offset in `.uploads/<ref>`, which is renamed to the final key on completion.
+- `s3`: `ObjectStorage` over an S3-style client using multipart uploads (`create_multipart_upload`,
+  `upload_part`, `complete_multipart_upload`, `abort_multipart_upload`, `head_object`,
+  `get_object`, `delete_object`). Set AUDIO_S3_BUCKET, and AUDIO_S3_ENDPOINT for S3-compatible
+  servers (needs the `boto3` package). `LocalObjectStore` is a local stand-in for tests and
+  single-host setups.
+"""
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import uuid
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+
+AUDIO_STORAGE = os.getenv("AUDIO_STORAGE", "local").strip().lower()
+AUDIO_STORAGE_DIR = os.getenv("AUDIO_STORAGE_DIR", "./audio")
+AUDIO_S3_BUCKET = os.getenv("AUDIO_S3_BUCKET")
+AUDIO_S3_ENDPOINT = os.getenv("AUDIO_S3_ENDPOINT")
+# Object-storage parts: bytes per uploaded part, and how much of a part is buffered in memory
+AUDIO_PART_BYTES = int(os.getenv("AUDIO_PART_BYTES", str(8 * 1024 * 1024)))
+AUDIO_SPOOL_BYTES = int(os.getenv("AUDIO_SPOOL_BYTES", str(1024 * 1024)))
+AUDIO_READ_CHUNK = int(os.getenv("AUDIO_READ_CHUNK", str(64 * 1024)))
+
+# S3 rejects multipart uploads whose parts (other than the last) are smaller than this
+S3_MIN_PART_BYTES = 5 * 1024 * 1024
+
+
+class LocalStorage:
+    """Audio files on the local filesystem; an upload is a sparse file written at offsets."""
+
+    min_part_size = 0
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key {key!r}")
+        return path
+
+    def _upload_path(self, ref: str) -> str:
+        return self._path(os.path.join(".uploads", ref))
+
+    def start(self, key: str) -> str:
+        ref = uuid.uuid4().hex
+        path = self._upload_path(ref)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "wb").close()
+        return ref
+
+    async def write(self, key: str, ref: str, offset: int, part_number: int, chunks, final: bool):
+        """Write the async iterable `chunks` at `offset`; return `(bytes written, new parts)`."""
+        written = 0
+        # File I/O runs in the threadpool: a slow disk must not stall the event loop
+        f = await run_in_threadpool(open, self._upload_path(ref), "r+b")
+        try:
+            await run_in_threadpool(f.seek, offset)
+            async for chunk in chunks:
+                await run_in_threadpool(f.write, chunk)
+                written += len(chunk)
+            # Drop bytes left behind by an earlier, interrupted attempt at this offset
+            await run_in_threadpool(f.truncate, offset + written)
+        finally:
+            await run_in_threadpool(f.close)
+        return written, []
+
+    def complete(self, key: str, ref: str, parts: list):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self._upload_path(ref), path)
+
+    def abort(self, key: str, ref: str):
+        try:
+            os.remove(self._upload_path(ref))
+        except FileNotFoundError:
+            pass
+
+    def size(self, key: str) -> int:
+        """Size of a stored object; raises FileNotFoundError."""
+        return os.path.getsize(self._path(key))
+
+    def read(self, key: str, start: int, end: int):
+        """Yield bytes `start..end` (inclusive) in AUDIO_READ_CHUNK pieces."""
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = f.read(min(AUDIO_READ_CHUNK, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+def _missing(error: Exception) -> bool:
+    if isinstance(error, FileNotFoundError):
+        return True
+    code = getattr(error, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
+
+class ObjectStorage:
+    """Audio in an S3-compatible bucket; each upload is a multipart upload."""
+
+    min_part_size = S3_MIN_PART_BYTES
+
+    def __init__(self, client, bucket: str, part_size: int = AUDIO_PART_BYTES):
+        self.client = client
+        self.bucket = bucket
+        self.part_size = max(part_size, S3_MIN_PART_BYTES)
+
+    def start(self, key: str) -> str:
+        return self.client.create_multipart_upload(Bucket=self.bucket, Key=key)["UploadId"]
+
+    async def _upload_part(self, key, ref, part_number, spool, size):
+        spool.seek(0)
+        response = await run_in_threadpool(
+            self.client.upload_part, Bucket=self.bucket, Key=key, UploadId=ref,
+            PartNumber=part_number, Body=spool, ContentLength=size,
+        )
+        return {"PartNumber": part_number, "ETag": response["ETag"]}
+
+    async def write(self, key: str, ref: str, offset: int, part_number: int, chunks, final: bool):
+        """Upload `chunks` as parts of `part_size`; a short trailing part is only allowed if `final`."""
+        parts, written = [], 0
+        spool, size = tempfile.SpooledTemporaryFile(max_size=AUDIO_SPOOL_BYTES), 0
+        try:
+            async for chunk in chunks:
+                while chunk:
+                    take = chunk[:self.part_size - size]
+                    chunk = chunk[len(take):]
+                    spool.write(take)
+                    size += len(take)
+                    written += len(take)
+                    if size == self.part_size:
+                        parts.append(await self._upload_part(key, ref, part_number + len(parts), spool, size))
+                        spool.close()
+                        spool, size = tempfile.SpooledTemporaryFile(max_size=AUDIO_SPOOL_BYTES), 0
+            if size:
+                if size < self.min_part_size and not final:
+                    raise ValueError(f"Chunks must be at least {self.min_part_size} bytes, except the last one")
+                parts.append(await self._upload_part(key, ref, part_number + len(parts), spool, size))
+        finally:
+            spool.close()
+        return written, parts
+
+    def complete(self, key: str, ref: str, parts: list):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=ref, MultipartUpload={"Parts": parts},
+        )
+
+    def abort(self, key: str, ref: str):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=ref)
+
+    def size(self, key: str) -> int:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+        except Exception as e:
+            if _missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def read(self, key: str, start: int, end: int):
+        body = self.client.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}")["Body"]
+        try:
+            while True:
+                data = body.read(AUDIO_READ_CHUNK)
+                if not data:
+                    break
+                yield data
+        finally:
+            body.close()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+
+class LocalObjectStore:
+    """Local stand-in for an S3 client: the multipart subset that ObjectStorage uses, on disk."""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._lock = threading.Lock()
+
+    def _object(self, bucket, key):
+        return os.path.join(self.root, bucket, key)
+
+    def _parts(self, upload_id):
+        return os.path.join(self.root, ".multipart", upload_id)
+
+    def create_multipart_upload(self, Bucket, Key):
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._parts(upload_id))
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body, ContentLength=None):
+        path = os.path.join(self._parts(UploadId), str(PartNumber))
+        with open(path, "wb") as f:
+            shutil.copyfileobj(Body, f, AUDIO_READ_CHUNK)
+        return {"ETag": f'"{UploadId}-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = sorted(MultipartUpload["Parts"], key=lambda p: p["PartNumber"])
+        path = self._object(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock, open(path, "wb") as out:
+            for i, part in enumerate(parts):
+                part_path = os.path.join(self._parts(UploadId), str(part["PartNumber"]))
+                if i < len(parts) - 1 and os.path.getsize(part_path) < S3_MIN_PART_BYTES:
+                    raise ValueError("EntityTooSmall")
+                with open(part_path, "rb") as f:
+                    shutil.copyfileobj(f, out, AUDIO_READ_CHUNK)
+        shutil.rmtree(self._parts(UploadId))
+        return {"Key": Key}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        shutil.rmtree(self._parts(UploadId), ignore_errors=True)
+
+    def head_object(self, Bucket, Key):
+        return {"ContentLength": os.path.getsize(self._object(Bucket, Key))}
+
+    def get_object(self, Bucket, Key, Range=None):
+        f = open(self._object(Bucket, Key), "rb")
+        start, end = 0, None
+        if Range:
+            first, last = Range[len("bytes="):].split("-")
+            start, end = int(first), int(last)
+        f.seek(start)
+        return {"Body": _RangeReader(f, None if end is None else end - start + 1)}
+
+    def delete_object(self, Bucket, Key):
+        try:
+            os.remove(self._object(Bucket, Key))
+        except FileNotFoundError:
+            pass
+
+
+class _RangeReader:
+    def __init__(self, f, remaining: Optional[int]):
+        self.f = f
+        self.remaining = remaining
+
+    def read(self, n: int = -1) -> bytes:
+        if self.remaining is not None:
+            n = self.remaining if n < 0 else min(n, self.remaining)
+        data = self.f.read(n)
+        if self.remaining is not None:
+            self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+def wav_duration(header: bytes, size: int) -> Optional[float]:
+    """Duration in seconds of a RIFF/WAVE file from its first bytes and total size, else None."""
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    pos, byte_rate = 12, None
+    while pos + 8 <= len(header):
+        chunk_id, chunk_size = header[pos:pos + 4], struct.unpack("<I", header[pos + 4:pos + 8])[0]
+        if chunk_id == b"fmt " and pos + 20 <= len(header):
+            byte_rate = struct.unpack("<I", header[pos + 16:pos + 20])[0]
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Streaming recorders leave the size unset (0 or 0xFFFFFFFF): use what was stored
+            data_size = min(chunk_size, size - pos - 8) if chunk_size else size - pos - 8
+            return data_size / byte_rate
+        pos += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def audio_storage():
+    """The configured backend (AUDIO_STORAGE), created on first use."""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = _build_storage()
+    return _storage
+
+
+def _build_storage():
+    if AUDIO_STORAGE == "s3":
+        if not AUDIO_S3_BUCKET:
+            raise RuntimeError("AUDIO_STORAGE=s3 requires AUDIO_S3_BUCKET")
+        import boto3  # optional dependency, only needed for AUDIO_STORAGE=s3
+
+        return ObjectStorage(boto3.client("s3", endpoint_url=AUDIO_S3_ENDPOINT), AUDIO_S3_BUCKET)
+    return LocalStorage(AUDIO_STORAGE_DIR)
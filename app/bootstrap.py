@@ -0,0 +1,138 @@
+"""Idempotent schema provisioning: tables, indexes, stored procedures and the schema version.
+
+Run once per deploy, before (re)starting the workers:
+
+    python -m app.bootstrap          # provision / upgrade, then record SCHEMA_VERSION
+    python -m app.bootstrap --check  # exit 1 if the database is not at SCHEMA_VERSION
+
+Workers do not touch the schema at startup; they only call `verify_schema_version()`.
+"""
+import glob
+import os
+import sys
+import time
+from sqlalchemy import inspect, select, text, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex
+from .database import engine
+from .doctor_photos import ensure_doctor_photos
+from .fulltext import ensure_fulltext
+from .models import Base, SchemaVersion
+from .proc_registry import proc_registry
+from .text_stats import ensure_text_stats
+from .vocab import ensure_vocab_version
+
+# Bump whenever app/models.py, the declared indexes or Scripts/StoredProc change
+SCHEMA_VERSION = 11
+
+PROC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Scripts", "StoredProc")
+
+# Serialises concurrent bootstraps (e.g. several deploy jobs) on PostgreSQL
+_ADVISORY_LOCK_KEY = 7_310_001
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def stored_proc_files() -> list:
+    """Save*.sql before Get*.sql; each script drops its previous definition first."""
+    return sorted(glob.glob(os.path.join(PROC_DIR, "Save*.sql"))) + sorted(glob.glob(os.path.join(PROC_DIR, "Get*.sql")))
+
+
+def install_stored_procs(conn):
+    for path in stored_proc_files():
+        with open(path) as f:
+            conn.execute(text(f.read()))
+
+
+def index_ddl(index, dialect, concurrently: bool = False) -> str:
+    """CREATE INDEX IF NOT EXISTS statement for a declared index."""
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=dialect))
+    if concurrently:
+        ddl = ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+        ddl = ddl.replace("CREATE UNIQUE INDEX", "CREATE UNIQUE INDEX CONCURRENTLY", 1)
+    return ddl
+
+
+def ensure_indexes(conn):
+    # create_all only indexes tables it creates; this backfills indexes added to existing tables
+    for table in Base.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            conn.exec_driver_sql(index_ddl(index, conn.dialect))
+
+
+def ensure_trigram_index(conn) -> bool:
+    """Optional pg_trgm GIN index for SNOMED term search; skipped if the extension cannot be created."""
+    try:
+        with conn.begin_nested():
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_snomed_descriptions_term_trgm "
+                "ON snomed_descriptions USING gin (term gin_trgm_ops)"
+            ))
+    except DBAPIError as e:
+        print(f"pg_trgm not available, skipping ix_snomed_descriptions_term_trgm: {e.orig}")
+        return False
+    return True
+
+
+def current_version(conn):
+    """Recorded schema version, or None if the database was never bootstrapped."""
+    if not inspect(conn).has_table(SchemaVersion.__tablename__):
+        return None
+    return conn.execute(select(SchemaVersion.version).where(SchemaVersion.id == 1)).scalar()
+
+
+def bootstrap(bind=engine) -> int:
+    """Create missing tables and indexes, (re)install stored procedures and record SCHEMA_VERSION."""
+    postgres = bind.dialect.name == "postgresql"
+    with bind.begin() as conn:
+        if postgres:
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        Base.metadata.create_all(bind=conn)
+        ensure_indexes(conn)
+        ensure_doctor_photos(conn)
+        ensure_fulltext(conn)
+        ensure_text_stats(conn)
+        ensure_vocab_version(conn)
+        if postgres:
+            ensure_trigram_index(conn)
+            install_stored_procs(conn)
+        table = SchemaVersion.__table__
+        res = conn.execute(update(table).where(table.c.id == 1).values(version=SCHEMA_VERSION, applied_at=text("CURRENT_TIMESTAMP")))
+        if res.rowcount == 0:
+            conn.execute(table.insert().values(id=1, version=SCHEMA_VERSION))
+    proc_registry.invalidate()
+    return SCHEMA_VERSION
+
+
+def verify_schema_version(bind=engine) -> int:
+    """Raise SchemaVersionError unless the database was bootstrapped at SCHEMA_VERSION."""
+    with bind.connect() as conn:
+        found = current_version(conn)
+    if found != SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"Database schema version is {found}, expected {SCHEMA_VERSION}; run `python -m app.bootstrap`"
+        )
+    return found
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    started = time.perf_counter()
+    if "--check" in argv:
+        try:
+            version = verify_schema_version()
+        except SchemaVersionError as e:
+            print(e)
+            return 1
+        print(f"Schema version {version} OK")
+        return 0
+    version = bootstrap()
+    print(f"Schema provisioned at version {version} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
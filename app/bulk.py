@@ -0,0 +1,128 @@
+"""Set-based bulk create/upsert used by the `POST /{prefix}/bulk` endpoints.
+
+Rows are parsed from a JSON array or NDJSON body, validated in one pass against the
+entity's create schema and written with multi-row `INSERT ... ON CONFLICT` statements
+in chunks. A chunk that fails (e.g. one FK violation) is retried row by row inside
+savepoints so every input row gets either an id or an error.
+"""
+import json
+import os
+from pydantic import ValidationError
+from sqlalchemy import func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from .models import utcnow
+
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "10000"))
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+def parse_bulk_body(raw: bytes, content_type: str = "") -> list:
+    """Decode a JSON array or NDJSON payload into a list of records.
+
+    Raises ValueError when the body is neither.
+    """
+    text_body = raw.decode("utf-8")
+    if content_type.split(";")[0].strip().lower() in NDJSON_TYPES:
+        records = [json.loads(line) for line in text_body.splitlines() if line.strip()]
+    else:
+        stripped = text_body.lstrip()
+        if stripped.startswith("["):
+            records = json.loads(stripped)
+        else:
+            # Tolerate NDJSON sent without the matching content type
+            records = [json.loads(line) for line in text_body.splitlines() if line.strip()]
+    if not isinstance(records, list):
+        raise ValueError("Bulk body must be a JSON array or NDJSON")
+    return records
+
+
+def validate_rows(schema, records: list):
+    """Validate every record against `schema`.
+
+    Returns `(valid, errors)` where `valid` is a list of `(index, values)` and
+    `errors` a list of `{"index": i, "error": ...}` for rejected records.
+    """
+    valid = []
+    errors = []
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors.append({"index": index, "error": "Row must be a JSON object"})
+            continue
+        try:
+            valid.append((index, schema(**record).dict()))
+        except ValidationError as e:
+            errors.append({"index": index, "error": e.errors()})
+    return valid, errors
+
+
+def conflict_columns(model) -> list:
+    """Columns used as the upsert target: single-column UNIQUE keys other than the primary key."""
+    return [c.name for c in model.__table__.columns if c.unique and not c.primary_key]
+
+
+def build_insert(model, dialect_name: str, columns):
+    """Multi-row INSERT returning ids; upserts on the model's unique key where the dialect allows it."""
+    table = model.__table__
+    targets = conflict_columns(model)
+    if dialect_name == "postgresql":
+        stmt = postgresql.insert(table)
+    elif dialect_name == "sqlite":
+        stmt = sqlite.insert(table)
+    else:
+        stmt = insert(table)
+    if targets and dialect_name in ("postgresql", "sqlite"):
+        # Same merge semantics as Save{Entity}: an existing row with the same key is updated,
+        # and omitted (NULL) fields keep their stored value, like the procs' COALESCE(p_x, col)
+        set_ = {name: func.coalesce(stmt.excluded[name], table.c[name]) for name in columns if name not in targets}
+        if "updated_at" in table.c:
+            # Keep version ETags honest for rows changed by an upsert
+            set_["updated_at"] = utcnow()
+        stmt = stmt.on_conflict_do_update(index_elements=targets, set_=set_)
+    return stmt.returning(table.c.id, sort_by_parameter_order=True)
+
+
+def write_rows(db, model, rows: list) -> list:
+    """Insert `(index, values)` rows chunk by chunk; return per-row `{"index", "id"|"error"}` results.
+
+    The caller owns the transaction and commits once at the end.
+    """
+    results = []
+    if not rows:
+        return results
+    columns = list(rows[0][1].keys())
+    stmt = build_insert(model, db.bind.dialect.name, columns)
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        chunk = rows[start:start + BULK_CHUNK_SIZE]
+        try:
+            with db.begin_nested():
+                ids = db.execute(stmt, [values for _, values in chunk]).scalars().all()
+            results.extend({"index": index, "id": row_id} for (index, _), row_id in zip(chunk, ids))
+        except SQLAlchemyError:
+            # Isolate the failing rows; the rest of the chunk is still written
+            for index, values in chunk:
+                try:
+                    with db.begin_nested():
+                        row_id = db.execute(stmt, [values]).scalar_one()
+                    results.append({"index": index, "id": row_id})
+                except IntegrityError as e:
+                    results.append({"index": index, "error": str(e.orig)})
+                except SQLAlchemyError as e:
+                    results.append({"index": index, "error": f"{e.__class__.__name__}: {e}"})
+    return results
+
+
+def summarize(received: int, results: list, errors: list, elapsed: float) -> dict:
+    """Merge write results with validation errors into the BulkResult payload."""
+    results = sorted(results + errors, key=lambda r: r["index"])
+    written = sum(1 for r in results if r.get("id") is not None)
+    return {
+        "received": received,
+        "written": written,
+        "failed": received - written,
+        "elapsed_ms": round(elapsed * 1000, 3),
+        "rows_per_sec": round(written / elapsed, 1) if elapsed > 0 else 0.0,
+        "results": results,
+    }
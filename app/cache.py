@@ -0,0 +1,208 @@
+"""Read-through cache for rarely changing reference entities (hospitals, departments, doctors).
+
+`create_crud_router(..., cache=entity_cache("hospitals"))` serves `GET /{prefix}/{id}` from the
+cache and invalidates the entry on create/update/bulk writes of the same entity.
+
+Backends:
+- `LRUCache`: in-process, bounded (LRU eviction) with a TTL. Default; each worker has its own
+  copy, so writes made through another worker become visible after at most CACHE_TTL seconds.
+- `SharedCache`: a shared key-value store reached through a redis-style client (`get`,
+  `set(name, value, ex=)`, `delete`). Selected with CACHE_BACKEND=redis and CACHE_URL (needs the
+  `redis` package); `MemoryStore` is a local stand-in for tests and single-process setups.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").strip().lower()
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))
+CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", "10000"))
+CACHE_URL = os.getenv("CACHE_URL")
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with a per-entry TTL (ttl <= 0: entries never expire)."""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def get(self, key, valid=None):
+        """Cached value for `key`, or None.
+
+        `valid`: optional predicate on the value; an entry failing it (e.g. built from an older
+        version) is dropped and counted as a miss.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    if valid is None or valid(value):
+                        self._data.move_to_end(key)
+                        self.stats.incr("hits")
+                        return value
+                    del self._data[key]
+                else:
+                    del self._data[key]
+                    self.stats.incr("expirations")
+            self.stats.incr("misses")
+            return None
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats.incr("evictions")
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+        self.stats.incr("invalidations")
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def info(self) -> dict:
+        return {"backend": "memory", "size": len(self._data), "maxsize": self.maxsize, "ttl_seconds": self.ttl, **self.stats.snapshot()}
+
+
+class MemoryStore:
+    """Local stand-in for a redis client: the subset of its API that SharedCache uses."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._data[name] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(1 for name in names if self._data.pop(name, None) is not None)
+
+
+class SharedCache:
+    """Cache entries in a shared store so every worker sees the same data and invalidations."""
+
+    def __init__(self, client, ttl: float = 60.0, prefix: str = "entity:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.stats = CacheStats()
+
+    def get(self, key, valid=None):
+        """Cached value for `key`, or None; `valid` as in `LRUCache.get`."""
+        raw = self.client.get(self.prefix + key)
+        if raw is not None:
+            value = json.loads(raw)
+            if valid is None or valid(value):
+                self.stats.incr("hits")
+                return value
+            self.client.delete(self.prefix + key)
+        self.stats.incr("misses")
+        return None
+
+    def set(self, key, value):
+        # datetimes/decimals are stored as strings; the response schema parses them back
+        self.client.set(self.prefix + key, json.dumps(value, default=str), ex=int(self.ttl) if self.ttl > 0 else None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+        self.stats.incr("invalidations")
+
+    def info(self) -> dict:
+        return {"backend": type(self.client).__name__, "ttl_seconds": self.ttl, **self.stats.snapshot()}
+
+
+class EntityCache:
+    """Per-entity view of a cache backend, keyed by primary key."""
+
+    def __init__(self, name: str, backend):
+        self.name = name
+        self.backend = backend
+
+    def _key(self, item_id) -> str:
+        return f"{self.name}:{item_id}"
+
+    def get(self, item_id, valid=None):
+        return self.backend.get(self._key(item_id), valid)
+
+    def set(self, item_id, value):
+        self.backend.set(self._key(item_id), value)
+
+    def invalidate(self, item_id):
+        self.backend.delete(self._key(item_id))
+
+    def stats(self) -> dict:
+        return self.backend.info()
+
+
+def _shared_client():
+    import redis  # optional dependency, only needed for CACHE_BACKEND=redis
+
+    return redis.Redis.from_url(CACHE_URL)
+
+
+# Registered entity caches by name, reported by GET /admin/cache
+caches = {}
+
+
+def entity_cache(name: str) -> EntityCache:
+    """Create (or return) the cache for entity `name` using the CACHE_* settings."""
+    if name not in caches:
+        if CACHE_BACKEND == "redis":
+            if not CACHE_URL:
+                raise RuntimeError("CACHE_BACKEND=redis requires CACHE_URL")
+            backend = SharedCache(_shared_client(), ttl=CACHE_TTL)
+        else:
+            backend = LRUCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL)
+        caches[name] = EntityCache(name, backend)
+    return caches[name]
@@ -0,0 +1,258 @@
+"""Set-based bulk import of CSV/NDJSON backfills (dictations, transcriptions, SNOMED annotations).
+
+Each chunk of input rows is validated against the entity schemas and loaded into a temporary
+staging table. PostgreSQL uses `COPY ... FROM STDIN`; other dialects (SQLite, for local
+testing) use `executemany`. The chunk is then merged into the target table with a handful of
+set-based statements that follow the `Save{Entity}` procedures:
+
+- rows with an `id` that exists: `UPDATE ... SET col = COALESCE(staged, current)`;
+- rows with an `id` that does not exist: inserted with that id;
+- rows without an `id`: inserted. Dictations upsert on `dictation_number`, updating
+  `status`, `audio_path` and `duration_sec` as SaveDictation does.
+
+Rows that fail validation, reference missing parents, repeat an id or would take another row's
+`dictation_number` are rejected with their line number instead of aborting the chunk. Used by `Scripts/Import/bulk_import.py`.
+"""
+import csv
+import io
+import json
+import os
+import time
+import uuid
+from pydantic import ValidationError
+from sqlalchemy import Column, Integer, MetaData, Table, and_, exists, func, insert, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from . import models, schemas
+from .models import utcnow
+from . import text_stats  # registers word_count() for the SQLite triggers
+
+IMPORT_CHUNK_ROWS = int(os.getenv("IMPORT_CHUNK_ROWS", "50000"))
+
+# entity -> (model, create schema for new rows, update schema for rows that carry an id)
+IMPORT_TARGETS = {
+    "dictations": (models.Dictation, schemas.DictationCreate, schemas.DictationUpdate),
+    "transcriptions": (models.Transcription, schemas.TranscriptionCreate, schemas.TranscriptionUpdate),
+    "snomed_annotations": (models.SNOMEDAnnotation, schemas.SNOMEDAnnotationCreate, schemas.SNOMEDAnnotationUpdate),
+}
+
+# ON CONFLICT targets and the columns they refresh, as in the Save procedures
+UPSERT_KEYS = {
+    "dictations": ("dictation_number", ("status", "audio_path", "duration_sec")),
+}
+
+_COPY_NULL = "\\N"
+
+
+def read_records(stream, fmt: str):
+    """Yield `(line_number, record)` from a CSV (header row) or NDJSON text stream."""
+    if fmt == "csv":
+        for line, record in enumerate(csv.DictReader(stream), start=2):
+            # CSV has no null: empty cells are absent values
+            yield line, {k: v for k, v in record.items() if v != ""}
+    elif fmt == "ndjson":
+        for line, raw in enumerate(stream, start=1):
+            if raw.strip():
+                try:
+                    yield line, json.loads(raw)
+                except json.JSONDecodeError as e:
+                    yield line, e
+    else:
+        raise ValueError(f"Unsupported import format {fmt!r}; use csv or ndjson")
+
+
+class ImportReport:
+    def __init__(self, entity: str):
+        self.entity = entity
+        self.received = 0
+        self.inserted = 0
+        self.updated = 0
+        self.rejected = []
+        self.started = time.perf_counter()
+
+    def reject(self, line: int, error):
+        self.rejected.append({"line": line, "error": error})
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        written = self.inserted + self.updated
+        return {
+            "entity": self.entity,
+            "received": self.received,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "rejected": len(self.rejected),
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "rows_per_sec": round(written / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+def _staging_table(model):
+    """Nullable copy of the target's columns plus the input line number."""
+    columns = [Column(c.name, c.type) for c in model.__table__.columns if c.name not in ("created_at", "updated_at")]
+    return Table(f"stage_{model.__tablename__}_{uuid.uuid4().hex[:8]}", MetaData(), Column("_line", Integer), *columns, prefixes=["TEMPORARY"])
+
+
+def _validate(create_schema, update_schema, line: int, record, report: ImportReport):
+    if isinstance(record, Exception):
+        report.reject(line, f"Invalid JSON: {record}")
+        return None
+    if not isinstance(record, dict):
+        report.reject(line, "Row must be an object")
+        return None
+    try:
+        # JSON columns arrive as text in CSV files
+        for name, field in create_schema.__fields__.items():
+            if field.outer_type_ is dict and isinstance(record.get(name), str):
+                record[name] = json.loads(record[name])
+        if record.get("id") not in (None, ""):
+            row = update_schema(**record).dict(exclude_unset=True)
+            row["id"] = int(record["id"])
+        else:
+            row = create_schema(**record).dict()
+    except (ValidationError, ValueError, TypeError) as e:
+        report.reject(line, e.errors() if isinstance(e, ValidationError) else str(e))
+        return None
+    row["_line"] = line
+    return row
+
+
+def _copy_rows(conn, stage, rows):
+    """COPY rows into the staging table through the psycopg2 connection."""
+    names = [c.name for c in stage.columns]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        values = []
+        for name in names:
+            value = row.get(name)
+            if value is None:
+                value = _COPY_NULL
+            elif isinstance(value, (dict, list)):
+                value = json.dumps(value)
+            values.append(value)
+        writer.writerow(values)
+    buf.seek(0)
+    cursor = conn.connection.driver_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {stage.name} ({', '.join(names)}) FROM STDIN WITH (FORMAT csv, NULL '{_COPY_NULL}')",
+            buf,
+        )
+    finally:
+        cursor.close()
+
+
+def _reject_where(conn, stage, condition, reason, report: ImportReport):
+    """Move staged rows matching `condition` to the rejected list."""
+    for line, detail in conn.execute(select(stage.c._line, condition[1]).where(condition[0])):
+        report.reject(line, reason(detail))
+    conn.execute(stage.delete().where(condition[0]))
+
+
+def _merge(conn, entity, model, stage, report: ImportReport):
+    table = model.__table__
+    names = [c.name for c in stage.columns if c.name not in ("_line", "id")]
+
+    # Only the last occurrence of an id counts, as if the rows had been saved one by one
+    later = stage.alias("later")
+    superseded = exists().where(and_(later.c.id == stage.c.id, later.c._line > stage.c._line))
+    _reject_where(conn, stage, (and_(stage.c.id.isnot(None), superseded), stage.c.id),
+                  lambda v: f"Superseded by a later row with id {v}", report)
+
+    # Parents must exist (a single orphan would otherwise abort the whole statement)
+    for fk in table.foreign_keys:
+        col = stage.c[fk.parent.name]
+        orphan = and_(col.isnot(None), ~exists().where(fk.column == col))
+        _reject_where(conn, stage, (orphan, col),
+                      lambda v, name=fk.parent.name: f"{name}={v} does not exist", report)
+
+    # New rows must carry every NOT NULL column
+    is_new = ~exists().where(table.c.id == stage.c.id)
+    for c in table.columns:
+        if not c.nullable and not c.primary_key and c.server_default is None and c.name in stage.c:
+            missing = and_(stage.c.id.isnot(None), is_new, stage.c[c.name].is_(None))
+            _reject_where(conn, stage, (missing, stage.c.id),
+                          lambda v, name=c.name: f"id {v} is new but {name} is missing", report)
+
+    # Nor may they take a unique key that another row holds or a later staged row claims
+    key = UPSERT_KEYS.get(entity)
+    if key is not None:
+        key_col = key[0]
+        keyed_with_id = and_(stage.c.id.isnot(None), stage.c[key_col].isnot(None))
+        taken = exists().where(and_(table.c[key_col] == stage.c[key_col], table.c.id != stage.c.id))
+        _reject_where(conn, stage, (and_(keyed_with_id, taken), stage.c[key_col]),
+                      lambda v: f"{key_col}={v} belongs to another row", report)
+        claimed = exists().where(and_(later.c[key_col] == stage.c[key_col], later.c._line > stage.c._line, later.c.id.isnot(None)))
+        _reject_where(conn, stage, (and_(keyed_with_id, claimed), stage.c[key_col]),
+                      lambda v: f"Superseded by a later row with {key_col}={v}", report)
+
+    values = {name: func.coalesce(stage.c[name], table.c[name]) for name in names}
+    if "updated_at" in table.c:
+        values["updated_at"] = utcnow()
+    report.updated += conn.execute(update(table).values(**values).where(table.c.id == stage.c.id)).rowcount
+
+    new_with_id = select(stage.c.id, *[stage.c[n] for n in names]).where(stage.c.id.isnot(None), is_new)
+    report.inserted += conn.execute(insert(table).from_select(["id", *names], new_with_id)).rowcount
+
+    without_id = select(*[stage.c[n] for n in names]).where(stage.c.id.is_(None))
+    if key is None:
+        report.inserted += conn.execute(insert(table).from_select(names, without_id)).rowcount
+    else:
+        key_col, refreshed = key
+        # ON CONFLICT cannot touch the same row twice in one statement: keep the last line per key
+        dup = exists().where(and_(later.c[key_col] == stage.c[key_col], later.c._line > stage.c._line, later.c.id.is_(None)))
+        _reject_where(conn, stage, (and_(stage.c.id.is_(None), dup), stage.c[key_col]),
+                      lambda v: f"Superseded by a later row with {key_col}={v}", report)
+        keyed = and_(stage.c.id.is_(None), stage.c[key_col].isnot(None))
+        # Rows whose key already exists take the DO UPDATE branch: counted as updates, not inserts
+        existing = conn.execute(
+            select(func.count()).select_from(stage).where(keyed, exists().where(table.c[key_col] == stage.c[key_col]))
+        ).scalar()
+        dialect = postgresql if conn.dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(table).from_select(names, without_id.where(stage.c[key_col].isnot(None)))
+        set_ = {name: stmt.excluded[name] for name in refreshed}
+        if "updated_at" in table.c:
+            set_["updated_at"] = utcnow()
+        upserted = conn.execute(stmt.on_conflict_do_update(index_elements=[key_col], set_=set_)).rowcount
+        report.updated += existing
+        report.inserted += upserted - existing
+        report.inserted += conn.execute(insert(table).from_select(names, without_id.where(stage.c[key_col].is_(None)))).rowcount
+
+
+def _load_chunk(engine, entity, model, rows, report: ImportReport):
+    stage = _staging_table(model)
+    with engine.begin() as conn:
+        stage.create(conn)
+        if conn.dialect.name == "postgresql":
+            _copy_rows(conn, stage, rows)
+        else:
+            conn.execute(stage.insert(), [{c.name: row.get(c.name) for c in stage.columns} for row in rows])
+        _merge(conn, entity, model, stage, report)
+        stage.drop(conn)
+        if conn.dialect.name == "postgresql":
+            # Explicit ids bypass the sequence; move it past them so later inserts do not collide
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{model.__tablename__}', 'id'), "
+                f"GREATEST((SELECT COALESCE(MAX(id), 0) FROM {model.__tablename__}), 1))"
+            ))
+
+
+def import_records(engine, entity: str, records, chunk_rows: int = None) -> ImportReport:
+    """Import `(line, record)` pairs into `entity`; one transaction per chunk."""
+    if entity not in IMPORT_TARGETS:
+        raise ValueError(f"Unsupported entity {entity!r}; use one of {', '.join(IMPORT_TARGETS)}")
+    model, create_schema, update_schema = IMPORT_TARGETS[entity]
+    chunk_rows = chunk_rows or IMPORT_CHUNK_ROWS
+    report = ImportReport(entity)
+    chunk = []
+    for line, record in records:
+        report.received += 1
+        row = _validate(create_schema, update_schema, line, record, report)
+        if row is not None:
+            chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            _load_chunk(engine, entity, model, chunk, report)
+            chunk = []
+    if chunk:
+        _load_chunk(engine, entity, model, chunk, report)
+    return report
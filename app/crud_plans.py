@@ -0,0 +1,68 @@
+"""Per-entity statement and parameter plans for the generic CRUD router.
+
+An `EntityPlan` is compiled once per model when `create_crud_router` is called, so
+request handlers only bind values instead of walking `model.__table__.columns` and
+rebuilding SQL text for every create/update.
+"""
+from sqlalchemy import text, String, Text, Integer, BigInteger, Boolean, DateTime, Date, JSON, Numeric, LargeBinary
+
+# Columns managed by the database rather than passed to Save{Entity}
+AUTO_COLUMNS = ("id", "created_at", "updated_at", "char_count", "vocab_version")
+
+
+def sa_type_to_pg(col) -> str:
+    """Map SQLAlchemy column type instances to a Postgres type name used for CAST()."""
+    t = col.type
+    if isinstance(t, (String, Text)):
+        return "text"
+    if isinstance(t, BigInteger):
+        return "bigint"
+    # INT proc parameters do not accept bigint arguments (no implicit downcast)
+    if isinstance(t, Integer):
+        return "integer"
+    if isinstance(t, Boolean):
+        return "boolean"
+    if isinstance(t, DateTime):
+        return "timestamptz"
+    if isinstance(t, Date):
+        return "date"
+    if isinstance(t, JSON):
+        return "jsonb"
+    if isinstance(t, Numeric):
+        return "numeric"
+    if isinstance(t, LargeBinary):
+        return "bytea"
+    # Fallback
+    return "text"
+
+
+def proc_columns(model) -> list:
+    """Return non-auto columns to include in stored-proc parameters (excludes 'id' and timestamps)."""
+    return [c for c in model.__table__.columns if c.name not in AUTO_COLUMNS]
+
+
+class EntityPlan:
+    """Precompiled Save/Get statements and parameter layout for one model."""
+
+    def __init__(self, model):
+        self.entity = model.__name__
+        self.save_proc = f"Save{self.entity}"
+        self.get_proc = f"Get{self.entity}"
+        cols = proc_columns(model)
+        self.columns = tuple(c.name for c in cols)
+        # (payload key, bind name) pairs in stored-proc argument order
+        self._bindings = tuple((name, f"p_{name}") for name in self.columns)
+
+        args = ["CAST(:p_id AS bigint)"]
+        args.extend(f"CAST(:p_{c.name} AS {sa_type_to_pg(c)})" for c in cols)
+        # Save procedures return the affected row, so writes need no follow-up SELECT
+        self.save_stmt = text(f"SELECT * FROM {self.save_proc}({', '.join(args)})")
+        self.get_stmt = text(f"SELECT * FROM {self.get_proc}(CAST(:p_id AS bigint))")
+
+    def bind(self, values: dict, item_id=None) -> dict:
+        """Build the p_<name> parameter dict for `save_stmt`; absent fields bind as NULL."""
+        params = {"p_id": item_id}
+        get = values.get
+        for name, key in self._bindings:
+            params[key] = get(name)
+        return params
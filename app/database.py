@@ -1,5 +1,9 @@
 import os
+import threading
+import time
+from fastapi import HTTPException
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
@@ -7,13 +11,171 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL") or "sqlite:///./test.db"
 
-engine = create_engine(DATABASE_URL, echo=True)
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Connection/pool settings (production-safe defaults; override via environment)
+DB_ECHO = _env_bool("DB_ECHO", False)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+
+
+def engine_kwargs(url: str) -> dict:
+    """Keyword arguments for create_engine() derived from the DB_* settings."""
+    kwargs = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    if url.startswith("sqlite"):
+        # SQLite picks its own pool class; sizing/recycling does not apply
+        return kwargs
+    kwargs.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if url.startswith("postgresql") and DB_STATEMENT_TIMEOUT_MS > 0:
+        kwargs["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return kwargs
+
+
+engine = create_engine(DATABASE_URL, **engine_kwargs(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+class PoolMetrics:
+    """Checkout wait times and saturation of the connection pool, for sizing workers."""
+
+    # Upper bounds (ms) of the checkout wait histogram buckets; the last bucket is open-ended
+    BUCKETS_MS = (1, 5, 25, 100, 500)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.peak_checked_out = 0
+        self.histogram = [0] * (len(self.BUCKETS_MS) + 1)
+
+    def record_checkout(self, wait: float, checked_out: int):
+        wait_ms = wait * 1000
+        bucket = next((i for i, bound in enumerate(self.BUCKETS_MS) if wait_ms < bound), len(self.BUCKETS_MS))
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self.histogram[bucket] += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool) -> dict:
+        size = pool.size() if hasattr(pool, "size") else None
+        checked_out = pool.checkedout() if hasattr(pool, "checkedout") else None
+        max_overflow = getattr(pool, "_max_overflow", 0)
+        capacity = size + max(max_overflow, 0) if size is not None else None
+        labels = [f"<{b}ms" for b in self.BUCKETS_MS] + [f">={self.BUCKETS_MS[-1]}ms"]
+        return {
+            "pool_class": type(pool).__name__,
+            "pool_size": size,
+            "max_overflow": max_overflow,
+            "checked_out": checked_out,
+            "capacity": capacity,
+            "saturation": round(checked_out / capacity, 3) if capacity else None,
+            "peak_checked_out": self.peak_checked_out,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+            "wait_histogram": dict(zip(labels, self.histogram)),
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
 def get_db():
     db = SessionLocal()
     try:
+        # Check the connection out up front so time spent waiting on the pool is measured
+        started = time.perf_counter()
+        try:
+            db.connection()
+        except PoolTimeoutError:
+            pool_metrics.record_timeout()
+            raise HTTPException(status_code=503, detail="Database connection pool exhausted")
+        pool = engine.pool
+        pool_metrics.record_checkout(
+            time.perf_counter() - started,
+            pool.checkedout() if hasattr(pool, "checkedout") else 0,
+        )
         yield db
     finally:
         db.close()
+
+
+# --- Async path (asyncpg / aiosqlite), created lazily so the sync app never needs those drivers ---
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+async_pool_metrics = PoolMetrics()
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL (e.g. postgresql+psycopg2://) to its async driver equivalent."""
+    scheme, rest = url.split("://", 1)
+    backend = scheme.split("+", 1)[0]
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r} URLs")
+    return f"{backend}+{ASYNC_DRIVERS[backend]}://{rest}"
+
+
+def get_async_engine():
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = async_database_url(DATABASE_URL)
+        kwargs = engine_kwargs(DATABASE_URL)
+        kwargs.pop("connect_args", None)
+        if url.startswith("postgresql+asyncpg") and DB_STATEMENT_TIMEOUT_MS > 0:
+            kwargs["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        _async_engine = create_async_engine(url, **kwargs)
+        # Objects stay loaded after commit: lazy attribute refresh is not possible outside a greenlet
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+async def get_async_db():
+    async_engine = get_async_engine()
+    async with _AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        try:
+            await db.connection()
+        except PoolTimeoutError:
+            async_pool_metrics.record_timeout()
+            raise HTTPException(status_code=503, detail="Database connection pool exhausted")
+        pool = async_engine.sync_engine.pool
+        async_pool_metrics.record_checkout(
+            time.perf_counter() - started,
+            pool.checkedout() if hasattr(pool, "checkedout") else 0,
+        )
+        yield db
+
+
+def async_pool_snapshot():
+    """Pool metrics of the async engine, or None if no async router has used it yet."""
+    if _async_engine is None:
+        return None
+    return async_pool_metrics.snapshot(_async_engine.sync_engine.pool)
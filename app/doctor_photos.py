@@ -0,0 +1,89 @@
+"""Doctor photos, stored in `doctor_photos` rather than on the `doctors` row.
+
+Every doctor read and write (`GetDoctor`/`SaveDoctor`, `db.query(Doctor)`, list pages) used to carry
+the image bytes. The photo now lives in its own table, keyed by `doctor_id`, and is only read by
+`GET /doctors/{id}/photo` (app/doctor_photos_api.py). The table also keeps:
+- the content type, sniffed from the bytes at upload;
+- a SHA-256 of the bytes, used as a strong ETag without reading `data`;
+- an optional thumbnail of at most PHOTO_THUMB_PX pixels per side, made at upload when Pillow is
+  installed.
+
+`ensure_doctor_photos` moves photos out of a `doctors.photo` column left by an older schema, then
+drops that column.
+"""
+import hashlib
+import io
+import os
+from typing import Optional
+from sqlalchemy import inspect, select, text
+from .models import DoctorPhoto
+
+PHOTO_MAX_BYTES = int(os.getenv("PHOTO_MAX_BYTES", str(5 * 1024 * 1024)))
+PHOTO_THUMB_PX = int(os.getenv("PHOTO_THUMB_PX", "128"))
+
+# Leading bytes of the formats browsers display
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def sniff_content_type(data: bytes) -> Optional[str]:
+    """Image type from the first bytes, or None if `data` is not a supported image."""
+    for signature, content_type in _SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def make_thumbnail(data: bytes, size: int = PHOTO_THUMB_PX) -> Optional[bytes]:
+    """A copy at most `size` pixels per side, in the original format; None without Pillow or if undecodable."""
+    try:
+        from PIL import Image  # optional dependency, only needed for thumbnails
+    except ImportError:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if max(image.size) <= size:
+                return None  # already small: the photo itself is the thumbnail
+            image_format = image.format
+            image.thumbnail((size, size))
+            out = io.BytesIO()
+            image.save(out, format=image_format)
+    except (OSError, ValueError):
+        return None
+    return out.getvalue()
+
+
+def photo_values(data: bytes, content_type: str) -> dict:
+    """Column values for storing `data` as a doctor's photo."""
+    return {
+        "content_type": content_type,
+        "size": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "data": data,
+        "thumbnail": make_thumbnail(data),
+    }
+
+
+def ensure_doctor_photos(conn):
+    """Move photos from a legacy `doctors.photo` column into `doctor_photos`, then drop the column."""
+    if "photo" not in {c["name"] for c in inspect(conn).get_columns("doctors")}:
+        return
+    moved = 0
+    # One photo at a time: the column was the reason doctor reads were slow, so never load it all
+    ids = conn.execute(text("SELECT id FROM doctors WHERE photo IS NOT NULL")).scalars().all()
+    existing = set(conn.execute(select(DoctorPhoto.doctor_id)).scalars())
+    for doctor_id in ids:
+        if doctor_id in existing:
+            continue
+        data = bytes(conn.execute(text("SELECT photo FROM doctors WHERE id = :id"), {"id": doctor_id}).scalar())
+        values = photo_values(data, sniff_content_type(data) or "application/octet-stream")
+        conn.execute(DoctorPhoto.__table__.insert().values(doctor_id=doctor_id, **values))
+        moved += 1
+    conn.execute(text("ALTER TABLE doctors DROP COLUMN photo"))
+    print(f"Moved {moved} doctor photos to doctor_photos and dropped doctors.photo")
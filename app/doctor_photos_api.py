@@ -0,0 +1,104 @@
+"""Doctor photos (app/doctor_photos.py):
+
+    PUT    /doctors/{id}/photo               raw image body (JPEG, PNG, GIF or WebP)
+    GET    /doctors/{id}/photo[?size=thumb]  image bytes with ETag and Cache-Control; 304 on If-None-Match
+    DELETE /doctors/{id}/photo
+
+The ETag is the stored SHA-256, so a revalidation reads one narrow column and never the image.
+`size=thumb` serves the upload-time thumbnail, or the photo itself when there is none.
+"""
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from . import etags
+from .database import get_db
+from .doctor_photos import PHOTO_MAX_BYTES, photo_values, sniff_content_type
+from .models import Doctor, DoctorPhoto
+from .uploads import parse_content_length
+
+# Browsers may reuse a photo this long before revalidating it
+PHOTO_MAX_AGE = int(os.getenv("PHOTO_MAX_AGE", "3600"))
+PHOTO_CACHE_CONTROL = f"private, max-age={PHOTO_MAX_AGE}"
+
+router = APIRouter(prefix="/doctors", tags=["doctor photos"])
+
+
+def _etag(sha256: str, thumb: bool) -> str:
+    return f'"{sha256}-thumb"' if thumb else f'"{sha256}"'
+
+
+def _photo_out(doctor_id: int, values: dict) -> dict:
+    return {
+        "doctor_id": doctor_id,
+        "content_type": values["content_type"],
+        "size": values["size"],
+        "etag": _etag(values["sha256"], False),
+        "thumbnail": values["thumbnail"] is not None,
+    }
+
+
+def _store(db: Session, doctor_id: int, data: bytes, content_type: str) -> dict:
+    if db.get(Doctor, doctor_id) is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    values = photo_values(data, content_type)
+    # Replace in place without loading the previous image
+    if not db.query(DoctorPhoto).filter(DoctorPhoto.doctor_id == doctor_id).update(values, synchronize_session=False):
+        db.add(DoctorPhoto(doctor_id=doctor_id, **values))
+    db.commit()
+    return _photo_out(doctor_id, values)
+
+
+@router.put("/{doctor_id}/photo")
+async def put_photo(doctor_id: int, request: Request, db: Session = Depends(get_db)):
+    length = parse_content_length(request.headers.get("content-length"))
+    if length is not None and length > PHOTO_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Photo exceeds {PHOTO_MAX_BYTES} bytes")
+    chunks, seen = [], 0
+    async for chunk in request.stream():
+        seen += len(chunk)
+        if seen > PHOTO_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Photo exceeds {PHOTO_MAX_BYTES} bytes")
+        chunks.append(chunk)
+    data = b"".join(chunks)
+    content_type = sniff_content_type(data)
+    if content_type is None:
+        raise HTTPException(status_code=415, detail="Photo must be a JPEG, PNG, GIF or WebP image")
+    return await run_in_threadpool(_store, db, doctor_id, data, content_type)
+
+
+@router.get("/{doctor_id}/photo")
+def get_photo(
+    doctor_id: int,
+    request: Request,
+    size: Optional[str] = Query(None, pattern="^(full|thumb)$"),
+    db: Session = Depends(get_db),
+):
+    thumb = size == "thumb"
+    has_thumb = DoctorPhoto.thumbnail.isnot(None).label("has_thumb")
+    probe = db.execute(
+        select(DoctorPhoto.sha256, DoctorPhoto.content_type, has_thumb).where(DoctorPhoto.doctor_id == doctor_id)
+    ).first()
+    if probe is None:
+        raise HTTPException(status_code=404, detail="No photo for this doctor")
+    thumb = thumb and bool(probe.has_thumb)
+    etag = _etag(probe.sha256, thumb)
+    headers = {"ETag": etag, "Cache-Control": PHOTO_CACHE_CONTROL}
+    if etags.matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    column = DoctorPhoto.thumbnail if thumb else DoctorPhoto.data
+    data = db.execute(select(column).where(DoctorPhoto.doctor_id == doctor_id)).scalar()
+    if data is None:
+        raise HTTPException(status_code=404, detail="No photo for this doctor")
+    return Response(content=bytes(data), media_type=probe.content_type, headers=headers)
+
+
+@router.delete("/{doctor_id}/photo", status_code=204)
+def delete_photo(doctor_id: int, db: Session = Depends(get_db)):
+    deleted = db.query(DoctorPhoto).filter(DoctorPhoto.doctor_id == doctor_id).delete(synchronize_session=False)
+    db.commit()
+    if not deleted:
+        raise HTTPException(status_code=404, detail="No photo for this doctor")
+    return Response(status_code=204)
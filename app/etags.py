@@ -0,0 +1,94 @@
+"""ETags and conditional GET for the generic routers.
+
+Tables with an `updated_at` column (dictations, clinical_documents) get version ETags built
+from `(id, updated_at)`. The router can then compare `If-None-Match` after a probe that selects
+only those columns and answer 304 without loading `final_text`/`fhir_json` or building the
+response model. Other tables get an ETag hashed from the values of the response fields (the
+out schema's fields, the same projection as fast_json), so columns never sent to the client, such as
+`users.password`, neither leak into nor change the validator.
+"""
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+from sqlalchemy import select
+
+# Clients must revalidate, but may keep the body and send If-None-Match
+CACHE_CONTROL = "private, no-cache"
+
+
+def version_column(model):
+    """The column whose value changes on every write, or None if the table has none."""
+    return model.__table__.c.get("updated_at")
+
+
+def _value(row, name):
+    return row.get(name) if isinstance(row, dict) else getattr(row, name, None)
+
+
+def _digest(parts) -> str:
+    # str() keeps tokens stable across the ORM, stored procs and JSON-round-tripped cache entries
+    return hashlib.blake2b("\x1f".join(str(p) for p in parts).encode(), digest_size=12).hexdigest()
+
+
+def response_fields(out_schema) -> tuple:
+    """The field names a row is projected onto in responses."""
+    return tuple(out_schema.__fields__)
+
+
+def _row_parts(model, row, fields) -> list:
+    if version_column(model) is not None:
+        return [_value(row, "id"), _value(row, "updated_at")]
+    return [_value(row, name) for name in fields]
+
+
+def row_etag(model, row, fields=()) -> str:
+    """ETag for one row (ORM object or mapping); weak, since it is not a hash of the response bytes.
+
+    `fields` (see `response_fields`) are hashed for tables without a version column.
+    """
+    return f'W/"{_digest(_row_parts(model, row, fields))}"'
+
+
+def rows_etag(model, rows, fields=()) -> str:
+    parts = [len(rows)]
+    for row in rows:
+        parts.extend(_row_parts(model, row, fields))
+    return f'W/"{_digest(parts)}"'
+
+
+def version_probe(model, stmt=None):
+    """Narrow SELECT of (id, updated_at); `stmt` is an existing query whose criteria are reused."""
+    columns = (model.__table__.c.id, version_column(model))
+    if stmt is None:
+        return select(*columns)
+    return stmt.with_only_columns(*columns)
+
+
+def matches(request: Request, etag: str) -> bool:
+    """True if `If-None-Match` lists `etag` (weak comparison, as RFC 9110 requires for GET)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def respond(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """A 304 if the client already holds `etag`; otherwise tag `response` and return None."""
+    if matches(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
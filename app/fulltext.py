@@ -0,0 +1,153 @@
+"""Full-text search over dictated text (`transcriptions.raw_text`, `clinical_documents.final_text`).
+
+PostgreSQL: a stored generated column `search_vector tsvector` (english configuration) with a GIN
+index, added by `python -m app.bootstrap`. Every write (Save procedures, ORM, bulk, COPY import)
+updates it inside the same statement. Queries use `websearch_to_tsquery` (quotes, `or`, `-word`),
+rank with `ts_rank_cd` and highlight with `ts_headline`.
+
+SQLite: an external-content FTS5 table `<table>_fts` kept in sync by insert/update/delete
+triggers, ranked with `bm25()` and highlighted with `snippet()`.
+
+Ranking happens in an inner query that only reads ids; headlines are built for the returned page
+only, since they re-parse the full text. Pages are keyset-paginated on (rank, id).
+"""
+import base64
+import binascii
+import json
+import re
+from sqlalchemy import and_, column as sql_column, func, literal_column, or_, select, table as sql_table, text
+from .models import ClinicalDocument, Transcription
+from .pagination import scope_filters
+
+# entity -> (model, text column)
+FULLTEXT_TARGETS = {
+    "transcriptions": (Transcription, "raw_text"),
+    "clinical_documents": (ClinicalDocument, "final_text"),
+}
+
+TS_CONFIG = "english"
+HIGHLIGHT_START, HIGHLIGHT_STOP = "<mark>", "</mark>"
+_HEADLINE_OPTIONS = f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxFragments=2, MaxWords=20, MinWords=5"
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def ensure_fulltext(conn):
+    """Create (or repair) the search columns/tables and indexes for every FULLTEXT_TARGETS entry."""
+    for entity, (model, column) in FULLTEXT_TARGETS.items():
+        table = model.__tablename__
+        if conn.dialect.name == "postgresql":
+            # Adding a stored generated column rewrites the table once; later writes maintain it
+            conn.execute(text(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS (to_tsvector('{TS_CONFIG}', coalesce({column}, ''))) STORED"
+            ))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING gin (search_vector)"))
+        elif conn.dialect.name == "sqlite":
+            fts = f"{table}_fts"
+            conn.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column}, content='{table}', content_rowid='id')"
+            )
+            triggers = {
+                "ai": f"AFTER INSERT ON {table} BEGIN "
+                      f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+                "ad": f"AFTER DELETE ON {table} BEGIN "
+                      f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); END",
+                "au": f"AFTER UPDATE OF {column} ON {table} BEGIN "
+                      f"INSERT INTO {fts}({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column}); "
+                      f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END",
+            }
+            for suffix, body in triggers.items():
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+                conn.exec_driver_sql(f"CREATE TRIGGER {fts}_{suffix} {body}")
+            # The triggers keep the index current, so only re-index from the content table when the index
+            # does not cover it: just created over existing rows, or left behind by a dropped and recreated table
+            indexed = conn.exec_driver_sql(f"SELECT count(*) FROM {fts}_docsize").scalar()
+            rows = conn.exec_driver_sql(f"SELECT count(*) FROM {table}").scalar()
+            if indexed != rows:
+                conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def encode_cursor(rank: float, last_id: int) -> str:
+    raw = json.dumps({"rank": rank, "after": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Return `(rank, id)` from a search cursor; raises ValueError for malformed tokens."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        rank, after = float(data["rank"]), data["after"]
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        raise ValueError("Malformed cursor") from e
+    if not isinstance(after, int):
+        raise ValueError("Malformed cursor")
+    return rank, after
+
+
+def _fts5_query(q: str) -> str:
+    # FTS5 query syntax is not meant for end users: match every word, each quoted
+    return " ".join(f'"{word}"' for word in _WORD.findall(q))
+
+
+def search_stmt(dialect: str, entity: str, q: str, filters: list, after=None, limit: int = 20):
+    """SELECT (id, rank, snippet, dictation_id, doctor_id, created_at) for one page, best rank first.
+
+    Returns None when `q` contains nothing searchable.
+    """
+    model, column = FULLTEXT_TARGETS[entity]
+    table = model.__table__
+    if dialect == "postgresql":
+        query = func.websearch_to_tsquery(TS_CONFIG, q)
+        vector = literal_column(f"{table.name}.search_vector")
+        matched = vector.op("@@")(query)
+        rank = func.ts_rank_cd(vector, query)
+        snippet = func.ts_headline(TS_CONFIG, table.c[column], query, _HEADLINE_OPTIONS)
+        source = table
+    else:
+        query = _fts5_query(q)
+        if not query:
+            return None
+        fts = sql_table(f"{table.name}_fts", sql_column("rowid"))
+        fts_ref = literal_column(fts.name)
+        matched = fts_ref.op("MATCH")(query)
+        # bm25() is lower-is-better; negate so both backends sort descending
+        rank = -func.bm25(fts_ref)
+        snippet = func.snippet(fts_ref, 0, HIGHLIGHT_START, HIGHLIGHT_STOP, "…", 16)
+        source = table.join(fts, fts.c.rowid == table.c.id)
+
+    ranked = select(table.c.id, rank.label("rank")).select_from(source).where(matched, *filters).subquery("ranked")
+    page = select(ranked.c.id, ranked.c.rank)
+    if after is not None:
+        after_rank, after_id = after
+        page = page.where(or_(ranked.c.rank < after_rank, and_(ranked.c.rank == after_rank, ranked.c.id < after_id)))
+    page = page.order_by(ranked.c.rank.desc(), ranked.c.id.desc()).limit(limit + 1).subquery("page")
+
+    # Headlines re-read the text, so they are only built for the rows of this page
+    stmt = (
+        select(page.c.id, page.c.rank, snippet.label("snippet"), table.c.dictation_id, table.c.doctor_id, table.c.created_at)
+        .select_from(page.join(table, table.c.id == page.c.id))
+    )
+    if dialect != "postgresql":
+        # snippet() needs its FTS table joined and matched in the same SELECT
+        stmt = stmt.join(fts, fts.c.rowid == table.c.id).where(matched)
+    return stmt.order_by(page.c.rank.desc(), page.c.id.desc())
+
+
+def search(db, entity: str, q: str, hospital_id=None, doctor_id=None, cursor=None, limit: int = 20) -> dict:
+    """One page of ranked, highlighted matches; raises ValueError for bad filters or cursors."""
+    model, _ = FULLTEXT_TARGETS[entity]
+    filters = scope_filters(model, hospital_id, doctor_id)
+    after = decode_cursor(cursor) if cursor else None
+    stmt = search_stmt(db.bind.dialect.name, entity, q, filters, after, limit)
+    if stmt is None:
+        return {"items": [], "next_cursor": None}
+    # Label names come back as sqlalchemy `quoted_name` (a str subclass orjson rejects as a key)
+    rows = [{str(key): value for key, value in row._mapping.items()} for row in db.execute(stmt)]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["rank"], rows[-1]["id"])
+    for row in rows:
+        row["rank"] = round(float(row["rank"]), 6)
+    return {"items": rows, "next_cursor": next_cursor}
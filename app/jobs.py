@@ -0,0 +1,352 @@
+"""Transcription job queue and worker pool.
+
+A dictation is queued for transcription when its audio upload completes (app/audio_api.py), on
+`POST /dictations/{id}/transcription-jobs` (app/jobs_api.py), or in bulk with
+`python -m app.jobs --enqueue-recorded`. The statuses of the dictation and its job move together:
+
+    dictation  recorded -> queued -> transcribing -> transcribed   (or failed, after max_attempts)
+    job                    queued -> running      -> done          (or failed; queued again to retry)
+
+Workers claim jobs from `transcription_jobs` with one UPDATE ... RETURNING. The candidate rows come
+from a `SELECT ... FOR UPDATE SKIP LOCKED` subquery on PostgreSQL, so concurrent workers never wait
+on each other or claim the same job. SQLite has no row locks; there the UPDATE takes the database
+write lock, and its `status = 'queued'` condition keeps the claim exclusive.
+
+The transcriber runs outside any transaction. Its result is written in one transaction: the
+`Transcription` row, the dictation's status, and the job's `done` status. That transaction only
+commits if this worker still holds the claim. A failed attempt is retried after an exponential
+backoff with jitter (JOB_BACKOFF_BASE_SEC, capped at JOB_BACKOFF_MAX_SEC) until `max_attempts`.
+Jobs whose worker died are claimed again once their claim is older than JOB_LEASE_SEC.
+
+    python -m app.jobs                     # JOB_WORKERS processes (default: one per CPU core)
+    python -m app.jobs --workers 4 --once  # exit once the queue is empty
+    python -m app.jobs --enqueue-recorded  # queue every recorded dictation with audio, then exit
+
+The transcriber is `module:callable` (JOB_TRANSCRIBER). It takes a dict describing the dictation
+(`id`, `audio_path`, `language`, `duration_sec`, `hospital_id`, `doctor_id`) and returns
+`{"raw_text", "model_name", "confidence"}`. Each worker process imports it once, so a model loaded
+at import time is loaded once per process. The default, `stub_transcriber`, is deterministic.
+"""
+import argparse
+import hashlib
+import importlib
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from multiprocessing import get_context
+from sqlalchemy import func, insert, literal, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from .database import SessionLocal
+from .models import Dictation, Transcription, TranscriptionJob, utcnow
+from . import text_stats  # registers word_count() for the SQLite triggers
+
+JOB_TRANSCRIBER = os.getenv("JOB_TRANSCRIBER", "app.jobs:stub_transcriber")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "0")) or os.cpu_count() or 1
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_BACKOFF_BASE_SEC = float(os.getenv("JOB_BACKOFF_BASE_SEC", "5"))
+JOB_BACKOFF_MAX_SEC = float(os.getenv("JOB_BACKOFF_MAX_SEC", "600"))
+JOB_LEASE_SEC = float(os.getenv("JOB_LEASE_SEC", "900"))
+JOB_POLL_SEC = float(os.getenv("JOB_POLL_SEC", "1"))
+# Jobs claimed per round trip; 1 spreads work most evenly across workers
+JOB_BATCH = int(os.getenv("JOB_BATCH", "1"))
+# Hash rounds the stub spends per dictation, to stand in for a CPU-bound model (benchmarks)
+STUB_TRANSCRIBER_WORK = int(os.getenv("STUB_TRANSCRIBER_WORK", "0"))
+
+ACTIVE_STATUSES = ("queued", "running")
+_MAX_ERROR_CHARS = 2000
+_STUB_WORDS = "patient reports mild chest pain no fever since two days exam normal advised rest review".split()
+
+
+def job_out(job) -> dict:
+    return {
+        "id": job.id,
+        "dictation_id": job.dictation_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "run_after": job.run_after,
+        "last_error": job.last_error,
+        "transcription_id": job.transcription_id,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+
+def enqueue(db, dictation: Dictation, max_attempts: int = None) -> TranscriptionJob:
+    """Queue a transcription of `dictation` unless one is already queued or running; the caller commits."""
+    existing = db.execute(
+        select(TranscriptionJob).where(
+            TranscriptionJob.dictation_id == dictation.id, TranscriptionJob.status.in_(ACTIVE_STATUSES)
+        )
+    ).scalar_one_or_none()
+    if existing is not None:
+        return existing
+    job = TranscriptionJob(
+        dictation_id=dictation.id, status="queued", attempts=0,
+        max_attempts=max_attempts or JOB_MAX_ATTEMPTS, run_after=utcnow(),
+    )
+    db.add(job)
+    dictation.status = "queued"
+    db.flush()
+    return job
+
+
+def enqueue_recorded(db) -> int:
+    """Queue every `recorded` dictation that has audio and no active job; returns the number queued."""
+    active = select(TranscriptionJob.dictation_id).where(TranscriptionJob.status.in_(ACTIVE_STATUSES))
+    pending = select(
+        Dictation.id, literal("queued"), literal(0), literal(JOB_MAX_ATTEMPTS), literal(utcnow(), TranscriptionJob.run_after.type),
+    ).where(Dictation.status == "recorded", Dictation.audio_path.isnot(None), Dictation.id.not_in(active))
+    queued = db.execute(
+        insert(TranscriptionJob).from_select(["dictation_id", "status", "attempts", "max_attempts", "run_after"], pending)
+    ).rowcount
+    db.execute(
+        update(Dictation)
+        .where(Dictation.status == "recorded", Dictation.id.in_(active))
+        .values(status="queued")
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return queued
+
+
+def retry_delay(attempt: int) -> float:
+    """Seconds before retrying after failed attempt number `attempt`: exponential, capped, with jitter."""
+    delay = min(JOB_BACKOFF_BASE_SEC * 2 ** (attempt - 1), JOB_BACKOFF_MAX_SEC)
+    # Jitter spreads retries of jobs that failed together (e.g. an outage of the model server)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim(db, worker_id: str, limit: int = 1) -> list:
+    """Claim up to `limit` due jobs for `worker_id`; returns rows of (id, dictation_id, attempts, max_attempts)."""
+    now = utcnow()
+    candidates = (
+        select(TranscriptionJob.id)
+        .where(TranscriptionJob.status == "queued", TranscriptionJob.run_after <= now)
+        .order_by(TranscriptionJob.run_after, TranscriptionJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)  # not rendered on SQLite
+    )
+    rows = db.execute(
+        update(TranscriptionJob)
+        .where(TranscriptionJob.id.in_(candidates), TranscriptionJob.status == "queued")
+        .values(status="running", attempts=TranscriptionJob.attempts + 1, locked_by=worker_id, locked_at=now, updated_at=now)
+        .returning(TranscriptionJob.id, TranscriptionJob.dictation_id, TranscriptionJob.attempts, TranscriptionJob.max_attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if rows:
+        db.execute(
+            update(Dictation)
+            .where(Dictation.id.in_([row.dictation_id for row in rows]))
+            .values(status="transcribing")
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    return rows
+
+
+def _release(db, job, worker_id: str, values: dict) -> bool:
+    # Conditional on still holding the claim: after a lost lease another worker owns the job
+    return bool(db.execute(
+        update(TranscriptionJob)
+        .where(TranscriptionJob.id == job.id, TranscriptionJob.status == "running", TranscriptionJob.locked_by == worker_id)
+        .values(locked_by=None, locked_at=None, **values)
+        .execution_options(synchronize_session=False)
+    ).rowcount)
+
+
+def fail(db, job, worker_id: str, error: str) -> str:
+    """Record a failed attempt: queue a retry after a backoff, or fail for good. Returns the new job status."""
+    print(f"Transcription job {job.id} (dictation {job.dictation_id}) attempt {job.attempts}/{job.max_attempts} failed: {error}")
+    final = job.attempts >= job.max_attempts
+    values = {"last_error": error[:_MAX_ERROR_CHARS]}
+    if final:
+        values["status"] = "failed"
+    else:
+        values.update(status="queued", run_after=utcnow() + timedelta(seconds=retry_delay(job.attempts)))
+    if not _release(db, job, worker_id, values):
+        db.rollback()
+        return "lost"
+    dictation = db.get(Dictation, job.dictation_id)
+    if dictation is not None:
+        dictation.status = values["status"]
+    db.commit()
+    return values["status"]
+
+
+def process(db, job, transcriber, worker_id: str) -> str:
+    """Transcribe one claimed job and store the result; returns the job's new status."""
+    dictation = db.get(Dictation, job.dictation_id)
+    if dictation is None:
+        return fail(db, job, worker_id, "Dictation not found")
+    request = {
+        "id": dictation.id, "audio_path": dictation.audio_path, "language": dictation.language,
+        "duration_sec": dictation.duration_sec, "hospital_id": dictation.hospital_id, "doctor_id": dictation.doctor_id,
+    }
+    # No transaction (or snapshot) stays open while the model runs
+    db.rollback()
+    try:
+        result = transcriber(request)
+        raw_text = result["raw_text"]
+    except Exception as e:
+        return fail(db, job, worker_id, f"{type(e).__name__}: {e}")
+    # The dictation may have been deleted while the model ran; a failed write is a failed attempt too
+    try:
+        dictation = db.get(Dictation, request["id"])
+        if dictation is None:
+            error = "Dictation not found"
+        else:
+            transcription = Transcription(
+                dictation_id=request["id"], doctor_id=request["doctor_id"], raw_text=raw_text,
+                model_name=result.get("model_name"), confidence=result.get("confidence"),
+            )
+            db.add(transcription)
+            db.flush()
+            if not _release(db, job, worker_id, {"status": "done", "transcription_id": transcription.id, "last_error": None}):
+                db.rollback()
+                return "lost"
+            dictation.status = "transcribed"
+            db.commit()
+            return "done"
+    except SQLAlchemyError as e:
+        error = f"{type(e).__name__}: {e}"
+    db.rollback()
+    return fail(db, job, worker_id, error)
+
+
+def reclaim_stale(db, lease_sec: float = JOB_LEASE_SEC) -> int:
+    """Return jobs claimed more than `lease_sec` ago (their worker died) to the queue, or fail them if out of attempts."""
+    cutoff = utcnow() - timedelta(seconds=lease_sec)
+    stale = (TranscriptionJob.status == "running", TranscriptionJob.locked_at < cutoff)
+    reclaimed = 0
+    outcomes = (
+        ("failed", TranscriptionJob.attempts >= TranscriptionJob.max_attempts),
+        ("queued", TranscriptionJob.attempts < TranscriptionJob.max_attempts),
+    )
+    for status, condition in outcomes:
+        ids = db.execute(
+            update(TranscriptionJob)
+            .where(*stale, condition)
+            .values(status=status, locked_by=None, locked_at=None, last_error="Claim expired")
+            .returning(TranscriptionJob.dictation_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        if ids:
+            db.execute(
+                update(Dictation).where(Dictation.id.in_(ids)).values(status=status).execution_options(synchronize_session=False)
+            )
+        reclaimed += len(ids)
+    db.commit()
+    return reclaimed
+
+
+def queue_stats(db) -> dict:
+    """Job counts by status and the age of the oldest due queued job."""
+    counts = dict(db.execute(select(TranscriptionJob.status, func.count()).group_by(TranscriptionJob.status)).all())
+    oldest = db.execute(
+        select(func.min(TranscriptionJob.run_after)).where(TranscriptionJob.status == "queued", TranscriptionJob.run_after <= utcnow())
+    ).scalar()
+    stats = {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")}
+    stats["oldest_due"] = oldest
+    return stats
+
+
+def stub_transcriber(dictation: dict) -> dict:
+    """Deterministic stand-in for a speech-to-text model: the same dictation always gives the same text."""
+    digest = hashlib.sha256(f"{dictation['id']}:{dictation.get('audio_path')}".encode()).digest()
+    for _ in range(STUB_TRANSCRIBER_WORK):
+        digest = hashlib.sha256(digest).digest()
+    words = " ".join(_STUB_WORDS[b % len(_STUB_WORDS)] for b in digest[:12])
+    return {"raw_text": f"Dictation {dictation['id']}: {words}.", "model_name": "stub", "confidence": 0.9}
+
+
+def load_transcriber(path: str = JOB_TRANSCRIBER):
+    """The callable named by `module:attribute`."""
+    module_name, _, attr = path.partition(":")
+    if not attr:
+        raise ValueError(f"Transcriber must be 'module:callable', got {path!r}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def run_worker(transcriber=None, worker_id: str = None, batch: int = JOB_BATCH, poll_sec: float = JOB_POLL_SEC,
+               idle_exit: bool = False, stop: threading.Event = None) -> int:
+    """Claim and process jobs until `stop` is set (or the queue is empty, with `idle_exit`); returns jobs processed."""
+    if transcriber is None or isinstance(transcriber, str):
+        transcriber = load_transcriber(transcriber or JOB_TRANSCRIBER)
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    stop = stop or threading.Event()
+    processed, next_reclaim = 0, 0.0
+    with SessionLocal() as db:
+        while not stop.is_set():
+            if time.monotonic() >= next_reclaim:
+                reclaim_stale(db)
+                next_reclaim = time.monotonic() + JOB_LEASE_SEC / 4
+            jobs = claim(db, worker_id, batch)
+            if not jobs:
+                if idle_exit:
+                    break
+                stop.wait(poll_sec)
+                continue
+            for job in jobs:
+                process(db, job, transcriber, worker_id)
+                processed += 1
+    return processed
+
+
+def _pool_worker(index: int, transcriber_path: str, batch: int, idle_exit: bool) -> int:
+    # Runs in a fresh (spawned) process with its own engine and connection pool
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    return run_worker(transcriber_path, worker_id=worker_id, batch=batch, idle_exit=idle_exit, stop=stop)
+
+
+def run_pool(workers: int = JOB_WORKERS, transcriber_path: str = JOB_TRANSCRIBER, batch: int = JOB_BATCH,
+             idle_exit: bool = False) -> int:
+    """Run `workers` worker processes until they stop (SIGINT/SIGTERM, or an empty queue with `idle_exit`)."""
+    load_transcriber(transcriber_path)  # fail here, not once per process
+    # The workers finish their current job on SIGINT/SIGTERM (the whole process group receives it)
+    previous = signal.signal(signal.SIGINT, lambda *_: print("Stopping transcription workers after their current job"))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            futures = [pool.submit(_pool_worker, i, transcriber_path, batch, idle_exit) for i in range(workers)]
+            return sum(f.result() for f in futures)
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+def main(argv=None) -> int:
+    from .bootstrap import SchemaVersionError, verify_schema_version
+
+    parser = argparse.ArgumentParser(prog="python -m app.jobs", description="Run transcription workers")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS)
+    parser.add_argument("--batch", type=int, default=JOB_BATCH)
+    parser.add_argument("--transcriber", default=JOB_TRANSCRIBER)
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    parser.add_argument("--enqueue-recorded", action="store_true", help="queue recorded dictations with audio, then exit")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    try:
+        verify_schema_version()
+    except SchemaVersionError as e:
+        print(e)
+        return 1
+    if args.enqueue_recorded:
+        with SessionLocal() as db:
+            print(f"Queued {enqueue_recorded(db)} dictations")
+        return 0
+    started = time.perf_counter()
+    processed = run_pool(args.workers, args.transcriber, args.batch, args.once)
+    elapsed = time.perf_counter() - started
+    print(f"{args.workers} workers processed {processed} jobs in {elapsed:.1f}s ({processed / elapsed:.1f} jobs/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""Transcription jobs (app/jobs.py):
+
+    POST /dictations/{id}/transcription-jobs   queue a transcription (the active job if one exists)
+    GET  /dictations/{id}/transcription-jobs   every job of a dictation, newest first
+    GET  /transcription-jobs/{job_id}
+    GET  /admin/transcription-jobs             counts by status, oldest due queued job
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from .database import get_db
+from .jobs import ACTIVE_STATUSES, enqueue, job_out, queue_stats
+from .models import Dictation, TranscriptionJob
+
+router = APIRouter(tags=["transcription jobs"])
+
+
+@router.post("/dictations/{dictation_id}/transcription-jobs", status_code=202)
+def create_job(dictation_id: int, db: Session = Depends(get_db)):
+    dictation = db.get(Dictation, dictation_id)
+    if dictation is None:
+        raise HTTPException(status_code=404, detail="Dictation not found")
+    if not dictation.audio_path:
+        raise HTTPException(status_code=409, detail="Dictation has no audio")
+    try:
+        job = enqueue(db, dictation)
+        db.commit()
+    except IntegrityError:
+        # A concurrent request queued it first (one active job per dictation)
+        db.rollback()
+        job = db.execute(
+            select(TranscriptionJob).where(TranscriptionJob.dictation_id == dictation_id, TranscriptionJob.status.in_(ACTIVE_STATUSES))
+        ).scalar_one()
+    return job_out(job)
+
+
+@router.get("/dictations/{dictation_id}/transcription-jobs")
+def list_dictation_jobs(dictation_id: int, db: Session = Depends(get_db)):
+    jobs = db.execute(
+        select(TranscriptionJob).where(TranscriptionJob.dictation_id == dictation_id).order_by(TranscriptionJob.id.desc())
+    ).scalars()
+    return [job_out(job) for job in jobs]
+
+
+@router.get("/transcription-jobs/{job_id}")
+def get_job(job_id: int, db: Session = Depends(get_db)):
+    job = db.get(TranscriptionJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Transcription job not found")
+    return job_out(job)
+
+
+@router.get("/admin/transcription-jobs")
+def transcription_job_stats(db: Session = Depends(get_db)):
+    return queue_stats(db)
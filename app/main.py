@@ -1,25 +1,135 @@
+import time
+
+_import_started = time.perf_counter()
+
+import os
 from fastapi import FastAPI
 from . import models, schemas
-from .database import engine
+from .audio_api import router as audio_router
+from .bootstrap import verify_schema_version
+from .cache import caches, entity_cache
+from .database import async_pool_snapshot, engine, pool_metrics
+from .doctor_photos_api import router as doctor_photos_router
+from .jobs_api import router as jobs_router
+from .proc_registry import proc_registry
 from .router_factory import create_crud_router
+from .search_api import router as search_router
+from .snomed import reload_concept_index
+from .snomed_search import reload_search_index
+from .snomed_api import router as snomed_concepts_router
+from .stats_api import router as stats_router
+from .vocab import vocab_matchers
+from .vocab_api import router as vocab_router
 
-# create tables automatically (no migrations requested)
-models.Base.metadata.create_all(bind=engine)
+# Tables, indexes and stored procs are provisioned by `python -m app.bootstrap`, not on import
 
 app = FastAPI(title="Entity API")
 
+# ASYNC_CRUD=true serves the generic routers from the async engine (asyncpg/aiosqlite)
+ASYNC_CRUD = os.getenv("ASYNC_CRUD", "false").strip().lower() in ("1", "true", "yes", "on")
+
+# Per-worker startup timings, filled by the startup event (GET /admin/startup)
+startup_stats = {}
+
+
+@app.on_event("startup")
+def startup_checks():
+    started = time.perf_counter()
+    # Fails fast if the database was not bootstrapped at this code's SCHEMA_VERSION
+    version = verify_schema_version(engine)
+    # Fill the stored-procedure registry once so requests never hit pg_proc
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            proc_registry.refresh(conn)
+    ready = time.perf_counter()
+    startup_stats.update(
+        pid=os.getpid(),
+        schema_version=version,
+        import_ms=round((_app_built - _import_started) * 1000, 3),
+        checks_ms=round((ready - started) * 1000, 3),
+        total_ms=round((ready - _import_started) * 1000, 3),
+    )
+    print(f"Worker {startup_stats['pid']} ready in {startup_stats['total_ms']:.0f} ms "
+          f"(import {startup_stats['import_ms']:.0f} ms, checks {startup_stats['checks_ms']:.0f} ms)")
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+
+@app.get("/admin/db-pool")
+def db_pool_stats():
+    # Checkout wait and saturation, for sizing uvicorn workers against max_connections
+    stats = pool_metrics.snapshot(engine.pool)
+    stats["async"] = async_pool_snapshot()
+    return stats
+
+
+@app.get("/admin/startup")
+def startup_timings():
+    return startup_stats
+
+
+@app.get("/admin/cache")
+def cache_stats():
+    # Read-through caches of the reference entities, by entity name
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+@app.get("/admin/stored-procs")
+def stored_procs_stats():
+    return proc_registry.stats()
+
+
+@app.post("/admin/stored-procs/refresh")
+def refresh_stored_procs():
+    # Call after Scripts/StoredProc/install_stored_procs.py to pick up new procedures immediately
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            proc_registry.refresh(conn)
+    else:
+        proc_registry.invalidate()
+    return proc_registry.stats()
+
+
+@app.post("/admin/snomed/reload")
+def reload_snomed():
+    # Call after Scripts/Snomed/load_rf2.py to serve the new release without a restart
+    return {"concepts": len(reload_concept_index()), "descriptions": len(reload_search_index())}
+
+
+# SNOMED CT dictionary lookups (in-process index, no database round trip)
+app.include_router(snomed_concepts_router)
+
+# Full-text search over transcriptions / clinical documents
+app.include_router(search_router)
+
+# Dashboard aggregates (transcription_daily_stats rollup)
+app.include_router(stats_router)
+
+# Dictation audio upload/playback (app/audio_storage.py backends)
+app.include_router(audio_router)
+
+# Doctor photos (doctor_photos table, off the doctors row)
+app.include_router(doctor_photos_router)
+
+# Transcription job queue (workers: python -m app.jobs)
+app.include_router(jobs_router)
+
+# Compiled per-doctor vocabularies (tag a text with a doctor's custom_vocab)
+app.include_router(vocab_router)
+
 # Register routers for entities using the generic CRUD factory
-# Example: hospitals
+# Example: hospitals (hospitals, departments and doctors are reference data: cached reads)
 hospitals_router = create_crud_router(
     model=models.Hospital,
     create_schema=schemas.HospitalCreate,
     update_schema=schemas.HospitalUpdate,
     out_schema=schemas.HospitalOut,
     prefix="hospitals",
+    async_=ASYNC_CRUD,
+    cache=entity_cache("hospitals"),
 )
 app.include_router(hospitals_router)
 
@@ -30,6 +140,7 @@ users_router = create_crud_router(
     update_schema=schemas.UserUpdate,
     out_schema=schemas.UserOut,
     prefix="users",
+    async_=ASYNC_CRUD,
 )
 app.include_router(users_router)
 
@@ -40,6 +151,8 @@ departments_router = create_crud_router(
     update_schema=schemas.DepartmentUpdate,
     out_schema=schemas.DepartmentOut,
     prefix="departments",
+    async_=ASYNC_CRUD,
+    cache=entity_cache("departments"),
 )
 app.include_router(departments_router)
 
@@ -51,6 +164,10 @@ doctors_router = create_crud_router(
     update_schema=schemas.DoctorUpdate,
     out_schema=schemas.DoctorOut,
     prefix="doctors",
+    async_=ASYNC_CRUD,
+    cache=entity_cache("doctors"),
+    # Edits to custom_vocab drop the doctor's compiled vocabulary (vocab_version catches other writers)
+    on_write=vocab_matchers().on_doctor_write,
 )
 app.include_router(doctors_router)
 
@@ -61,6 +178,7 @@ patients_router = create_crud_router(
     update_schema=schemas.PatientUpdate,
     out_schema=schemas.PatientOut,
     prefix="patients",
+    async_=ASYNC_CRUD,
 )
 app.include_router(patients_router)
 
@@ -71,16 +189,20 @@ encounters_router = create_crud_router(
     update_schema=schemas.EncounterUpdate,
     out_schema=schemas.EncounterOut,
     prefix="encounters",
+    async_=ASYNC_CRUD,
 )
 app.include_router(encounters_router)
 
-# Dictations
+# Dictations (this and the clinical entities below return large pages: fast_json skips
+# per-row response validation)
 dictations_router = create_crud_router(
     model=models.Dictation,
     create_schema=schemas.DictationCreate,
     update_schema=schemas.DictationUpdate,
     out_schema=schemas.DictationOut,
     prefix="dictations",
+    async_=ASYNC_CRUD,
+    fast_json=True,
 )
 app.include_router(dictations_router)
 
@@ -91,6 +213,8 @@ transcriptions_router = create_crud_router(
     update_schema=schemas.TranscriptionUpdate,
     out_schema=schemas.TranscriptionOut,
     prefix="transcriptions",
+    async_=ASYNC_CRUD,
+    fast_json=True,
 )
 app.include_router(transcriptions_router)
 
@@ -101,6 +225,8 @@ snomed_router = create_crud_router(
     update_schema=schemas.SNOMEDAnnotationUpdate,
     out_schema=schemas.SNOMEDAnnotationOut,
     prefix="snomed_annotations",
+    async_=ASYNC_CRUD,
+    fast_json=True,
 )
 app.include_router(snomed_router)
 
@@ -111,8 +237,11 @@ clinical_documents_router = create_crud_router(
     update_schema=schemas.ClinicalDocumentUpdate,
     out_schema=schemas.ClinicalDocumentOut,
     prefix="clinical_documents",
+    async_=ASYNC_CRUD,
+    fast_json=True,
 )
 app.include_router(clinical_documents_router)
 
 # To add another entity in future, create model + schemas and register with create_crud_router
 
+_app_built = time.perf_counter()
@@ -1,13 +1,31 @@
-from sqlalchemy import Column, BigInteger, String, Text, Boolean, TIMESTAMP, func, ForeignKey, Integer, Date, Numeric
+from sqlalchemy import Column, BigInteger, String, Text, Boolean, TIMESTAMP, func, ForeignKey, Integer, Date, Numeric, Index, text, JSON, LargeBinary
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy.dialects.postgresql import JSONB, BYTEA
+from datetime import datetime, timezone
 
 Base = declarative_base()
 
+# PostgreSQL types with SQLite fallbacks so `python -m app.bootstrap` also provisions the
+# default local database. SQLite only auto-assigns ids for INTEGER PRIMARY KEY columns.
+BigIntPK = BigInteger().with_variant(Integer, "sqlite")
+JSONBType = JSONB().with_variant(JSON, "sqlite")
+BYTEAType = BYTEA().with_variant(LargeBinary, "sqlite")
+
+
+def utcnow():
+    # Client-side timestamp: microsecond resolution on every backend (SQLite's now() has seconds)
+    return datetime.now(timezone.utc)
+
+
+# Indexing strategy: every FK used for lookups or cascades gets an index (index=True for
+# single columns, named Index() in __table_args__ for composites). Tenant-scoped lists page
+# with `WHERE hospital_id = ? AND id > ? ORDER BY id`, so those tables index (hospital_id, id);
+# time-ordered worklists use (hospital_id, created_at). tests/test_indexes.py guards these paths.
+
 class Hospital(Base):
     __tablename__ = "hospitals"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntPK, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
     code = Column(String(20), unique=True, index=True)
     address = Column(Text)
@@ -28,8 +46,11 @@ class Hospital(Base):
 
 class Department(Base):
     __tablename__ = "departments"
+    __table_args__ = (
+        Index("ix_departments_hospital_id_id", "hospital_id", "id"),
+    )
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntPK, primary_key=True, index=True)
     hospital_id = Column(BigInteger, ForeignKey("hospitals.id"), nullable=False)
     name = Column(String(100), nullable=False)
     code = Column(String(20))
@@ -48,7 +69,7 @@ class Department(Base):
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntPK, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
     email = Column(String(200), unique=True, index=True)
     phone = Column(String(20))
@@ -61,10 +82,20 @@ class User(Base):
 
 class Doctor(Base):
     __tablename__ = "doctors"
-
-    id = Column(BigInteger, primary_key=True, index=True)
+    __table_args__ = (
+        Index("ix_doctors_hospital_id_id", "hospital_id", "id"),
+        # Active doctors of a hospital (rosters, pickers); inactive rows stay out of the index
+        Index(
+            "ix_doctors_hospital_id_active",
+            "hospital_id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
+
+    id = Column(BigIntPK, primary_key=True, index=True)
     hospital_id = Column(BigInteger, ForeignKey("hospitals.id"), nullable=False)
-    department_id = Column(BigInteger, ForeignKey("departments.id"), nullable=True)
+    department_id = Column(BigInteger, ForeignKey("departments.id"), nullable=True, index=True)
     abha_professional_id = Column(String(64))
     first_name = Column(String(100))
     last_name = Column(String(100))
@@ -72,22 +103,40 @@ class Doctor(Base):
     phone = Column(String(20))
     license_number = Column(String(50))
     specialty = Column(String(100))
-    custom_vocab = Column(JSONB)
+    custom_vocab = Column(JSONBType)
+    # Bumped by a trigger whenever custom_vocab changes (app/vocab.py); keys compiled vocabularies
+    vocab_version = Column(Integer, nullable=False, default=0, server_default="0")
     is_active = Column(Boolean, default=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
-    userid = Column(BigInteger, ForeignKey("users.id"), nullable=False)
-    photo = Column(BYTEA)
+    userid = Column(BigInteger, ForeignKey("users.id"), nullable=False, index=True)
 
     # Relationships
     hospital = relationship("Hospital", back_populates="doctors")
     department = relationship("Department", back_populates="doctors")
 
 
+class DoctorPhoto(Base):
+    """A doctor's photo, kept off the `doctors` row; see app/doctor_photos.py."""
+    __tablename__ = "doctor_photos"
+
+    doctor_id = Column(BigInteger, ForeignKey("doctors.id", ondelete="CASCADE"), primary_key=True)
+    content_type = Column(String(100), nullable=False)
+    size = Column(Integer, nullable=False)
+    # Hex SHA-256 of `data`, the ETag; conditional GETs compare it without reading the image
+    sha256 = Column(String(64), nullable=False)
+    data = Column(BYTEAType, nullable=False)
+    thumbnail = Column(BYTEAType)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=utcnow)
+
+
 # --- New clinical models ---
 class Patient(Base):
     __tablename__ = "patients"
+    __table_args__ = (
+        Index("ix_patients_hospital_id_id", "hospital_id", "id"),
+    )
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntPK, primary_key=True, index=True)
     hospital_id = Column(BigInteger, ForeignKey("hospitals.id"))
     external_id = Column(String(64))
     first_name = Column(String(100))
@@ -104,14 +153,19 @@ class Patient(Base):
 
 class Encounter(Base):
     __tablename__ = "encounters"
+    __table_args__ = (
+        Index("ix_encounters_hospital_id_id", "hospital_id", "id"),
+        Index("ix_encounters_hospital_id_created_at", "hospital_id", "created_at"),
+        Index("ix_encounters_doctor_id_id", "doctor_id", "id"),
+    )
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntPK, primary_key=True, index=True)
     hospital_id = Column(BigInteger, ForeignKey("hospitals.id"), nullable=False)
-    patient_id = Column(BigInteger, ForeignKey("patients.id"), nullable=False)
+    patient_id = Column(BigInteger, ForeignKey("patients.id"), nullable=False, index=True)
     doctor_id = Column(BigInteger, ForeignKey("doctors.id"))
     external_id = Column(String(64))
     encounter_type = Column(String(50))
-    department_id = Column(BigInteger, ForeignKey("departments.id"))
+    department_id = Column(BigInteger, ForeignKey("departments.id"), index=True)
     started_at = Column(TIMESTAMP(timezone=True))
     ended_at = Column(TIMESTAMP(timezone=True))
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
@@ -125,20 +179,26 @@ class Encounter(Base):
 
 class Dictation(Base):
     __tablename__ = "dictations"
+    __table_args__ = (
+        Index("ix_dictations_hospital_id_id", "hospital_id", "id"),
+        Index("ix_dictations_hospital_id_created_at", "hospital_id", "created_at"),
+        Index("ix_dictations_doctor_id_id", "doctor_id", "id"),
+    )
 
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntPK, primary_key=True, index=True)
     hospital_id = Column(BigInteger, ForeignKey("hospitals.id"), nullable=False)
-    department_id = Column(BigInteger, ForeignKey("departments.id"), nullable=False)
+    department_id = Column(BigInteger, ForeignKey("departments.id"), nullable=False, index=True)
     doctor_id = Column(BigInteger, ForeignKey("doctors.id"), nullable=False)
-    patient_id = Column(BigInteger, ForeignKey("patients.id"))
-    encounter_id = Column(BigInteger, ForeignKey("encounters.id"))
+    patient_id = Column(BigInteger, ForeignKey("patients.id"), index=True)
+    encounter_id = Column(BigInteger, ForeignKey("encounters.id"), index=True)
     dictation_number = Column(String(50), unique=True)
     language = Column(String(10), default="en-IN")
     status = Column(String(20), nullable=False)
     audio_path = Column(Text)
     duration_sec = Column(Integer)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
-    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    # Bumped on every write; conditional GETs derive their ETag from (id, updated_at)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=utcnow)
 
     hospital = relationship("Hospital", back_populates="dictations")
     department = relationship("Department", back_populates="dictations")
@@ -150,16 +210,78 @@ class Dictation(Base):
     clinical_documents = relationship("ClinicalDocument", back_populates="dictation")
 
 
+class AudioUpload(Base):
+    """An in-progress (resumable) audio upload for a dictation; see app/audio_api.py."""
+    __tablename__ = "audio_uploads"
+
+    id = Column(String(32), primary_key=True)
+    dictation_id = Column(BigInteger, ForeignKey("dictations.id", ondelete="CASCADE"), nullable=False, index=True)
+    storage_key = Column(Text, nullable=False)
+    # Backend handle for the partial object (local part file name / S3 multipart upload id)
+    storage_ref = Column(Text, nullable=False)
+    content_type = Column(String(100))
+    total_size = Column(BigInteger)
+    # Bytes received so far; a chunk must start exactly here
+    received = Column(BigInteger, nullable=False, default=0)
+    parts = Column(JSONBType)
+    status = Column(String(20), nullable=False, default="open")
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=utcnow)
+
+
+class TranscriptionJob(Base):
+    """A queued request to transcribe a dictation's audio; claimed by app/jobs.py workers."""
+    __tablename__ = "transcription_jobs"
+    __table_args__ = (
+        # Claim order; finished jobs stay out of the index
+        Index(
+            "ix_transcription_jobs_claim",
+            "run_after", "id",
+            postgresql_where=text("status = 'queued'"),
+            sqlite_where=text("status = 'queued'"),
+        ),
+        # At most one queued or running job per dictation
+        Index(
+            "ux_transcription_jobs_dictation_active",
+            "dictation_id",
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    id = Column(BigIntPK, primary_key=True, index=True)
+    dictation_id = Column(BigInteger, ForeignKey("dictations.id", ondelete="CASCADE"), nullable=False, index=True)
+    # queued -> running -> done | failed (back to queued, later, after a failed attempt)
+    status = Column(String(20), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    # Not claimable before this time (retry backoff)
+    run_after = Column(TIMESTAMP(timezone=True), nullable=False, default=utcnow)
+    # Claiming worker and claim time; a running job whose claim is older than the lease is reclaimed
+    locked_by = Column(String(100))
+    locked_at = Column(TIMESTAMP(timezone=True))
+    last_error = Column(Text)
+    transcription_id = Column(BigInteger, ForeignKey("transcriptions.id", ondelete="SET NULL"))
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=utcnow)
+
+
 class Transcription(Base):
     __tablename__ = "transcriptions"
+    __table_args__ = (
+        Index("ix_transcriptions_doctor_id_id", "doctor_id", "id"),
+    )
 
-    id = Column(BigInteger, primary_key=True, index=True)
-    dictation_id = Column(BigInteger, ForeignKey("dictations.id", ondelete="CASCADE"), nullable=False)
+    id = Column(BigIntPK, primary_key=True, index=True)
+    dictation_id = Column(BigInteger, ForeignKey("dictations.id", ondelete="CASCADE"), nullable=False, index=True)
     doctor_id = Column(BigInteger, ForeignKey("doctors.id"), nullable=False)
     raw_text = Column(Text, nullable=False)
     model_name = Column(String(100))
     confidence = Column(Numeric(4,3))
+    # Derived from raw_text by database triggers on every write (app/text_stats.py)
     word_count = Column(Integer)
+    char_count = Column(Integer)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
     dictation = relationship("Dictation", back_populates="transcriptions")
@@ -168,19 +290,22 @@ class Transcription(Base):
 
 class SNOMEDAnnotation(Base):
     __tablename__ = "snomed_annotations"
+    __table_args__ = (
+        Index("ix_snomed_annotations_doctor_id_id", "doctor_id", "id"),
+    )
 
-    id = Column(BigInteger, primary_key=True, index=True)
-    dictation_id = Column(BigInteger, ForeignKey("dictations.id", ondelete="CASCADE"), nullable=False)
+    id = Column(BigIntPK, primary_key=True, index=True)
+    dictation_id = Column(BigInteger, ForeignKey("dictations.id", ondelete="CASCADE"), nullable=False, index=True)
     doctor_id = Column(BigInteger, ForeignKey("doctors.id"), nullable=False)
-    transcription_id = Column(BigInteger, ForeignKey("transcriptions.id"))
-    snomed_concept_id = Column(BigInteger, nullable=False)
+    transcription_id = Column(BigInteger, ForeignKey("transcriptions.id"), index=True)
+    snomed_concept_id = Column(BigInteger, nullable=False, index=True)
     term = Column(Text, nullable=False)
     category = Column(String(50))
     start_char = Column(Integer)
     end_char = Column(Integer)
     confidence = Column(Numeric(4,3))
     model_used = Column(String(50))
-    extra = Column(JSONB)
+    extra = Column(JSONBType)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
     dictation = relationship("Dictation", back_populates="snomed_annotations")
@@ -190,24 +315,30 @@ class SNOMEDAnnotation(Base):
 
 class ClinicalDocument(Base):
     __tablename__ = "clinical_documents"
-
-    id = Column(BigInteger, primary_key=True, index=True)
-    dictation_id = Column(BigInteger, ForeignKey("dictations.id", ondelete="CASCADE"), nullable=False)
+    __table_args__ = (
+        Index("ix_clinical_documents_hospital_id_id", "hospital_id", "id"),
+        Index("ix_clinical_documents_hospital_id_created_at", "hospital_id", "created_at"),
+        Index("ix_clinical_documents_doctor_id_id", "doctor_id", "id"),
+    )
+
+    id = Column(BigIntPK, primary_key=True, index=True)
+    dictation_id = Column(BigInteger, ForeignKey("dictations.id", ondelete="CASCADE"), nullable=False, index=True)
     hospital_id = Column(BigInteger, ForeignKey("hospitals.id"), nullable=False)
-    department_id = Column(BigInteger, ForeignKey("departments.id"), nullable=False)
+    department_id = Column(BigInteger, ForeignKey("departments.id"), nullable=False, index=True)
     doctor_id = Column(BigInteger, ForeignKey("doctors.id"), nullable=False)
-    patient_id = Column(BigInteger, ForeignKey("patients.id"), nullable=False)
-    encounter_id = Column(BigInteger, ForeignKey("encounters.id"))
+    patient_id = Column(BigInteger, ForeignKey("patients.id"), nullable=False, index=True)
+    encounter_id = Column(BigInteger, ForeignKey("encounters.id"), index=True)
     document_type = Column(String(50))
     version = Column(Integer, default=1)
     status = Column(String(20), nullable=False)
     final_text = Column(Text, nullable=False)
     fhir_resource_type = Column(String(50))
-    fhir_json = Column(JSONB)
+    fhir_json = Column(JSONBType)
     doctor_signature = Column(Text)
     signed_at = Column(TIMESTAMP(timezone=True))
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
-    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    # Bumped on every write; conditional GETs derive their ETag from (id, updated_at)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=utcnow)
 
     dictation = relationship("Dictation", back_populates="clinical_documents")
     hospital = relationship("Hospital", back_populates="clinical_documents")
@@ -215,3 +346,74 @@ class ClinicalDocument(Base):
     doctor = relationship("Doctor")
     patient = relationship("Patient", back_populates="clinical_documents")
 
+
+# SNOMED CT dictionary, loaded from an RF2 snapshot by Scripts/Snomed/load_rf2.py (app/snomed.py).
+# Only active components are kept; ids are SCTIDs, not generated.
+class SnomedConcept(Base):
+    __tablename__ = "snomed_concepts"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    fsn = Column(Text, nullable=False)
+    # Preferred synonym in the configured language reference set
+    preferred_term = Column(Text, nullable=False)
+
+
+class SnomedDescription(Base):
+    __tablename__ = "snomed_descriptions"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=False)
+    concept_id = Column(BigInteger, ForeignKey("snomed_concepts.id", ondelete="CASCADE"), nullable=False, index=True)
+    term = Column(Text, nullable=False)
+    type_id = Column(BigInteger, nullable=False)
+    preferred = Column(Boolean, nullable=False, default=False)
+
+
+class SnomedIsA(Base):
+    """Active |is a| (116680003) relationships: source is a child of destination."""
+    __tablename__ = "snomed_is_a"
+
+    source_id = Column(BigInteger, ForeignKey("snomed_concepts.id", ondelete="CASCADE"), primary_key=True)
+    destination_id = Column(BigInteger, ForeignKey("snomed_concepts.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+
+class SnomedClosure(Base):
+    """Transitive closure of snomed_is_a, one row per (ancestor, descendant) pair including each
+    concept with itself. Rebuilt by `app.snomed.build_closure()` after every RF2 load; hierarchy
+    filters (`descendant_of`) become a range scan on the primary key."""
+    __tablename__ = "snomed_closure"
+
+    ancestor_id = Column(BigInteger, ForeignKey("snomed_concepts.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(BigInteger, ForeignKey("snomed_concepts.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+
+class TranscriptionDailyStats(Base):
+    """Per-doctor, per-day (UTC) transcription totals, maintained by triggers (app/text_stats.py)."""
+    __tablename__ = "transcription_daily_stats"
+    __table_args__ = (
+        Index("ix_transcription_daily_stats_day", "day"),
+    )
+
+    doctor_id = Column(BigInteger, ForeignKey("doctors.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    transcriptions = Column(Integer, nullable=False, server_default=text("0"))
+    words = Column(BigInteger, nullable=False, server_default=text("0"))
+    chars = Column(BigInteger, nullable=False, server_default=text("0"))
+    annotations = Column(Integer, nullable=False, server_default=text("0"))
+
+
+class PipelineCursor(Base):
+    """How far a batch pipeline stage has read its input table, by id (e.g. app/tagger.py)."""
+    __tablename__ = "pipeline_cursors"
+
+    stage = Column(String(50), primary_key=True)
+    last_id = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=utcnow)
+
+
+class SchemaVersion(Base):
+    """Single-row record of the schema provisioned by `python -m app.bootstrap`."""
+    __tablename__ = "schema_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    applied_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
@@ -0,0 +1,91 @@
+"""Keyset (cursor) pagination and tenant scoping shared by the generic list endpoints.
+
+Cursors are opaque to clients: a urlsafe base64 token carrying the last `id` seen.
+Pages are read with `WHERE id > :after ORDER BY id LIMIT n`, so the cost of a page is
+independent of how deep into the table it is (unlike OFFSET).
+"""
+import base64
+import binascii
+import json
+from typing import List, Optional
+from pydantic import create_model
+from sqlalchemy import select
+from .models import Dictation, SNOMEDAnnotation, SnomedClosure
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"after": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Return the last id encoded in `cursor`; raises ValueError for malformed tokens."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded.encode()))["after"]
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if not isinstance(after, int):
+        raise ValueError("Malformed cursor")
+    return after
+
+
+def scope_filters(model, hospital_id: Optional[int] = None, doctor_id: Optional[int] = None, descendant_of: Optional[int] = None) -> list:
+    """SQL filter clauses restricting `model` rows to a hospital and/or doctor.
+
+    Entities without a `hospital_id` column (transcriptions, snomed_annotations) are
+    scoped through their dictation. `descendant_of` keeps annotations (or dictations with an
+    annotation) whose concept is that SNOMED concept or one of its descendants, via the
+    precomputed `snomed_closure` table: an index range scan instead of a recursive query.
+    Raises ValueError when a filter does not apply.
+    """
+    clauses = []
+    columns = model.__table__.columns
+    if hospital_id is not None:
+        if "hospital_id" in columns:
+            clauses.append(model.hospital_id == hospital_id)
+        elif "dictation_id" in columns:
+            clauses.append(model.dictation_id.in_(select(Dictation.id).where(Dictation.hospital_id == hospital_id)))
+        else:
+            raise ValueError(f"{model.__name__} cannot be filtered by hospital_id")
+    if doctor_id is not None:
+        if "doctor_id" not in columns:
+            raise ValueError(f"{model.__name__} cannot be filtered by doctor_id")
+        clauses.append(model.doctor_id == doctor_id)
+    if descendant_of is not None:
+        concepts = select(SnomedClosure.descendant_id).where(SnomedClosure.ancestor_id == descendant_of)
+        if "snomed_concept_id" in columns:
+            clauses.append(model.snomed_concept_id.in_(concepts))
+        elif model is Dictation:
+            clauses.append(model.id.in_(select(SNOMEDAnnotation.dictation_id).where(SNOMEDAnnotation.snomed_concept_id.in_(concepts))))
+        else:
+            raise ValueError(f"{model.__name__} cannot be filtered by descendant_of")
+    return clauses
+
+
+def page_schema(out_schema):
+    """Build the `{items, next_cursor}` response model for an entity's out schema."""
+    name = out_schema.__name__
+    if name.endswith("Out"):
+        name = name[:-3]
+    return create_model(
+        f"{name}Page",
+        items=(List[out_schema], ...),
+        next_cursor=(Optional[str], None),
+    )
+
+
+def keyset_stmt(model, filters: list, after: Optional[int], limit: int):
+    """SELECT for the page following id `after`; fetches one extra row to detect the end."""
+    stmt = select(model).where(*filters)
+    if after is not None:
+        stmt = stmt.where(model.id > after)
+    return stmt.order_by(model.id).limit(limit + 1)
+
+
+def finish_page(rows: list, limit: int):
+    """Trim the look-ahead row from a `keyset_stmt` result; return `(rows, next_cursor)`."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].id)
+    return rows, None
@@ -0,0 +1,94 @@
+"""Process-wide registry of the stored procedures available in the database.
+
+The generic CRUD router asks this registry whether `Save{Entity}` / `Get{Entity}`
+exist instead of querying `pg_catalog.pg_proc` before every statement. The
+catalog is read once (at startup or lazily on first use) and re-read when the
+TTL expires or `refresh()` / `invalidate()` is called, e.g. after
+`Scripts/StoredProc/install_stored_procs.py` has been run.
+"""
+import os
+import re
+import threading
+import time
+from sqlalchemy import text
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# All user-defined functions in one round trip; system schemas are skipped
+_LOAD_PROCS_SQL = text(
+    "SELECT DISTINCT p.proname FROM pg_catalog.pg_proc p "
+    "JOIN pg_catalog.pg_namespace n ON n.oid = p.pronamespace "
+    "WHERE n.nspname NOT IN ('pg_catalog', 'information_schema')"
+)
+
+
+class ProcRegistry:
+    """In-memory set of stored-procedure names with TTL-based refresh and counters."""
+
+    def __init__(self, ttl: float = 300.0):
+        # ttl <= 0 disables expiry: the catalog is only re-read on explicit refresh
+        self.ttl = ttl
+        self._names = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _is_stale(self, names) -> bool:
+        if names is None:
+            return True
+        return self.ttl > 0 and (time.monotonic() - self._loaded_at) > self.ttl
+
+    def refresh(self, conn) -> frozenset:
+        """Reload procedure names from pg_proc using `conn` (Connection or Session)."""
+        names = frozenset(row[0] for row in conn.execute(_LOAD_PROCS_SQL))
+        with self._lock:
+            self._names = names
+            self._loaded_at = time.monotonic()
+            self.refreshes += 1
+        return names
+
+    def invalidate(self):
+        """Drop the cached names so the next lookup reloads them from the catalog."""
+        with self._lock:
+            self._names = None
+
+    def _cached_names(self):
+        """Names still within TTL (counted as a hit), or None when a reload is due (a miss)."""
+        names = self._names
+        with self._lock:
+            if self._is_stale(names):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return names
+
+    def exists(self, conn, proc_name: str) -> bool:
+        """Return True if a function named `proc_name` exists.
+
+        Only simple identifiers are accepted. `conn` is only used when the
+        registry is empty or stale; otherwise the answer comes from memory.
+        """
+        if not _IDENTIFIER.match(proc_name):
+            return False
+        names = self._cached_names()
+        if names is None:
+            names = self.refresh(conn)
+        # Postgres stores unquoted identifiers in lowercase
+        return proc_name.lower() in names
+
+    def stats(self) -> dict:
+        names = self._names
+        return {
+            "loaded": names is not None,
+            "procedures": len(names) if names is not None else 0,
+            "age_seconds": round(time.monotonic() - self._loaded_at, 3) if names is not None else None,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+        }
+
+
+proc_registry = ProcRegistry(ttl=float(os.getenv("PROC_REGISTRY_TTL", "300")))
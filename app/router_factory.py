@@ -1,10 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import time
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from sqlalchemy import text
-from typing import Type, TypeVar
+from datetime import datetime
+from typing import Optional, Type, TypeVar
 from pydantic import BaseModel
-from .database import get_db
+from .database import engine, get_db
+from .proc_registry import proc_registry
+from .crud_plans import EntityPlan
+from .bulk import BULK_MAX_ROWS, parse_bulk_body, summarize, validate_rows, write_rows
+from .pagination import decode_cursor, finish_page, keyset_stmt, page_schema, scope_filters
+from .schemas import BulkResult
+from . import etags
+from .fast_json import RowEncoder
+from .export import ExportFormatter, export_stmt, stream_export
 
 ModelType = TypeVar("ModelType")
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -12,112 +24,84 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 OutSchemaType = TypeVar("OutSchemaType", bound=BaseModel)
 
 
-def create_crud_router(
-    model: Type[ModelType],
-    create_schema: Type[CreateSchemaType],
-    update_schema: Type[UpdateSchemaType],
-    out_schema: Type[OutSchemaType],
-    prefix: str,
-):
-    """Create an APIRouter providing CRUD endpoints for the given SQLAlchemy model.
+class CrudHandlers:
+    """Endpoint logic of the generic CRUD router, written against a sync `Session`.
 
-    - `model`: SQLAlchemy declarative model class
-    - `create_schema`: Pydantic schema for POST body
-    - `update_schema`: Pydantic schema for PUT body
-    - `out_schema`: Pydantic schema for responses (must have orm_mode)
-    - `prefix`: route prefix (e.g., 'hospitals')
+    Built once per model and shared by both routers: `create_crud_router` calls the
+    handlers from the threadpool, and `create_async_crud_router` runs the same
+    handlers on its AsyncSession connection through `AsyncSession.run_sync`.
     """
 
-    router = APIRouter(prefix=f"/{prefix}", tags=[prefix])
+    def __init__(self, model, create_schema, out_schema, prefix: str, cache=None, fast_json: bool = False, on_write=None):
+        self.model = model
+        self.create_schema = create_schema
+        self.out_schema = out_schema
+        self.prefix = prefix
+        self.cache = cache
+        self.on_write = on_write
+        # Save/Get statements and the parameter layout are compiled once per model
+        self.plan = EntityPlan(model)
+        self.page_model = page_schema(out_schema)
+        self.versioned = etags.version_column(model) is not None
+        self.etag_fields = etags.response_fields(out_schema)
+        self.encoder = RowEncoder(out_schema) if fast_json else None
 
-    import re
+    def not_found(self) -> HTTPException:
+        return HTTPException(status_code=404, detail=f"{self.prefix[:-1].capitalize()} not found")
 
-    def _pg_proc_exists(conn, proc_name: str) -> bool:
-        """Return True if a PostgreSQL function named `proc_name` exists in pg_proc.
-        Only allow simple identifier names to avoid injection.
+    def _pg_proc_exists(self, db, proc_name: str) -> bool:
+        """Return True on PostgreSQL if a function named `proc_name` exists.
+        Served from the process-wide registry; pg_proc is only read when it is empty or stale.
         """
-        if not re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', proc_name):
-            return False
-        # Postgres stores unquoted identifiers in lowercase; normalize to avoid case-sensitivity issues
-        res = conn.execute(text("SELECT 1 FROM pg_catalog.pg_proc WHERE proname = :proc LIMIT 1"), {"proc": proc_name.lower()})
-        return res.fetchone() is not None
-
-    # --- Helpers for dynamic stored-proc parameter/statement generation ---
-    def _sa_type_to_pg(col):
-        """Map SQLAlchemy column type instances to a Postgres type name used for CAST()."""
-        from sqlalchemy import String, Text, Integer, BigInteger, Boolean, DateTime, JSON, Numeric
-
-        t = col.type
-        if isinstance(t, (String, Text)):
-            return "text"
-        if isinstance(t, (Integer, BigInteger)):
-            return "bigint"
-        if isinstance(t, Boolean):
-            return "boolean"
-        if isinstance(t, DateTime):
-            return "timestamptz"
-        if isinstance(t, JSON):
-            return "jsonb"
-        if isinstance(t, Numeric):
-            return "numeric"
-        # Fallback
-        return "text"
-
-    def _proc_columns(model):
-        """Return non-auto columns to include in stored-proc parameters (excludes 'id' and timestamps)."""
-        return [c for c in model.__table__.columns if c.name not in ("id", "created_at", "updated_at")]
-
-    def build_save_stmt(model, include_id=True):
-        cols = _proc_columns(model)
-        args = []
-        if include_id:
-            args.append("CAST(:p_id AS bigint)")
-        for c in cols:
-            pgtype = _sa_type_to_pg(c)
-            args.append(f"CAST(:p_{c.name} AS {pgtype})")
-        return text(f"SELECT Save{model.__name__}({', '.join(args)})")
-
-    def build_db_params(schema_or_dict, include_id=False):
-        """Build a dict of p_<name>: value pairs from a Pydantic schema or a plain dict."""
-        if isinstance(schema_or_dict, dict):
-            src = schema_or_dict
-        else:
-            src = schema_or_dict.dict()
-        params = {}
-        if include_id:
-            params["p_id"] = None
-        for k, v in src.items():
-            params[f"p_{k}"] = v
-        return params
+        return getattr(db.bind.dialect, "name", "") == "postgresql" and proc_registry.exists(db, proc_name)
 
-    @router.post("/", response_model=out_schema, status_code=status.HTTP_201_CREATED)
-    def create_item(item: create_schema, db: Session = Depends(get_db)):
+    # fast_json: rows from our own DB are trusted, so skip response_model validation
+    def _one(self, response: Response, row):
+        return self.encoder.response(self.encoder.row(row), response) if self.encoder is not None else row
+
+    def _many(self, response: Response, rows):
+        return self.encoder.response(self.encoder.rows(rows), response) if self.encoder is not None else rows
+
+    def _invalidate(self, *item_ids, fields=None):
+        # Writes drop the cached copy (the next GET reloads it through Get{Entity}) and notify on_write
+        for item_id in item_ids:
+            if item_id is None:
+                continue
+            if self.cache is not None:
+                self.cache.invalidate(item_id)
+            if self.on_write is not None:
+                self.on_write(item_id, fields)
+
+    def _filters(self, hospital_id, doctor_id, descendant_of) -> list:
+        try:
+            return scope_filters(self.model, hospital_id, doctor_id, descendant_of)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    def create(self, db: Session, item):
         # For PostgreSQL, if a Save{Entity} stored procedure exists, use it (merge semantics)
-        entity = model.__name__
-        if getattr(db.bind.dialect, "name", "") == "postgresql" and _pg_proc_exists(db, f"Save{entity}"):
-            params = item.dict()
+        plan = self.plan
+        if self._pg_proc_exists(db, plan.save_proc):
             try:
-                # Build dynamic statement and params from model columns and incoming payload
-                stmt = build_save_stmt(model, include_id=True)
-                db_params = build_db_params(params, include_id=True)
-                res = db.execute(stmt, db_params)
-                saved_id = res.scalar()
+                # Save{Entity} returns the saved row: one round trip, no ORM re-fetch
+                row = db.execute(plan.save_stmt, plan.bind(item.dict())).fetchone()
                 db.commit()
-                db_obj = db.query(model).filter(model.id == saved_id).first()
-                if not db_obj:
-                    raise HTTPException(status_code=500, detail=f"Failed to load saved {entity}")
-                return db_obj
             except IntegrityError as e:
                 db.rollback()
                 raise HTTPException(status_code=400, detail=str(e.orig))
             except Exception as e:
                 # Log and surface the underlying exception for easier debugging
                 db.rollback()
-                err_msg = f"Stored procedure {save_proc} error: {e.__class__.__name__}: {str(e)}"
+                err_msg = f"Stored procedure {plan.save_proc} error: {e.__class__.__name__}: {str(e)}"
                 print(err_msg)
                 raise HTTPException(status_code=500, detail=err_msg)
+            if row is None:
+                raise HTTPException(status_code=500, detail=f"Failed to load saved {plan.entity}")
+            saved = dict(row._mapping)
+            self._invalidate(saved.get("id"), fields=item.dict())
+            return saved
         # Default behavior for other models
-        db_obj = model(**item.dict())
+        db_obj = self.model(**item.dict())
         db.add(db_obj)
         try:
             db.commit()
@@ -128,66 +112,139 @@ def create_crud_router(
         except SQLAlchemyError:
             db.rollback()
             raise HTTPException(status_code=500, detail="Database error during create")
+        self._invalidate(db_obj.id, fields=item.dict())
         return db_obj
 
-    @router.get("/", response_model=list[out_schema])
-    def list_items(id: int = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-        entity = model.__name__
+    def prepare_bulk(self, body: bytes, content_type: str) -> tuple:
+        """Parse and validate a bulk body (CPU only; run it off the event loop).
+
+        Returns `(started, received, valid, errors)` for `write_bulk`.
+        """
+        started = time.perf_counter()
+        # Body is a JSON array or NDJSON (application/x-ndjson) of create_schema objects
+        try:
+            records = parse_bulk_body(body, content_type)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid bulk body: {e}")
+        if len(records) > BULK_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ROWS} rows per bulk request")
+        valid, errors = validate_rows(self.create_schema, records)
+        return started, len(records), valid, errors
+
+    def write_bulk(self, db: Session, prepared: tuple) -> dict:
+        started, received, valid, errors = prepared
+        try:
+            results = write_rows(db, self.model, valid)
+            db.commit()
+        except SQLAlchemyError:
+            db.rollback()
+            raise HTTPException(status_code=500, detail="Database error during bulk create")
+        # Upserts may have changed existing rows
+        self._invalidate(*(r.get("id") for r in results))
+        return summarize(received, results, errors, time.perf_counter() - started)
+
+    def bulk(self, db: Session, body: bytes, content_type: str) -> dict:
+        return self.write_bulk(db, self.prepare_bulk(body, content_type))
+
+    def list_items(self, db: Session, request: Request, response: Response, id, skip, limit, hospital_id, doctor_id, descendant_of):
+        model, plan = self.model, self.plan
         # If id is provided, use the Get<Entity> function if available
-        if id is not None and getattr(db.bind.dialect, "name", "") == "postgresql" and _pg_proc_exists(db, f"Get{entity}"):
-            get_proc = f"Get{entity}"
-            res = db.execute(text(f"SELECT * FROM {get_proc}(CAST(:p_id AS bigint))"), {"p_id": id})
-            rows = res.fetchall()
-            return [dict(row._mapping) for row in rows] if rows else []
-        # Otherwise, return all (optionally paginated)
-        return db.query(model).offset(skip).limit(limit).all()
+        if id is not None and self._pg_proc_exists(db, plan.get_proc):
+            rows = [dict(row._mapping) for row in db.execute(plan.get_stmt, {"p_id": id}).fetchall()]
+        else:
+            # Otherwise, return all (OFFSET paging kept for backwards compatibility; prefer /page)
+            filters = self._filters(hospital_id, doctor_id, descendant_of)
+            rows = db.execute(select(model).where(*filters).order_by(model.id).offset(skip).limit(limit)).scalars().all()
+        not_modified = etags.respond(request, response, etags.rows_etag(model, rows, self.etag_fields))
+        if not_modified:
+            return not_modified
+        return self._many(response, rows)
 
-    @router.get("/{item_id}", response_model=out_schema)
-    def get_item(item_id: int, db: Session = Depends(get_db)):
+    def list_page(self, db: Session, request: Request, response: Response, cursor, limit, hospital_id, doctor_id, descendant_of):
+        # Keyset pagination: pass the returned next_cursor back to get the following page
+        model = self.model
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        stmt = keyset_stmt(model, self._filters(hospital_id, doctor_id, descendant_of), after, limit)
+        if self.versioned and request.headers.get("if-none-match"):
+            # Revalidate from (id, updated_at) only; the full rows are read if the page changed
+            etag = etags.rows_etag(model, db.execute(etags.version_probe(model, stmt)).all())
+            if etags.matches(request, etag):
+                return etags.not_modified(etag)
+        rows = db.execute(stmt).scalars().all()
+        not_modified = etags.respond(request, response, etags.rows_etag(model, rows, self.etag_fields))
+        if not_modified:
+            return not_modified
+        rows, next_cursor = finish_page(rows, limit)
+        if self.encoder is not None:
+            return self.encoder.response({"items": self.encoder.rows(rows), "next_cursor": next_cursor}, response)
+        return {"items": rows, "next_cursor": next_cursor}
+
+    def export(self, stream, bind, fmt, hospital_id, doctor_id, descendant_of, created_from, created_to, after_id):
+        # Streams every matching row from a server-side cursor; memory stays flat (app/export.py)
+        filters = self._filters(hospital_id, doctor_id, descendant_of)
+        stmt = export_stmt(self.model, self.out_schema, filters, created_from, created_to, after_id)
+        formatter = ExportFormatter(fmt, [c.name for c in stmt.selected_columns])
+        return StreamingResponse(
+            stream(bind, stmt, formatter),
+            media_type=formatter.media_type,
+            headers={"Content-Disposition": f'attachment; filename="{self.prefix}.{fmt}"'},
+        )
+
+    def get_item(self, db: Session, item_id: int, request: Request, response: Response):
+        model, plan, cache = self.model, self.plan, self.cache
+        if self.versioned and request.headers.get("if-none-match"):
+            # Conditional GET: compare against (id, updated_at) without reading the large columns
+            probe = db.execute(etags.version_probe(model).where(model.id == item_id)).first()
+            if probe is None:
+                raise self.not_found()
+            etag = etags.row_etag(model, probe)
+            if etags.matches(request, etag):
+                return etags.not_modified(etag)
+        if cache is not None:
+            cached = cache.get(item_id)
+            if cached is not None:
+                return etags.respond(request, response, etags.row_etag(model, cached, self.etag_fields)) or self._one(response, cached)
         # Require a Get{Entity} stored procedure for reads; do not fallback to ORM
-        entity = model.__name__
-        if getattr(db.bind.dialect, "name", "") == "postgresql" and _pg_proc_exists(db, f"Get{entity}"):
-            get_proc = f"Get{entity}"
-            res = db.execute(text(f"SELECT * FROM {get_proc}(CAST(:p_id AS bigint))"), {"p_id": item_id})
-            row = res.fetchone()
+        if self._pg_proc_exists(db, plan.get_proc):
+            row = db.execute(plan.get_stmt, {"p_id": item_id}).fetchone()
             if not row:
-                raise HTTPException(status_code=404, detail=f"{prefix[:-1].capitalize()} not found")
+                raise self.not_found()
             # return as mapping/dict — Pydantic Out schema with orm_mode will accept this
-            return dict(row._mapping)
+            found = dict(row._mapping)
+            if cache is not None:
+                cache.set(item_id, found)
+            return etags.respond(request, response, etags.row_etag(model, found, self.etag_fields)) or self._one(response, found)
         # No fallback: explicit configuration error if stored procedure is missing
-        raise HTTPException(status_code=500, detail=f"Stored procedure Get{entity} is required for reads but not available on this database")
+        raise HTTPException(status_code=500, detail=f"Stored procedure {plan.get_proc} is required for reads but not available on this database")
 
-    @router.put("/{item_id}", response_model=out_schema)
-    def update_item(item_id: int, updates: update_schema, db: Session = Depends(get_db)):
+    def update(self, db: Session, item_id: int, updates):
         # For PostgreSQL, if a Save{Entity} stored procedure exists, route update through it
-        entity = model.__name__
-        if getattr(db.bind.dialect, "name", "") == "postgresql" and _pg_proc_exists(db, f"Save{entity}"):
+        plan = self.plan
+        if self._pg_proc_exists(db, plan.save_proc):
             # Merge values: only consider fields the client explicitly sent (exclude_unset)
             # If the client sent null explicitly, treat that as intent to set null.
             upd = updates.dict(exclude_unset=True)
             try:
-                # Build params where unspecified fields are NULL so the stored proc's COALESCE keeps existing values
-                merged = {c.name: upd.get(c.name, None) for c in _proc_columns(model)}
-                stmt = build_save_stmt(model, include_id=True)
-                params_dict = build_db_params(merged, include_id=True)
-                params_dict["p_id"] = item_id
-                res = db.execute(stmt, params_dict)
-                saved_id = res.scalar()
+                # Unspecified fields bind as NULL so the stored proc's COALESCE keeps existing values
+                row = db.execute(plan.save_stmt, plan.bind(upd, item_id)).fetchone()
                 db.commit()
-                db_obj = db.query(model).filter(model.id == saved_id).first()
-                if not db_obj:
-                    raise HTTPException(status_code=500, detail=f"Failed to load saved {entity}")
-                return db_obj
             except IntegrityError as e:
                 db.rollback()
                 raise HTTPException(status_code=400, detail=str(e.orig))
             except SQLAlchemyError:
                 db.rollback()
                 raise HTTPException(status_code=500, detail="Database error during update")
+            self._invalidate(item_id, fields=upd)
+            if row is None:
+                raise HTTPException(status_code=500, detail=f"Failed to load saved {plan.entity}")
+            return dict(row._mapping)
         # Default behavior for other models
-        db_obj = db.query(model).filter(model.id == item_id).first()
+        db_obj = db.get(self.model, item_id)
         if not db_obj:
-            raise HTTPException(status_code=404, detail=f"{prefix[:-1].capitalize()} not found")
+            raise self.not_found()
         for k, v in updates.dict().items():
             if v is not None:
                 setattr(db_obj, k, v)
@@ -200,8 +257,102 @@ def create_crud_router(
         except SQLAlchemyError:
             db.rollback()
             raise HTTPException(status_code=500, detail="Database error during update")
+        self._invalidate(item_id, fields=updates.dict(exclude_unset=True))
         return db_obj
 
+
+def create_crud_router(
+    model: Type[ModelType],
+    create_schema: Type[CreateSchemaType],
+    update_schema: Type[UpdateSchemaType],
+    out_schema: Type[OutSchemaType],
+    prefix: str,
+    async_: bool = False,
+    cache=None,
+    fast_json: bool = False,
+    on_write=None,
+):
+    """Create an APIRouter providing CRUD endpoints for the given SQLAlchemy model.
+
+    - `model`: SQLAlchemy declarative model class
+    - `create_schema`: Pydantic schema for POST body
+    - `update_schema`: Pydantic schema for PUT body
+    - `out_schema`: Pydantic schema for responses (must have orm_mode)
+    - `prefix`: route prefix (e.g., 'hospitals')
+    - `async_`: serve the endpoints from an AsyncSession (asyncpg/aiosqlite) instead
+      of the threadpool; see `async_router_factory`
+    - `cache`: optional `app.cache.EntityCache`; `GET /{id}` reads through it and writes
+      invalidate the entry (meant for rarely changing reference data)
+    - `fast_json`: GET endpoints encode rows straight to JSON bytes (orjson) instead of
+      validating each one against `out_schema`; see `app/fast_json.py`
+    - `on_write`: optional `callback(id, fields)` after each committed create/update; `fields`
+      are the values the client sent, None when unknown (bulk upserts)
+    """
+    handlers = CrudHandlers(model, create_schema, out_schema, prefix, cache=cache, fast_json=fast_json, on_write=on_write)
+    if async_:
+        from .async_router_factory import create_async_crud_router
+
+        return create_async_crud_router(handlers, update_schema)
+
+    router = APIRouter(prefix=f"/{prefix}", tags=[prefix])
+
+    @router.post("/", response_model=out_schema, status_code=status.HTTP_201_CREATED)
+    def create_item(item: create_schema, db: Session = Depends(get_db)):
+        return handlers.create(db, item)
+
+    @router.post("/bulk", response_model=BulkResult)
+    async def bulk_create(request: Request, db: Session = Depends(get_db)):
+        body = await request.body()
+        # Parsing, validation and the DB writes are blocking; keep them off the event loop
+        return await run_in_threadpool(handlers.bulk, db, body, request.headers.get("content-type", ""))
+
+    @router.get("/", response_model=list[out_schema])
+    def list_items(
+        request: Request,
+        response: Response,
+        id: int = None,
+        skip: int = 0,
+        limit: int = 100,
+        hospital_id: int = None,
+        doctor_id: int = None,
+        descendant_of: int = None,
+        db: Session = Depends(get_db),
+    ):
+        return handlers.list_items(db, request, response, id, skip, limit, hospital_id, doctor_id, descendant_of)
+
+    @router.get("/page", response_model=handlers.page_model)
+    def list_page(
+        request: Request,
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=1000),
+        hospital_id: int = None,
+        doctor_id: int = None,
+        descendant_of: int = None,
+        db: Session = Depends(get_db),
+    ):
+        return handlers.list_page(db, request, response, cursor, limit, hospital_id, doctor_id, descendant_of)
+
+    @router.get("/export")
+    def export_items(
+        fmt: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+        hospital_id: int = None,
+        doctor_id: int = None,
+        descendant_of: int = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+    ):
+        return handlers.export(stream_export, engine, fmt, hospital_id, doctor_id, descendant_of, created_from, created_to, after_id)
+
+    @router.get("/{item_id}", response_model=out_schema)
+    def get_item(item_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+        return handlers.get_item(db, item_id, request, response)
+
+    @router.put("/{item_id}", response_model=out_schema)
+    def update_item(item_id: int, updates: update_schema, db: Session = Depends(get_db)):
+        return handlers.update(db, item_id, updates)
+
     # DELETE endpoint removed: not required at this time. Re-enable if needed.
     # @router.delete("/{item_id}", response_model=out_schema)
     # def delete_item(item_id: int, db: Session = Depends(get_db)):
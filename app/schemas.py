@@ -242,6 +242,7 @@ class TranscriptionUpdate(BaseModel):
 
 class TranscriptionOut(TranscriptionBase):
     id: int
+    char_count: Optional[int]
     created_at: Optional[datetime]
 
     class Config:
@@ -329,3 +330,20 @@ class ClinicalDocumentOut(ClinicalDocumentBase):
 
     class Config:
         orm_mode = True
+
+
+# --- Bulk create/upsert response (shared by every entity) ---
+from typing import Any, List
+
+class BulkRowResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[Any] = None
+
+class BulkResult(BaseModel):
+    received: int
+    written: int
+    failed: int
+    elapsed_ms: float
+    rows_per_sec: float
+    results: List[BulkRowResult]
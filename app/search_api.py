@@ -0,0 +1,28 @@
+"""`GET /search`: ranked, highlighted full-text search over dictated text (app/fulltext.py)."""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from . import fulltext
+from .database import get_db
+from .fast_json import dumps
+
+router = APIRouter(tags=["search"])
+
+
+@router.get("/search")
+def search_text(
+    q: str = Query(..., min_length=1, max_length=500),
+    entity: str = Query("transcriptions"),
+    hospital_id: Optional[int] = None,
+    doctor_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    if entity not in fulltext.FULLTEXT_TARGETS:
+        raise HTTPException(status_code=400, detail=f"entity must be one of: {', '.join(fulltext.FULLTEXT_TARGETS)}")
+    try:
+        page = fulltext.search(db, entity, q, hospital_id, doctor_id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(dumps({"q": q, "entity": entity, **page}), media_type="application/json")
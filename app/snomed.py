@@ -0,0 +1,215 @@
+"""Local SNOMED CT dictionary: RF2 snapshot loader and an in-process concept index.
+
+`load_rf2()` reads the Concept, Description, Relationship and (optional) Language refset
+snapshot files of an RF2 release and replaces the `snomed_*` tables with their active rows,
+then rebuilds the `snomed_closure` table used by hierarchy filters.
+The preferred term of each concept is resolved once at load time from the language refset
+(`SNOMED_LANGUAGE_REFSET`, default US English), falling back to the first synonym.
+
+`ConceptIndex` holds the whole dictionary in flat arrays: sorted concept ids (binary search),
+parallel term lists and the is-a graph in CSR form (per-concept offsets into one array of parent
+positions). A lookup or an ancestor walk is a few array reads with no database round trip.
+The index is built lazily per worker by `concept_index()`; call `reload_concept_index()`
+(or `POST /admin/snomed/reload`, which also rebuilds the search index) after loading a new release.
+"""
+import csv
+import glob
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from sqlalchemy import delete, func, insert, select
+from .database import engine
+from .models import SnomedClosure, SnomedConcept, SnomedDescription, SnomedIsA
+
+IS_A = 116680003
+FSN = 900000000000003001
+SYNONYM = 900000000000013009
+PREFERRED = 900000000000548007
+SNOMED_LANGUAGE_REFSET = int(os.getenv("SNOMED_LANGUAGE_REFSET", "900000000000509007"))
+SNOMED_LOAD_CHUNK = int(os.getenv("SNOMED_LOAD_CHUNK", "10000"))
+
+
+def _rf2_rows(directory: str, pattern: str):
+    """Active rows of the first snapshot file matching `pattern` (tab separated, header row)."""
+    paths = sorted(glob.glob(os.path.join(directory, "**", pattern), recursive=True))
+    if not paths:
+        return
+    with open(paths[0], newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+            if row["active"] == "1":
+                yield row
+
+
+def _insert_chunks(conn, table, rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= SNOMED_LOAD_CHUNK:
+            conn.execute(table.insert(), chunk)
+            chunk = []
+    if chunk:
+        conn.execute(table.insert(), chunk)
+
+
+def load_rf2(directory: str, bind=engine) -> dict:
+    """Replace the SNOMED tables with the active content of an RF2 snapshot directory."""
+    started = time.perf_counter()
+    preferred, any_preferred = set(), set()
+    for row in _rf2_rows(directory, "der2_cRefset_Language*Snapshot*.txt"):
+        if int(row["acceptabilityId"]) == PREFERRED:
+            description_id = int(row["referencedComponentId"])
+            any_preferred.add(description_id)
+            if int(row["refsetId"]) == SNOMED_LANGUAGE_REFSET:
+                preferred.add(description_id)
+    # A release without the configured refset still gets the preferred terms of the one it has
+    preferred = preferred or any_preferred
+
+    concept_ids = {int(row["id"]) for row in _rf2_rows(directory, "sct2_Concept_Snapshot*.txt")}
+    descriptions, fsn, terms, has_preferred = [], {}, {}, set()
+    for row in _rf2_rows(directory, "sct2_Description_Snapshot*.txt"):
+        concept_id, description_id, type_id = int(row["conceptId"]), int(row["id"]), int(row["typeId"])
+        if concept_id not in concept_ids:
+            continue
+        is_preferred = type_id == SYNONYM and description_id in preferred
+        descriptions.append({"id": description_id, "concept_id": concept_id, "term": row["term"], "type_id": type_id, "preferred": is_preferred})
+        if type_id == FSN:
+            fsn[concept_id] = row["term"]
+        elif is_preferred and concept_id not in has_preferred:
+            terms[concept_id] = row["term"]
+            has_preferred.add(concept_id)
+        elif type_id == SYNONYM and concept_id not in terms:
+            terms[concept_id] = row["term"]
+
+    is_a = {
+        (int(row["sourceId"]), int(row["destinationId"]))
+        for row in _rf2_rows(directory, "sct2_Relationship_Snapshot*.txt")
+        if int(row["typeId"]) == IS_A and int(row["sourceId"]) in concept_ids and int(row["destinationId"]) in concept_ids
+    }
+
+    with bind.begin() as conn:
+        for model in (SnomedClosure, SnomedIsA, SnomedDescription, SnomedConcept):
+            conn.execute(delete(model.__table__))
+        _insert_chunks(conn, SnomedConcept.__table__, (
+            {"id": cid, "fsn": fsn.get(cid, ""), "preferred_term": terms.get(cid, fsn.get(cid, ""))}
+            for cid in sorted(concept_ids)
+        ))
+        _insert_chunks(conn, SnomedDescription.__table__, descriptions)
+        _insert_chunks(conn, SnomedIsA.__table__, ({"source_id": s, "destination_id": d} for s, d in sorted(is_a)))
+        closure = build_closure(conn)
+    return {
+        "concepts": len(concept_ids),
+        "descriptions": len(descriptions),
+        "is_a": len(is_a),
+        "closure": closure,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+def build_closure(conn) -> int:
+    """Rebuild snomed_closure from snomed_is_a with one recursive INSERT ... SELECT."""
+    conn.execute(delete(SnomedClosure.__table__))
+    up = select(SnomedConcept.id.label("descendant_id"), SnomedConcept.id.label("ancestor_id")).cte("up", recursive=True)
+    # UNION (not UNION ALL) drops pairs reached through several paths and stops on cycles
+    up = up.union(
+        select(up.c.descendant_id, SnomedIsA.destination_id).join(SnomedIsA, SnomedIsA.source_id == up.c.ancestor_id)
+    )
+    stmt = insert(SnomedClosure.__table__).from_select(["descendant_id", "ancestor_id"], select(up.c.descendant_id, up.c.ancestor_id))
+    conn.execute(stmt)
+    return conn.execute(select(func.count()).select_from(SnomedClosure.__table__)).scalar()
+
+
+class ConceptIndex:
+    """Array-backed, read-only view of the concept dictionary."""
+
+    def __init__(self, concepts, is_a):
+        # concepts: (id, preferred_term, fsn) sorted by id; is_a: (source_id, destination_id)
+        self.ids = array("q", (c[0] for c in concepts))
+        self.terms = [c[1] for c in concepts]
+        self.fsns = [c[2] for c in concepts]
+        parents = [[] for _ in concepts]
+        for source_id, destination_id in is_a:
+            child, parent = self.position(source_id), self.position(destination_id)
+            if child is not None and parent is not None:
+                parents[child].append(parent)
+        self.parent_offsets = array("l", [0])
+        self.parents = array("l")
+        for positions in parents:
+            self.parents.extend(sorted(positions))
+            self.parent_offsets.append(len(self.parents))
+
+    @classmethod
+    def from_db(cls, bind=engine):
+        with bind.connect() as conn:
+            concepts = conn.execute(select(SnomedConcept.id, SnomedConcept.preferred_term, SnomedConcept.fsn).order_by(SnomedConcept.id)).all()
+            is_a = conn.execute(select(SnomedIsA.source_id, SnomedIsA.destination_id)).all()
+        return cls(concepts, is_a)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, concept_id: int):
+        i = bisect_left(self.ids, concept_id)
+        if i < len(self.ids) and self.ids[i] == concept_id:
+            return i
+        return None
+
+    def _parents(self, i: int):
+        return self.parents[self.parent_offsets[i]:self.parent_offsets[i + 1]]
+
+    def _entry(self, i: int) -> dict:
+        return {"id": self.ids[i], "preferred_term": self.terms[i]}
+
+    def concept(self, concept_id: int):
+        i = self.position(concept_id)
+        if i is None:
+            return None
+        return {**self._entry(i), "fsn": self.fsns[i], "parents": [self._entry(p) for p in self._parents(i)]}
+
+    def ancestor_positions(self, i: int) -> list:
+        """Breadth-first over is-a: nearest ancestors first, each concept once."""
+        seen, order, frontier = {i}, [], [i]
+        while frontier:
+            nxt = []
+            for j in frontier:
+                for p in self._parents(j):
+                    if p not in seen:
+                        seen.add(p)
+                        order.append(p)
+                        nxt.append(p)
+            frontier = nxt
+        return order
+
+    def ancestors(self, concept_id: int):
+        i = self.position(concept_id)
+        if i is None:
+            return None
+        return [self._entry(p) for p in self.ancestor_positions(i)]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def concept_index() -> ConceptIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = _build_index()
+    return _index
+
+
+def reload_concept_index() -> ConceptIndex:
+    global _index
+    with _index_lock:
+        _index = _build_index()
+    return _index
+
+
+def _build_index() -> ConceptIndex:
+    started = time.perf_counter()
+    index = ConceptIndex.from_db()
+    print(f"SNOMED concept index: {len(index)} concepts in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return index
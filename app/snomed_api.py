@@ -0,0 +1,53 @@
+"""SNOMED CT dictionary endpoints, answered from the in-process indexes (app/snomed.py, app/snomed_search.py)."""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from . import snomed_search
+from .database import get_db
+from .fast_json import dumps
+from .models import Doctor
+from .snomed import concept_index
+
+router = APIRouter(prefix="/snomed", tags=["snomed"])
+
+
+def _json(payload) -> Response:
+    return Response(dumps(payload), media_type="application/json")
+
+
+@router.get("/concepts/{concept_id}")
+def get_concept(concept_id: int):
+    concept = concept_index().concept(concept_id)
+    if concept is None:
+        raise HTTPException(status_code=404, detail="Concept not found")
+    return _json(concept)
+
+
+@router.get("/concepts/{concept_id}/ancestors")
+def get_ancestors(concept_id: int):
+    ancestors = concept_index().ancestors(concept_id)
+    if ancestors is None:
+        raise HTTPException(status_code=404, detail="Concept not found")
+    return _json({"id": concept_id, "ancestors": ancestors})
+
+
+@router.get("/search")
+def search_terms(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    doctor_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    # Type-ahead: ranked concepts whose synonyms (or the doctor's custom_vocab synonyms) match `q`
+    synonyms = []
+    if doctor_id is not None:
+        found = db.execute(select(Doctor.id, Doctor.custom_vocab).where(Doctor.id == doctor_id)).first()
+        if found is None:
+            raise HTTPException(status_code=404, detail="Doctor not found")
+        synonyms = snomed_search.doctor_synonyms(found.custom_vocab)
+    if snomed_search.SNOMED_SEARCH_BACKEND == "pg_trgm":
+        results = snomed_search.search_postgres(db, q, limit, synonyms)
+    else:
+        results = snomed_search.search_index().search(q, limit, synonyms)
+    return _json({"q": q, "results": results})
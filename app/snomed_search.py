@@ -0,0 +1,290 @@
+"""Type-ahead search over SNOMED CT synonyms (and each doctor's own synonyms) for `GET /snomed/search`.
+
+`TermIndex` is built once per worker from `snomed_descriptions`. Descriptions are numbered in
+result order (shorter first, then preferred), so every posting list below is already ranked:
+
+- term prefix: entries by first word; the lists of all words with the query's first word as a
+  prefix are merged (heapq) and the scan stops after `limit` concepts;
+- word prefix ("infarc" -> "myocardial infarction"): entries by every word, scanned the same way
+  for the query word with the fewest entries;
+- fuzzy (typos, `SNOMED_SEARCH_FUZZY_THRESHOLD`): pg_trgm-style trigram postings. Only the rarest
+  trigrams a match must share are scanned, then candidates are scored exactly.
+
+Results are ranked exact > term prefix > word prefix > fuzzy (by similarity); a doctor's synonym
+beats a dictionary synonym at the same rank, then shorter terms, then preferred terms. One result
+per concept. Each stage only runs while fewer than `limit` concepts were found.
+
+Doctor synonyms live in `doctors.custom_vocab` as `{"synonyms": {"<term>": <concept id>, ...}}`.
+
+`SNOMED_SEARCH_BACKEND=pg_trgm` answers from PostgreSQL instead (ILIKE and `%` on the
+`ix_snomed_descriptions_term_trgm` GIN index created by bootstrap), so workers need not hold the index.
+"""
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from sqlalchemy import select, text
+from .database import engine
+from .models import SnomedConcept, SnomedDescription
+from .snomed import SYNONYM
+
+SNOMED_SEARCH_BACKEND = os.getenv("SNOMED_SEARCH_BACKEND", "memory")
+SNOMED_SEARCH_FUZZY_THRESHOLD = float(os.getenv("SNOMED_SEARCH_FUZZY_THRESHOLD", "0.3"))
+# Upper bound on descriptions examined per stage, so short or very common queries stay cheap
+SNOMED_SEARCH_MAX_CANDIDATES = int(os.getenv("SNOMED_SEARCH_MAX_CANDIDATES", "2000"))
+
+EXACT, PREFIX, WORD_PREFIX, FUZZY = 0, 1, 2, 3
+MATCH_NAMES = {EXACT: "exact", PREFIX: "prefix", WORD_PREFIX: "word_prefix", FUZZY: "fuzzy"}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_HIGH = "\U0010ffff"
+
+
+def normalize(term: str) -> str:
+    return _NON_ALNUM.sub(" ", term.casefold()).strip()
+
+
+def trigrams(norm: str) -> set:
+    """pg_trgm-style trigrams: each word padded with two spaces in front and one behind."""
+    grams = set()
+    for word in norm.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def _rank_prefix(norm: str, q: str, q_words: list):
+    """Rank of `norm` against normalized query `q`, or None if it is not a prefix match."""
+    if norm == q:
+        return EXACT
+    if norm.startswith(q):
+        return PREFIX
+    words = norm.split()
+    if all(any(w.startswith(qw) for w in words) for qw in q_words):
+        return WORD_PREFIX
+    return None
+
+
+def doctor_synonyms(custom_vocab) -> list:
+    """`(term, concept_id)` pairs from a doctor's `custom_vocab`; malformed entries are ignored."""
+    synonyms = (custom_vocab or {}).get("synonyms") if isinstance(custom_vocab, dict) else None
+    if not isinstance(synonyms, dict):
+        return []
+    pairs = []
+    for term, concept_id in synonyms.items():
+        try:
+            pairs.append((str(term), int(concept_id)))
+        except (TypeError, ValueError):
+            continue
+    return pairs
+
+
+class _Postings:
+    """Entry lists keyed by word, stored flat (sorted keys + offsets into one array)."""
+
+    def __init__(self, lists: dict):
+        self.keys = sorted(lists)
+        self.offsets = array("l", [0])
+        self.entries = array("l")
+        for key in self.keys:
+            self.entries.extend(lists[key])
+            self.offsets.append(len(self.entries))
+
+    def _range(self, prefix: str):
+        return bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + _HIGH)
+
+    def count(self, prefix: str) -> int:
+        lo, hi = self._range(prefix)
+        return self.offsets[hi] - self.offsets[lo]
+
+    def merged(self, prefix: str, fanout: int):
+        """Entries of every key starting with `prefix`, in ascending entry order."""
+        lo, hi = self._range(prefix)
+        keys = range(lo, hi)
+        if hi - lo > fanout:
+            # Lists are in entry order, so their heads are their best entries: keep the best lists
+            keys = heapq.nsmallest(fanout, keys, key=lambda k: self.entries[self.offsets[k]])
+        view = memoryview(self.entries)
+        return heapq.merge(*(view[self.offsets[k]:self.offsets[k + 1]] for k in keys))
+
+
+class TermIndex:
+    """Read-only prefix/word/trigram index over `(concept_id, term, preferred_term, is_preferred)` rows."""
+
+    def __init__(self, rows):
+        rows = [(r[0], r[1], r[2], bool(r[3]), normalize(r[1])) for r in rows]
+        # Entry ids follow result order (shorter, then preferred), so every posting list is already
+        # ranked and a scan can stop as soon as it has `limit` concepts
+        rows.sort(key=lambda r: (len(r[4]), not r[3], r[4]))
+        self.concept_ids = array("q", (r[0] for r in rows))
+        self.terms = [r[1] for r in rows]
+        self.is_preferred = bytearray(r[3] for r in rows)
+        self.norms = [r[4] for r in rows]
+        self.preferred_by_concept = {r[0]: r[2] for r in rows}
+
+        first_words, words, grams = {}, {}, {}
+        for i, norm in enumerate(self.norms):
+            split = norm.split()
+            if split:
+                first_words.setdefault(split[0], []).append(i)
+            for word in set(split):
+                words.setdefault(word, []).append(i)
+            for gram in trigrams(norm):
+                grams.setdefault(gram, []).append(i)
+        self.first_words = _Postings(first_words)
+        self.words = _Postings(words)
+        self.postings = {gram: array("l", entries) for gram, entries in grams.items()}
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _fuzzy_candidates(self, q: str):
+        grams = trigrams(q)
+        # A term with similarity >= t shares at least ceil(t * |q|) trigrams with the query, so it
+        # must contain one of the |q| - ceil(t * |q|) + 1 rarest ones: only those postings are scanned
+        needed = max(1, math.ceil(SNOMED_SEARCH_FUZZY_THRESHOLD * len(grams)))
+        rare = sorted(grams, key=lambda g: len(self.postings.get(g, ())))[:len(grams) - needed + 1]
+        seen = set()
+        for i in heapq.merge(*(self.postings.get(g, ()) for g in rare)):
+            if i in seen:
+                continue
+            if len(seen) >= SNOMED_SEARCH_MAX_CANDIDATES:
+                return
+            seen.add(i)
+            score = similarity(grams, trigrams(self.norms[i]))
+            if score >= SNOMED_SEARCH_FUZZY_THRESHOLD:
+                yield i, score
+
+    def search(self, query: str, limit: int = 10, synonyms=()) -> list:
+        """Top `limit` concepts for `query`; `synonyms` are a doctor's `(term, concept_id)` pairs."""
+        q = normalize(query)
+        if not q:
+            return []
+        q_words = q.split()
+        best = {}  # concept_id -> (sort key, entry id or doctor term, rank, source, score)
+
+        def offer(concept_id, norm, rank, source, preferred, term, score=1.0):
+            key = (rank, source != "doctor", -score, len(norm), not preferred)
+            if concept_id not in best or key < best[concept_id][0]:
+                best[concept_id] = (key, term, rank, source, score)
+                return True
+            return False
+
+        def scan(entries, accept):
+            found = 0
+            for scanned, i in enumerate(entries):
+                if found >= limit or scanned >= SNOMED_SEARCH_MAX_CANDIDATES:
+                    break
+                rank = _rank_prefix(self.norms[i], q, q_words)
+                if rank is not None and rank <= accept and offer(self.concept_ids[i], self.norms[i], rank, "snomed", self.is_preferred[i], self.terms[i]):
+                    found += 1
+            return found
+
+        fanout = max(limit * 8, 64)
+        # Whole-term prefix (and exact) matches start with the query's first word; they outrank any
+        # word-prefix or fuzzy match, so the later stages only run while results are missing
+        found = scan(self.first_words.merged(q_words[0], fanout), PREFIX)
+        if found < limit:
+            rarest = min(q_words, key=self.words.count)
+            found += scan(self.words.merged(rarest, fanout), WORD_PREFIX)
+        if found < limit and len(q) >= 3:
+            for i, score in self._fuzzy_candidates(q):
+                offer(self.concept_ids[i], self.norms[i], FUZZY, "snomed", self.is_preferred[i], self.terms[i], score)
+
+        for term, concept_id in synonyms:
+            norm = normalize(term)
+            rank = _rank_prefix(norm, q, q_words)
+            if rank is not None:
+                offer(concept_id, norm, rank, "doctor", False, term)
+            elif len(q) >= 3:
+                score = similarity(trigrams(q), trigrams(norm))
+                if score >= SNOMED_SEARCH_FUZZY_THRESHOLD:
+                    offer(concept_id, norm, FUZZY, "doctor", False, term, score)
+
+        ranked = sorted(best.items(), key=lambda kv: kv[1][0])[:limit]
+        return [
+            {
+                "concept_id": concept_id,
+                "term": term,
+                "match": MATCH_NAMES[rank],
+                "source": source,
+                "score": round(score, 3),
+                "preferred_term": self.preferred_by_concept.get(concept_id),
+            }
+            for concept_id, (_, term, rank, source, score) in ranked
+        ]
+
+    @classmethod
+    def from_db(cls, bind=engine):
+        stmt = (
+            select(SnomedDescription.concept_id, SnomedDescription.term, SnomedConcept.preferred_term, SnomedDescription.preferred)
+            .join(SnomedConcept, SnomedConcept.id == SnomedDescription.concept_id)
+            .where(SnomedDescription.type_id == SYNONYM)
+        )
+        with bind.connect() as conn:
+            return cls(conn.execute(stmt).all())
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE/ILIKE wildcards so user input matches literally (used with `ESCAPE '\\'`)."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_postgres(conn, query: str, limit: int = 10, synonyms=()) -> list:
+    """pg_trgm-backed search (SNOMED_SEARCH_BACKEND=pg_trgm); same result shape as TermIndex.search."""
+    q = normalize(query)
+    if not q:
+        return []
+    rows = conn.execute(text(
+        "SELECT d.concept_id, d.term, c.preferred_term, d.preferred, similarity(d.term, :q) AS score "
+        "FROM snomed_descriptions d JOIN snomed_concepts c ON c.id = d.concept_id "
+        "WHERE d.type_id = :synonym AND (d.term ILIKE :contains ESCAPE '\\' OR d.term % :q) "
+        "ORDER BY (d.term ILIKE :prefix ESCAPE '\\') DESC, score DESC, length(d.term) LIMIT :rows"
+    ), {"q": query, "contains": f"%{escape_like(query)}%", "prefix": f"{escape_like(query)}%", "synonym": SYNONYM,
+        "rows": limit * 5}).all()
+    # Rank the (small) candidate set with the in-memory rules so both backends order results alike
+    results = TermIndex(rows).search(query, limit, synonyms)
+    missing = {r["concept_id"] for r in results if r["preferred_term"] is None}
+    if missing:
+        terms = dict(conn.execute(select(SnomedConcept.id, SnomedConcept.preferred_term).where(SnomedConcept.id.in_(missing))).all())
+        for r in results:
+            r["preferred_term"] = r["preferred_term"] or terms.get(r["concept_id"])
+    return results
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def search_index() -> TermIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = _build_index()
+    return _index
+
+
+def reload_search_index() -> TermIndex:
+    global _index
+    with _index_lock:
+        _index = _build_index()
+    return _index
+
+
+def _build_index() -> TermIndex:
+    started = time.perf_counter()
+    index = TermIndex.from_db()
+    print(f"SNOMED search index: {len(index)} descriptions in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return index
@@ -0,0 +1,22 @@
+"""`GET /stats/transcriptions/daily`: dashboard aggregates from the trigger-maintained rollup (app/text_stats.py)."""
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.orm import Session
+from .database import get_db
+from .fast_json import dumps
+from .text_stats import daily_stats
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/transcriptions/daily")
+def transcription_daily_stats(
+    doctor_id: Optional[int] = None,
+    hospital_id: Optional[int] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    # Reads only the rollup rows; never scans transcriptions.raw_text
+    return Response(dumps({"items": daily_stats(db, doctor_id, hospital_id, since, until)}), media_type="application/json")
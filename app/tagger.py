@@ -0,0 +1,417 @@
+"""SNOMED annotation stage: tags new transcriptions with concepts, in batches.
+
+The stage reads `transcriptions` in id order, after its `pipeline_cursors` row. For each batch it
+runs the tagger over every `raw_text`, inserts all the resulting `snomed_annotations` rows with one
+multi-row INSERT, and advances the cursor, all in one transaction. The cursor update is conditional
+on its old value, so two runners never store the same batch twice. Rows younger than
+TAGGER_SETTLE_SEC are left for the next pass: ids are assigned before commit, and a transaction
+that commits late could otherwise land behind the cursor.
+
+The tagger is pluggable (SNOMED_TAGGER, `module:factory`). The factory returns an object with a
+`model_name` (stored in `model_used`) and `tag(text, synonyms)`. `synonyms` is the doctor's
+compiled vocabulary (a `WordAutomaton` from app/vocab.py), or plain `(term, concept_id)` pairs
+from `custom_vocab`. `tag` returns spans: `start_char`, `end_char`,
+`term` (the text as dictated), `concept_id`, `category` and `confidence`.
+
+The default `DictionaryTagger` is a word-level Aho-Corasick automaton over the SNOMED synonyms. It
+matches whole words in one pass over the text, whatever the dictionary size. Overlapping matches
+resolve to the leftmost, then longest; on the same span a doctor's synonym beats the dictionary.
+
+    python -m app.tagger                  # TAGGER_WORKERS tagging processes (default: one per CPU core)
+    python -m app.tagger --workers 4 --once
+
+With a pool, the parent process reads and writes the database. Each batch is split across the
+worker processes, and each worker builds its own automaton once at startup. Workers keep their own
+cache of compiled doctor vocabularies (app/vocab.py) and read a doctor's `custom_vocab` only when
+its `vocab_version` is new to them.
+"""
+import argparse
+import importlib
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta, timezone
+from multiprocessing import get_context
+from sqlalchemy import exists, insert, select, update
+from .database import SessionLocal, engine
+from .models import Doctor, PipelineCursor, SNOMEDAnnotation, SnomedConcept, SnomedDescription, Transcription, utcnow
+from .snomed import SYNONYM
+from .snomed_search import normalize
+
+SNOMED_TAGGER = os.getenv("SNOMED_TAGGER", "app.tagger:DictionaryTagger.from_db")
+TAGGER_WORKERS = int(os.getenv("TAGGER_WORKERS", "0")) or os.cpu_count() or 1
+TAGGER_BATCH = int(os.getenv("TAGGER_BATCH", "500"))
+TAGGER_SETTLE_SEC = float(os.getenv("TAGGER_SETTLE_SEC", "5"))
+TAGGER_POLL_SEC = float(os.getenv("TAGGER_POLL_SEC", "2"))
+# Dictionary terms shorter than this (normalized) are not matched: too ambiguous in free text
+TAGGER_MIN_TERM_CHARS = int(os.getenv("TAGGER_MIN_TERM_CHARS", "3"))
+
+STAGE = "snomed_tagger"
+CONFIDENCE_DOCTOR, CONFIDENCE_PREFERRED, CONFIDENCE_SYNONYM = 0.95, 0.9, 0.8
+
+_TOKEN = re.compile(r"[0-9A-Za-z]+")
+_SEMANTIC_TAG = re.compile(r"\(([^()]+)\)\s*$")
+_WORD_BITS = 24
+
+
+def tokenize(text: str) -> list:
+    """`(word, start, end)` for each run of ASCII letters/digits, lower-cased as `normalize()` does."""
+    return [(m.group().lower(), m.start(), m.end()) for m in _TOKEN.finditer(text or "")]
+
+
+def semantic_tag(fsn: str):
+    """'Myocardial infarction (disorder)' -> 'disorder'."""
+    match = _SEMANTIC_TAG.search(fsn or "")
+    return match.group(1) if match else None
+
+
+class WordAutomaton:
+    """Aho-Corasick over word sequences: whole-word matches of every pattern in one pass over the tokens.
+
+    `patterns` are `(words, payload)` in priority order; the first payload of a duplicate pattern wins.
+    Transitions live in one dict keyed by `node << 24 | word id`.
+    """
+
+    def __init__(self, patterns):
+        self.vocab = {}
+        self.goto = {}
+        self.payloads = []
+        terminal = [-1]
+        children = [[]]
+        for words, payload in patterns:
+            node = 0
+            for word in words:
+                word_id = self.vocab.setdefault(word, len(self.vocab))
+                key = node << _WORD_BITS | word_id
+                child = self.goto.get(key)
+                if child is None:
+                    child = len(terminal)
+                    self.goto[key] = child
+                    terminal.append(-1)
+                    children.append([])
+                    children[node].append((word_id, child))
+                node = child
+            if node and terminal[node] < 0:
+                terminal[node] = len(self.payloads)
+                self.payloads.append((len(words), payload))
+        if len(self.vocab) >= 1 << _WORD_BITS:
+            raise ValueError(f"More than {1 << _WORD_BITS} distinct words")
+        # Breadth-first: failure links, and per node the next node on its failure chain that ends a pattern
+        self.fail = [0] * len(terminal)
+        self.output = terminal
+        self.link = [0] * len(terminal)
+        queue = deque(child for _, child in children[0])
+        while queue:
+            node = queue.popleft()
+            for word_id, child in children[node]:
+                f = self.fail[node]
+                while True:
+                    target = self.goto.get(f << _WORD_BITS | word_id)
+                    if target is not None or f == 0:
+                        self.fail[child] = target or 0
+                        break
+                    f = self.fail[f]
+                f = self.fail[child]
+                self.link[child] = f if terminal[f] >= 0 else self.link[f]
+                queue.append(child)
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def matches(self, words: list):
+        """Yield `(first word index, last word index, payload)` of every pattern ending at each word, longest first."""
+        goto, fail, output, link, payloads, vocab = self.goto, self.fail, self.output, self.link, self.payloads, self.vocab
+        node = 0
+        for i, word in enumerate(words):
+            word_id = vocab.get(word)
+            if word_id is None:
+                node = 0
+                continue
+            while True:
+                child = goto.get(node << _WORD_BITS | word_id)
+                if child is not None:
+                    node = child
+                    break
+                if node == 0:
+                    break
+                node = fail[node]
+            # A shorter pattern ending here may be the only one that fits next to an earlier match
+            found = node if output[node] >= 0 else link[node]
+            while found:
+                length, payload = payloads[output[found]]
+                yield i - length + 1, i, payload
+                found = link[found]
+
+
+def synonym_automaton(synonyms, categories=None) -> WordAutomaton:
+    """Automaton over a doctor's `(term, concept_id)` synonyms."""
+    categories = categories or {}
+    patterns = []
+    for term, concept_id in synonyms:
+        words = tuple(normalize(term).split())
+        if words:
+            patterns.append((words, (concept_id, categories.get(concept_id), CONFIDENCE_DOCTOR, 0)))
+    return WordAutomaton(patterns)
+
+
+def select_spans(text: str, tokens: list, candidates) -> list:
+    """Leftmost-longest non-overlapping spans; on equal spans the lower source rank (doctor = 0) wins."""
+    ordered = sorted(candidates, key=lambda c: (c[0], c[0] - c[1], c[2][3]))
+    spans, next_free = [], 0
+    for first, last, (concept_id, category, confidence, _) in ordered:
+        if first < next_free:
+            continue
+        start, end = tokens[first][1], tokens[last][2]
+        spans.append({
+            "start_char": start, "end_char": end, "term": text[start:end],
+            "concept_id": concept_id, "category": category, "confidence": confidence,
+        })
+        next_free = last + 1
+    return spans
+
+
+class DictionaryTagger:
+    """Default tagger: SNOMED synonyms (preferred terms first) in one WordAutomaton."""
+
+    model_name = "dictionary"
+
+    def __init__(self, rows):
+        # rows: (concept_id, term, is_preferred, fsn)
+        self.categories = {}
+        patterns = []
+        for concept_id, term, preferred, fsn in sorted(rows, key=lambda r: (not r[2], r[0])):
+            norm = normalize(term)
+            if len(norm) < TAGGER_MIN_TERM_CHARS:
+                continue
+            category = self.categories.setdefault(concept_id, semantic_tag(fsn))
+            confidence = CONFIDENCE_PREFERRED if preferred else CONFIDENCE_SYNONYM
+            patterns.append((tuple(norm.split()), (concept_id, category, confidence, 1)))
+        self.automaton = WordAutomaton(patterns)
+
+    def __len__(self):
+        return len(self.automaton)
+
+    @classmethod
+    def from_db(cls, bind=engine):
+        started = time.perf_counter()
+        stmt = (
+            select(SnomedDescription.concept_id, SnomedDescription.term, SnomedDescription.preferred, SnomedConcept.fsn)
+            .join(SnomedConcept, SnomedConcept.id == SnomedDescription.concept_id)
+            .where(SnomedDescription.type_id == SYNONYM)
+        )
+        with bind.connect() as conn:
+            tagger = cls(conn.execute(stmt).all())
+        print(f"SNOMED tagger: {len(tagger)} terms in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return tagger
+
+    def tag(self, text: str, synonyms=()) -> list:
+        tokens = tokenize(text)
+        words = [t[0] for t in tokens]
+        candidates = list(self.automaton.matches(words))
+        if synonyms:
+            if not isinstance(synonyms, WordAutomaton):
+                synonyms = synonym_automaton(synonyms)
+            categories = self.categories
+            # Compiled vocabularies are shared across taggers, so they carry no category of their own
+            candidates.extend(
+                (first, last, (concept_id, category or categories.get(concept_id), confidence, rank))
+                for first, last, (concept_id, category, confidence, rank) in synonyms.matches(words)
+            )
+        return select_spans(text, tokens, candidates)
+
+
+def load_tagger(path: str = SNOMED_TAGGER):
+    """Build the tagger named by `module:factory` (the factory may be a dotted attribute, e.g. a classmethod)."""
+    module_name, _, attr = path.partition(":")
+    if not attr:
+        raise ValueError(f"Tagger must be 'module:factory', got {path!r}")
+    factory = importlib.import_module(module_name)
+    for name in attr.split("."):
+        factory = getattr(factory, name)
+    return factory()
+
+
+def tag_documents(tagger, docs: list) -> list:
+    """`[(transcription_id, spans)]` for `docs` of `(transcription_id, raw_text, doctor_id, vocab_version)`.
+
+    Doctor vocabularies come from this process's `vocab_matchers()`; the database is only read
+    for a doctor whose vocabulary is not compiled here yet at that version.
+    """
+    from .vocab import vocab_matchers  # app.vocab builds on this module
+
+    matchers = vocab_matchers()
+    results = []
+    with SessionLocal() as db:
+        for doc_id, text, doctor_id, version in docs:
+            synonyms = matchers.get(db, doctor_id, version) if doctor_id is not None else None
+            results.append((doc_id, tagger.tag(text, synonyms)))
+    return results
+
+
+def _settled(created_at, cutoff) -> bool:
+    if created_at is None:
+        return True
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)  # SQLite returns naive UTC
+    return created_at <= cutoff
+
+
+def next_batch(db, after_id: int, model_name: str, limit: int = TAGGER_BATCH, settle_sec: float = TAGGER_SETTLE_SEC):
+    """Transcriptions after `after_id`, up to the first one younger than `settle_sec`; returns `(rows, last id read)`."""
+    tagged = exists().where(SNOMEDAnnotation.transcription_id == Transcription.id, SNOMEDAnnotation.model_used == model_name)
+    rows = db.execute(
+        select(Transcription.id, Transcription.dictation_id, Transcription.doctor_id, Transcription.raw_text,
+               Transcription.created_at, tagged.label("tagged"))
+        .where(Transcription.id > after_id)
+        .order_by(Transcription.id)
+        .limit(limit)
+    ).all()
+    cutoff = utcnow() - timedelta(seconds=settle_sec)
+    batch, last_id = [], after_id
+    for row in rows:
+        if not _settled(row.created_at, cutoff):
+            break
+        last_id = row.id
+        # Already tagged by this model (e.g. the cursor was reset): skip, do not duplicate spans
+        if not row.tagged:
+            batch.append(row)
+    return batch, last_id
+
+
+def _cursor(db) -> int:
+    last_id = db.execute(select(PipelineCursor.last_id).where(PipelineCursor.stage == STAGE)).scalar()
+    if last_id is None:
+        db.add(PipelineCursor(stage=STAGE, last_id=0))
+        db.commit()
+        return 0
+    return last_id
+
+
+def run_batch(db, tag_many, model_name: str, limit: int = TAGGER_BATCH, settle_sec: float = TAGGER_SETTLE_SEC):
+    """Tag and store one batch; returns `(documents tagged, spans stored)`, or None when nothing is pending."""
+    after_id = _cursor(db)
+    rows, last_id = next_batch(db, after_id, model_name, limit, settle_sec)
+    if last_id == after_id:
+        db.rollback()
+        return None
+    doctor_ids = {row.doctor_id for row in rows}
+    versions = dict(db.execute(select(Doctor.id, Doctor.vocab_version).where(Doctor.id.in_(doctor_ids))).all()) if rows else {}
+    # Only (doctor id, version) travels to the taggers: each process compiles a doctor's vocabulary
+    # once and reuses it across batches until vocab_version changes
+    docs = [(row.id, row.raw_text, row.doctor_id, versions.get(row.doctor_id)) for row in rows]
+    # Tagging is CPU only: no transaction stays open meanwhile
+    db.rollback()
+    by_id = {row.id: row for row in rows}
+    values = []
+    for doc_id, spans in tag_many(docs):
+        row = by_id[doc_id]
+        for span in spans:
+            values.append({
+                "dictation_id": row.dictation_id, "doctor_id": row.doctor_id, "transcription_id": doc_id,
+                "snomed_concept_id": span["concept_id"], "term": span["term"], "category": span["category"],
+                "start_char": span["start_char"], "end_char": span["end_char"],
+                "confidence": span["confidence"], "model_used": model_name,
+            })
+    if values:
+        # One multi-row INSERT for the whole batch (statement-level triggers fire once)
+        db.execute(insert(SNOMEDAnnotation), values)
+    advanced = db.execute(
+        update(PipelineCursor)
+        .where(PipelineCursor.stage == STAGE, PipelineCursor.last_id == after_id)
+        .values(last_id=last_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not advanced:
+        # Another runner stored this batch first
+        db.rollback()
+        return 0, 0
+    db.commit()
+    return len(docs), len(values)
+
+
+_worker_tagger = None
+
+
+def _init_worker(path: str):
+    global _worker_tagger
+    _worker_tagger = load_tagger(path)
+
+
+def _tag_chunk(docs: list) -> list:
+    return tag_documents(_worker_tagger, docs)
+
+
+def _model_name() -> str:
+    return _worker_tagger.model_name
+
+
+def run_stage(workers: int = 1, path: str = SNOMED_TAGGER, batch: int = TAGGER_BATCH, settle_sec: float = TAGGER_SETTLE_SEC,
+              idle_exit: bool = True, tagger=None) -> dict:
+    """Tag pending transcriptions until none are left (or forever, polling, without `idle_exit`).
+
+    `workers > 1` tags in that many spawned processes; otherwise in this one (`tagger`, or built from `path`).
+    Returns `{"documents", "spans", "seconds", "docs_per_sec"}`.
+    """
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"), initializer=_init_worker, initargs=(path,))
+
+        def tag_many(docs):
+            size = max(1, -(-len(docs) // workers))
+            chunks = [docs[i:i + size] for i in range(0, len(docs), size)]
+            return [result for chunk in pool.map(_tag_chunk, chunks) for result in chunk]
+
+        model_name = pool.submit(_model_name).result()
+    else:
+        tagger = tagger or load_tagger(path)
+        model_name = tagger.model_name
+
+        def tag_many(docs):
+            return tag_documents(tagger, docs)
+
+    documents = spans = 0
+    started = time.perf_counter()
+    try:
+        with SessionLocal() as db:
+            while True:
+                done = run_batch(db, tag_many, model_name, batch, settle_sec)
+                if done is None:
+                    if idle_exit:
+                        break
+                    time.sleep(TAGGER_POLL_SEC)
+                    continue
+                documents += done[0]
+                spans += done[1]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    seconds = time.perf_counter() - started
+    return {"documents": documents, "spans": spans, "seconds": round(seconds, 3),
+            "docs_per_sec": round(documents / seconds, 1) if seconds else 0.0}
+
+
+def main(argv=None) -> int:
+    from .bootstrap import SchemaVersionError, verify_schema_version
+
+    parser = argparse.ArgumentParser(prog="python -m app.tagger", description="Tag transcriptions with SNOMED concepts")
+    parser.add_argument("--workers", type=int, default=TAGGER_WORKERS)
+    parser.add_argument("--batch", type=int, default=TAGGER_BATCH)
+    parser.add_argument("--tagger", default=SNOMED_TAGGER)
+    parser.add_argument("--once", action="store_true", help="exit when no transcription is pending")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+    try:
+        verify_schema_version()
+    except SchemaVersionError as e:
+        print(e)
+        return 1
+    stats = run_stage(args.workers, args.tagger, args.batch, idle_exit=args.once)
+    print(f"Tagged {stats['documents']} transcriptions ({stats['spans']} spans) in {stats['seconds']:.1f}s "
+          f"({stats['docs_per_sec']:.1f} docs/s, {args.workers} workers)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
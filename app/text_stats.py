@@ -0,0 +1,241 @@
+"""Transcription text statistics computed once, at write time, by the database.
+
+Every write to `transcriptions` (Save procedures, ORM, bulk endpoints, COPY imports) sets
+`word_count` and `char_count` from `raw_text`. A client-supplied `word_count` is overwritten on insert
+and on update, including an update that sends nothing else. The same
+triggers keep `transcription_daily_stats` up to date: one row per doctor and UTC day with
+transcription, word, character and SNOMED annotation totals. Dashboards read those aggregates
+instead of scanning `raw_text`.
+
+PostgreSQL: a BEFORE row trigger computes the counts. Statement-level AFTER triggers with transition
+tables fold a whole statement (e.g. a COPY import) into one upsert per (doctor, day).
+SQLite: AFTER row triggers. `word_count()` is a Python function registered on every SQLite
+connection opened once this module is imported; modules that write transcriptions import it.
+"""
+from datetime import date
+from typing import Optional
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.engine import Engine
+from .models import Doctor, TranscriptionDailyStats
+
+
+def count_words(raw_text: Optional[str]) -> int:
+    """Whitespace-separated words, as stored in `transcriptions.word_count`."""
+    return len(raw_text.split()) if raw_text else 0
+
+
+@event.listens_for(Engine, "connect")
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    # The SQLite triggers call word_count(); registered on every engine, async included
+    if hasattr(dbapi_connection, "create_function"):
+        dbapi_connection.create_function("word_count", 1, count_words, deterministic=True)
+
+
+def _day(dialect: str, row: str) -> str:
+    # Rollup day of a row: its created_at as a UTC date
+    if dialect == "postgresql":
+        return f"(COALESCE({row}.created_at, now()) AT TIME ZONE 'UTC')::date"
+    return f"date(COALESCE({row}.created_at, CURRENT_TIMESTAMP))"
+
+
+# --- PostgreSQL -------------------------------------------------------------------------------
+
+_PG_TEXT_STATS = r"""
+CREATE OR REPLACE FUNCTION transcription_text_stats() RETURNS trigger AS $$
+BEGIN
+    NEW.char_count := char_length(NEW.raw_text);
+    NEW.word_count := CASE WHEN NEW.raw_text ~ '\S'
+        THEN array_length(regexp_split_to_array(regexp_replace(NEW.raw_text, '^\s+|\s+$', '', 'g'), '\s+'), 1)
+        ELSE 0 END;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# {source} yields (doctor_id, created_at, n, w, c) deltas from the transition tables. Rows are
+# upserted in key order so concurrent statements lock rollup rows in the same order
+_PG_TRANSCRIPTION_UPSERT = """
+        INSERT INTO transcription_daily_stats AS s (doctor_id, day, transcriptions, words, chars)
+        SELECT doctor_id, {day}, sum(n), sum(w), sum(c)
+        FROM ({source}) delta
+        GROUP BY 1, 2
+        HAVING sum(n) <> 0 OR sum(w) <> 0 OR sum(c) <> 0
+        ORDER BY 1, 2
+        ON CONFLICT (doctor_id, day) DO UPDATE SET
+            transcriptions = s.transcriptions + EXCLUDED.transcriptions,
+            words = s.words + EXCLUDED.words,
+            chars = s.chars + EXCLUDED.chars;"""
+
+_PG_ANNOTATION_UPSERT = """
+        INSERT INTO transcription_daily_stats AS s (doctor_id, day, annotations)
+        SELECT doctor_id, {day}, sum(n)
+        FROM ({source}) delta
+        GROUP BY 1, 2
+        HAVING sum(n) <> 0
+        ORDER BY 1, 2
+        ON CONFLICT (doctor_id, day) DO UPDATE SET annotations = s.annotations + EXCLUDED.annotations;"""
+
+_PG_TRANSCRIPTION_ROWS = {
+    "new": "SELECT doctor_id, created_at, 1 AS n, COALESCE(word_count, 0) AS w, COALESCE(char_count, 0) AS c FROM new_rows",
+    "old": "SELECT doctor_id, created_at, -1 AS n, -COALESCE(word_count, 0) AS w, -COALESCE(char_count, 0) AS c FROM old_rows",
+}
+_PG_ANNOTATION_ROWS = {
+    "new": "SELECT doctor_id, created_at, 1 AS n FROM new_rows",
+    "old": "SELECT doctor_id, created_at, -1 AS n FROM old_rows",
+}
+
+
+def _pg_rollup_function(name: str, upsert: str, rows: dict) -> str:
+    # A trigger only sees the transition tables it declares, so each operation gets its own branch
+    branches = {
+        "INSERT": rows["new"],
+        "DELETE": rows["old"],
+        "UPDATE": f"{rows['new']} UNION ALL {rows['old']}",
+    }
+    day = _day("postgresql", "delta")
+    body = "\n    ELSIF ".join(f"TG_OP = '{op}' THEN{upsert.format(source=source, day=day)}" for op, source in branches.items())
+    return (
+        f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$\n"
+        f"BEGIN\n    IF {body}\n    END IF;\n    RETURN NULL;\nEND;\n$$ LANGUAGE plpgsql"
+    )
+
+
+def _pg_rollup_triggers(table: str, function: str) -> list:
+    # Transition tables require one event per trigger (and no UPDATE OF column list)
+    statements = []
+    for op, referencing in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        name = f"{table}_daily_stats_{op.lower()}"
+        statements.append(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+        statements.append(
+            f"CREATE TRIGGER {name} AFTER {op} ON {table} REFERENCING {referencing} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+        )
+    return statements
+
+
+def _install_postgres(conn):
+    conn.execute(text("ALTER TABLE transcriptions ADD COLUMN IF NOT EXISTS char_count integer"))
+    conn.exec_driver_sql(_PG_TEXT_STATS)
+    conn.exec_driver_sql("DROP TRIGGER IF EXISTS transcriptions_text_stats ON transcriptions")
+    conn.exec_driver_sql(
+        "CREATE TRIGGER transcriptions_text_stats BEFORE INSERT OR UPDATE OF raw_text, word_count, char_count ON transcriptions "
+        "FOR EACH ROW EXECUTE FUNCTION transcription_text_stats()"
+    )
+    conn.exec_driver_sql(_pg_rollup_function("transcription_daily_rollup", _PG_TRANSCRIPTION_UPSERT, _PG_TRANSCRIPTION_ROWS))
+    conn.exec_driver_sql(_pg_rollup_function("annotation_daily_rollup", _PG_ANNOTATION_UPSERT, _PG_ANNOTATION_ROWS))
+    for statement in _pg_rollup_triggers("transcriptions", "transcription_daily_rollup") + _pg_rollup_triggers("snomed_annotations", "annotation_daily_rollup"):
+        conn.exec_driver_sql(statement)
+
+
+# --- SQLite -----------------------------------------------------------------------------------
+
+_SQLITE_BUMP = (
+    "INSERT INTO transcription_daily_stats (doctor_id, day, transcriptions, words, chars, annotations) "
+    "VALUES ({row}.doctor_id, {day}, {n}, {words}, {chars}, {annotations}) "
+    "ON CONFLICT (doctor_id, day) DO UPDATE SET "
+    "transcriptions = transcriptions + excluded.transcriptions, words = words + excluded.words, "
+    "chars = chars + excluded.chars, annotations = annotations + excluded.annotations;"
+)
+
+
+def _sqlite_bump(row: str, n: int = 0, words: str = "0", chars: str = "0", annotations: int = 0) -> str:
+    return _SQLITE_BUMP.format(row=row, day=_day("sqlite", row), n=n, words=words, chars=chars, annotations=annotations)
+
+
+def _sqlite_triggers() -> dict:
+    # SQLite cannot assign NEW.* in a BEFORE trigger, so the counts are written back after the row.
+    # The INSERT trigger's write-back would fire the UPDATE trigger, so that one only runs when a
+    # rollup key changed or the stored counts disagree with raw_text (e.g. a client-sent word_count)
+    set_counts = "UPDATE transcriptions SET word_count = word_count(NEW.raw_text), char_count = length(NEW.raw_text) WHERE id = NEW.id;"
+    add_new = _sqlite_bump("NEW", 1, "word_count(NEW.raw_text)", "length(NEW.raw_text)")
+    remove_old = _sqlite_bump("OLD", -1, "-COALESCE(OLD.word_count, 0)", "-COALESCE(OLD.char_count, 0)")
+    return {
+        "transcriptions_stats_ai": f"AFTER INSERT ON transcriptions BEGIN {set_counts} {add_new} END",
+        "transcriptions_stats_au": (
+            "AFTER UPDATE OF raw_text, doctor_id, created_at, word_count, char_count ON transcriptions "
+            "WHEN OLD.raw_text IS NOT NEW.raw_text OR OLD.doctor_id IS NOT NEW.doctor_id OR OLD.created_at IS NOT NEW.created_at "
+            "OR NEW.word_count IS NOT word_count(NEW.raw_text) OR NEW.char_count IS NOT length(NEW.raw_text) "
+            f"BEGIN {set_counts} {remove_old} {add_new} END"
+        ),
+        "transcriptions_stats_ad": f"AFTER DELETE ON transcriptions BEGIN {remove_old} END",
+        "snomed_annotations_stats_ai": f"AFTER INSERT ON snomed_annotations BEGIN {_sqlite_bump('NEW', annotations=1)} END",
+        "snomed_annotations_stats_au": (
+            "AFTER UPDATE OF doctor_id, created_at ON snomed_annotations "
+            f"BEGIN {_sqlite_bump('OLD', annotations=-1)} {_sqlite_bump('NEW', annotations=1)} END"
+        ),
+        "snomed_annotations_stats_ad": f"AFTER DELETE ON snomed_annotations BEGIN {_sqlite_bump('OLD', annotations=-1)} END",
+    }
+
+
+def _install_sqlite(conn):
+    if "char_count" not in {c["name"] for c in inspect(conn).get_columns("transcriptions")}:
+        conn.exec_driver_sql("ALTER TABLE transcriptions ADD COLUMN char_count INTEGER")
+    for name, body in _sqlite_triggers().items():
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+        conn.exec_driver_sql(f"CREATE TRIGGER {name} {body}")
+
+
+# --- Provisioning and reads -------------------------------------------------------------------
+
+def ensure_text_stats(conn):
+    """Install the triggers; backfill counts and rollups the first time (empty rollup table)."""
+    if conn.dialect.name == "postgresql":
+        _install_postgres(conn)
+    elif conn.dialect.name == "sqlite":
+        _install_sqlite(conn)
+    else:
+        return
+    if conn.execute(select(TranscriptionDailyStats.doctor_id).limit(1)).first() is None:
+        rebuild_text_stats(conn)
+
+
+def rebuild_text_stats(conn):
+    """Recompute every transcription's counts and the whole rollup table from scratch."""
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        # Assigning raw_text fires the BEFORE trigger, which sets both counts
+        conn.execute(text("UPDATE transcriptions SET raw_text = raw_text WHERE char_count IS NULL"))
+    else:
+        conn.execute(text("UPDATE transcriptions SET word_count = word_count(raw_text), char_count = length(raw_text) WHERE char_count IS NULL"))
+    conn.execute(text("DELETE FROM transcription_daily_stats"))
+    conn.execute(text(
+        "INSERT INTO transcription_daily_stats (doctor_id, day, transcriptions, words, chars, annotations) "
+        "SELECT doctor_id, day, sum(n), sum(w), sum(c), sum(a) FROM ("
+        f" SELECT doctor_id, {_day(dialect, 't')} AS day, 1 AS n, COALESCE(word_count, 0) AS w, COALESCE(char_count, 0) AS c, 0 AS a"
+        " FROM transcriptions t"
+        f" UNION ALL SELECT doctor_id, {_day(dialect, 'a')}, 0, 0, 0, 1 FROM snomed_annotations a"
+        ") delta GROUP BY doctor_id, day"
+    ))
+
+
+def daily_stats(db, doctor_id: Optional[int] = None, hospital_id: Optional[int] = None,
+                since: Optional[date] = None, until: Optional[date] = None) -> list:
+    """Rollup rows (oldest first) with annotation density per 1000 words; both dates inclusive."""
+    stats = TranscriptionDailyStats
+    stmt = select(stats)
+    if doctor_id is not None:
+        stmt = stmt.where(stats.doctor_id == doctor_id)
+    if hospital_id is not None:
+        stmt = stmt.where(stats.doctor_id.in_(select(Doctor.id).where(Doctor.hospital_id == hospital_id)))
+    if since is not None:
+        stmt = stmt.where(stats.day >= since)
+    if until is not None:
+        stmt = stmt.where(stats.day <= until)
+    rows = db.execute(stmt.order_by(stats.day, stats.doctor_id)).scalars().all()
+    return [
+        {
+            "doctor_id": row.doctor_id,
+            "day": row.day,
+            "transcriptions": row.transcriptions,
+            "words": row.words,
+            "chars": row.chars,
+            "annotations": row.annotations,
+            "avg_words": round(row.words / row.transcriptions, 1) if row.transcriptions else None,
+            "annotations_per_1000_words": round(row.annotations * 1000 / row.words, 2) if row.words else None,
+        }
+        for row in rows
+    ]
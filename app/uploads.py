@@ -0,0 +1,19 @@
+"""Helpers shared by the streamed upload endpoints (app/audio_api.py, app/doctor_photos_api.py)."""
+from typing import Optional
+from fastapi import HTTPException
+
+
+def parse_content_length(value: Optional[str]) -> Optional[int]:
+    """The request's declared body size, or None when it has no Content-Length (chunked bodies).
+
+    A value that is not a non-negative integer is the client's error: 400, not a 500 from int().
+    """
+    if value is None:
+        return None
+    try:
+        length = int(value)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length")
+    return length
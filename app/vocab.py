@@ -0,0 +1,126 @@
+"""Compiled per-doctor vocabularies: each doctor's `custom_vocab` synonyms as a ready-to-run matcher.
+
+`doctors.vocab_version` is bumped by a database trigger whenever `custom_vocab` changes, through
+any write path: Save procedures, the ORM, bulk upserts and COPY imports. A compiled matcher is only
+reused for the version it was built from. Readers fetch the one integer column and compare it; the
+JSON is read and parsed again only on a miss.
+
+`VocabMatchers` is a bounded LRU per process (app.cache.LRUCache, VOCAB_CACHE_SIZE doctors). Each
+entry holds one doctor's `(vocab_version, WordAutomaton)`. The doctors router also drops a doctor's
+entry when a write sends `custom_vocab`, so an edited vocabulary is not held until evicted.
+`POST /doctors/{id}/vocab/tag` (app/vocab_api.py) and the annotation stage (app/tagger.py) share it.
+"""
+import os
+import threading
+import time
+from sqlalchemy import inspect, select, text
+from .cache import LRUCache
+from .models import Doctor
+from .snomed_search import doctor_synonyms
+from .tagger import select_spans, synonym_automaton, tokenize
+
+VOCAB_CACHE_SIZE = int(os.getenv("VOCAB_CACHE_SIZE", "2000"))
+VOCAB_TAG_MAX_CHARS = int(os.getenv("VOCAB_TAG_MAX_CHARS", "20000"))
+
+_PG_VOCAB_VERSION = """
+CREATE OR REPLACE FUNCTION doctor_vocab_version() RETURNS trigger AS $$
+BEGIN
+    NEW.vocab_version := COALESCE(OLD.vocab_version, 0) + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def ensure_vocab_version(conn):
+    """Add `doctors.vocab_version` if missing and install the trigger that bumps it."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE doctors ADD COLUMN IF NOT EXISTS vocab_version integer NOT NULL DEFAULT 0"))
+        conn.exec_driver_sql(_PG_VOCAB_VERSION)
+        conn.exec_driver_sql("DROP TRIGGER IF EXISTS doctors_vocab_version ON doctors")
+        conn.exec_driver_sql(
+            "CREATE TRIGGER doctors_vocab_version BEFORE UPDATE OF custom_vocab ON doctors FOR EACH ROW "
+            "WHEN (OLD.custom_vocab IS DISTINCT FROM NEW.custom_vocab) EXECUTE FUNCTION doctor_vocab_version()"
+        )
+    elif conn.dialect.name == "sqlite":
+        if "vocab_version" not in {c["name"] for c in inspect(conn).get_columns("doctors")}:
+            conn.exec_driver_sql("ALTER TABLE doctors ADD COLUMN vocab_version INTEGER NOT NULL DEFAULT 0")
+        # SQLite cannot assign NEW.* in a BEFORE trigger, so the version is written back after the row
+        conn.exec_driver_sql("DROP TRIGGER IF EXISTS doctors_vocab_version")
+        conn.exec_driver_sql(
+            "CREATE TRIGGER doctors_vocab_version AFTER UPDATE OF custom_vocab ON doctors "
+            "WHEN OLD.custom_vocab IS NOT NEW.custom_vocab BEGIN "
+            "UPDATE doctors SET vocab_version = COALESCE(OLD.vocab_version, 0) + 1 WHERE id = NEW.id; END"
+        )
+
+
+class VocabMatchers:
+    """Per-process LRU of compiled doctor vocabularies, keyed by doctor id and checked against vocab_version."""
+
+    def __init__(self, maxsize: int = VOCAB_CACHE_SIZE):
+        self.cache = LRUCache(maxsize=maxsize, ttl=0)
+        self._lock = threading.Lock()
+        self.compiles = 0
+        self.compile_ms = 0.0
+
+    def _compile(self, doctor_id: int, version: int, custom_vocab):
+        started = time.perf_counter()
+        matcher = synonym_automaton(doctor_synonyms(custom_vocab))
+        with self._lock:
+            self.compiles += 1
+            self.compile_ms += (time.perf_counter() - started) * 1000
+        self.cache.set(doctor_id, (version, matcher))
+        return matcher
+
+    def get(self, db, doctor_id: int, version: int = None):
+        """The compiled matcher for `doctor_id` (None if there is no such doctor).
+
+        Pass `version` when the caller already read `vocab_version` (e.g. for a whole batch).
+        """
+        if version is None:
+            version = db.execute(select(Doctor.vocab_version).where(Doctor.id == doctor_id)).scalar()
+            if version is None:
+                return None
+        # An entry compiled from an older vocab_version (written without going through the doctors
+        # router) is a miss
+        entry = self.cache.get(doctor_id, valid=lambda e: e[0] == version)
+        if entry is not None:
+            return entry[1]
+        row = db.execute(select(Doctor.vocab_version, Doctor.custom_vocab).where(Doctor.id == doctor_id)).first()
+        if row is None:
+            return None
+        return self._compile(doctor_id, row.vocab_version, row.custom_vocab)
+
+    def invalidate(self, doctor_id: int):
+        self.cache.delete(doctor_id)
+
+    def on_doctor_write(self, doctor_id, fields):
+        """`create_crud_router(on_write=...)` hook: drop the entry when `custom_vocab` may have changed."""
+        if fields is None or "custom_vocab" in fields:
+            self.invalidate(doctor_id)
+
+    def stats(self) -> dict:
+        info = self.cache.info()
+        info.update(compiles=self.compiles, compile_ms=round(self.compile_ms, 3))
+        return info
+
+
+_matchers = None
+_matchers_lock = threading.Lock()
+
+
+def vocab_matchers() -> VocabMatchers:
+    global _matchers
+    if _matchers is None:
+        with _matchers_lock:
+            if _matchers is None:
+                _matchers = VocabMatchers()
+    return _matchers
+
+
+def tag_text(matcher, text: str, tagger=None) -> list:
+    """Spans of `text` for a compiled vocabulary; with `tagger`, merged with its dictionary matches."""
+    if tagger is not None:
+        return tagger.tag(text, matcher)
+    tokens = tokenize(text)
+    return select_spans(text, tokens, matcher.matches([t[0] for t in tokens]))
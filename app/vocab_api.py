@@ -0,0 +1,51 @@
+"""Doctor vocabularies (app/vocab.py):
+
+    POST /doctors/{id}/vocab/tag   tag a text with the doctor's compiled custom_vocab
+                                   (?dictionary=true also matches the SNOMED dictionary)
+    GET  /admin/vocab-cache        compiled vocabulary cache: size, hits, misses, compiles
+"""
+import threading
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from .database import get_db
+from .fast_json import dumps
+from .tagger import DictionaryTagger
+from .vocab import VOCAB_TAG_MAX_CHARS, tag_text, vocab_matchers
+
+router = APIRouter(tags=["vocabulary"])
+
+_dictionary = None
+_dictionary_lock = threading.Lock()
+
+
+def dictionary_tagger() -> DictionaryTagger:
+    """The SNOMED dictionary automaton, built on first use and kept for the life of the process."""
+    global _dictionary
+    if _dictionary is None:
+        with _dictionary_lock:
+            if _dictionary is None:
+                _dictionary = DictionaryTagger.from_db()
+    return _dictionary
+
+
+class TagRequest(BaseModel):
+    text: str
+
+
+@router.post("/doctors/{doctor_id}/vocab/tag")
+def tag_with_vocab(doctor_id: int, body: TagRequest, dictionary: bool = Query(False), db: Session = Depends(get_db)):
+    if len(body.text) > VOCAB_TAG_MAX_CHARS:
+        raise HTTPException(status_code=400, detail=f"text is longer than {VOCAB_TAG_MAX_CHARS} characters")
+    matcher = vocab_matchers().get(db, doctor_id)
+    if matcher is None:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+    # Only the version probe touches the database; release the connection before matching
+    db.rollback()
+    spans = tag_text(matcher, body.text, dictionary_tagger() if dictionary else None)
+    return Response(dumps({"doctor_id": doctor_id, "spans": spans}), media_type="application/json")
+
+
+@router.get("/admin/vocab-cache")
+def vocab_cache_stats():
+    return vocab_matchers().stats()
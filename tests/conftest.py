@@ -1,6 +1,20 @@
+import os
+import uuid
+from typing import NamedTuple
 import pytest
 from app import models
-from app.database import engine
+from app.bootstrap import bootstrap, stored_proc_files
+from app.database import SessionLocal, engine
+
+
+def _drop_stored_procs(conn):
+    # Save/Get procs return table row types, so they must go before the tables.
+    # Dropped by name so signature changes in Scripts/StoredProc don't leave stale versions behind.
+    from sqlalchemy import text
+    for path in stored_proc_files():
+        name = os.path.splitext(os.path.basename(path))[0]
+        conn.execute(text(f"DROP FUNCTION IF EXISTS {name} CASCADE"))
+
 
 @pytest.fixture(scope="session", autouse=True)
 def reset_db():
@@ -9,27 +23,17 @@ def reset_db():
         from sqlalchemy import text
         # Drop stored procs first to avoid dependency errors when dropping tables
         with engine.begin() as conn:
-            conn.execute(text("DROP FUNCTION IF EXISTS GetHospital(bigint) CASCADE"))
-            conn.execute(text("DROP FUNCTION IF EXISTS SaveHospital(bigint, text, text, text, text, text, text, text, boolean) CASCADE"))
+            _drop_stored_procs(conn)
 
     models.Base.metadata.drop_all(bind=engine)
-    models.Base.metadata.create_all(bind=engine)
-    # Create stored procedures required for tests (PostgreSQL only)
-    if engine.dialect.name == "postgresql":
-        from sqlalchemy import text
-        # Create stored procs inside a transaction so DDL is committed
-        with engine.begin() as conn:
-            sql_save = open("Scripts/StoredProc/SaveHospital.sql").read()
-            sql_get = open("Scripts/StoredProc/GetHospital.sql").read()
-            conn.execute(text(sql_save))
-            conn.execute(text(sql_get))
+    # Same provisioning as a deploy: tables, indexes, stored procs (PostgreSQL) and schema version
+    bootstrap(engine)
     yield
     # Optionally clean up after tests
     if engine.dialect.name == "postgresql":
         from sqlalchemy import text
         with engine.begin() as conn:
-            conn.execute(text("DROP FUNCTION IF EXISTS GetHospital(bigint) CASCADE"))
-            conn.execute(text("DROP FUNCTION IF EXISTS SaveHospital(bigint, text, text, text, text, text, text, text, boolean) CASCADE"))
+            _drop_stored_procs(conn)
     models.Base.metadata.drop_all(bind=engine)
 
 
@@ -37,3 +41,45 @@ def reset_db():
 def run_around_tests():
     # small transactional cleanup per-test could be added here in future
     yield
+
+
+class Seeded(NamedTuple):
+    hospital_id: int
+    department_id: int
+    doctor_id: int
+    dictation_ids: list
+
+    @property
+    def dictation_id(self) -> int:
+        return self.dictation_ids[0]
+
+
+@pytest.fixture
+def seed():
+    """Factory for the hospital -> user -> department -> doctor -> dictations rows most tests start from.
+
+    `doctor` holds extra Doctor columns (e.g. custom_vocab), `dictations` how many dictations to add
+    (0 for a doctor alone) and the keyword arguments their columns; status defaults to "recorded".
+    """
+    def create(dictations: int = 1, doctor: dict = None, **dictation) -> Seeded:
+        dictation.setdefault("status", "recorded")
+        with SessionLocal() as db:
+            hosp = models.Hospital(name="Test Hospital", code=f"T_{uuid.uuid4().hex[:8]}")
+            user = models.User(name="Test Doctor", password="x")
+            db.add_all([hosp, user])
+            db.flush()
+            dept = models.Department(hospital_id=hosp.id, name="Cardiology")
+            db.add(dept)
+            db.flush()
+            doc = models.Doctor(hospital_id=hosp.id, department_id=dept.id, userid=user.id, **(doctor or {}))
+            db.add(doc)
+            db.flush()
+            rows = [
+                models.Dictation(hospital_id=hosp.id, department_id=dept.id, doctor_id=doc.id, **dictation)
+                for _ in range(dictations)
+            ]
+            db.add_all(rows)
+            db.commit()
+            return Seeded(hosp.id, dept.id, doc.id, [row.id for row in rows])
+
+    return create
@@ -0,0 +1,49 @@
+import uuid
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app import models, schemas
+from app.database import async_database_url
+from app.router_factory import create_crud_router
+
+app = FastAPI()
+app.include_router(create_crud_router(
+    model=models.Hospital,
+    create_schema=schemas.HospitalCreate,
+    update_schema=schemas.HospitalUpdate,
+    out_schema=schemas.HospitalOut,
+    prefix="hospitals",
+    async_=True,
+))
+
+
+def test_async_database_url_maps_drivers():
+    assert async_database_url("postgresql+psycopg2://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert async_database_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    with pytest.raises(ValueError):
+        async_database_url("mysql://u:p@h/db")
+
+
+def test_async_router_keeps_the_api_contract():
+    with TestClient(app) as client:
+        r = client.post("/hospitals/", json={"name": "Async Hospital", "code": f"ASYNC_{uuid.uuid4().hex[:8]}"})
+        assert r.status_code == 201
+        hosp = r.json()
+
+        r = client.put(f"/hospitals/{hosp['id']}", json={"name": "Async Renamed"})
+        assert r.status_code == 200
+        assert r.json()["name"] == "Async Renamed"
+        assert r.json()["code"] == hosp["code"]
+
+        r = client.post("/hospitals/bulk", json=[{"name": "Bulk Async", "code": f"ABULK_{uuid.uuid4().hex[:8]}"}, {"code": "x"}])
+        assert r.status_code == 200
+        assert r.json()["written"] == 1 and r.json()["failed"] == 1
+
+        r = client.get("/hospitals/page", params={"limit": 1})
+        assert r.status_code == 200
+        assert len(r.json()["items"]) == 1 and r.json()["next_cursor"]
+
+        r = client.get("/hospitals/export", params={"format": "csv"})
+        assert r.status_code == 200
+        assert r.text.splitlines()[0].startswith("name,code")
+        assert any(hosp["code"] in line for line in r.text.splitlines()[1:])
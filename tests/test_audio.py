@@ -0,0 +1,135 @@
+import io
+import wave
+import pytest
+from fastapi.testclient import TestClient
+from app import audio_storage as storage_module
+from app import models
+from app.audio_storage import S3_MIN_PART_BYTES, LocalObjectStore, LocalStorage, ObjectStorage, wav_duration
+from app.database import SessionLocal
+from app.main import app
+
+client = TestClient(app)
+
+
+def make_wav(seconds: float, rate: int = 8000) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(range(256)) * int(seconds * rate * 2 / 256))
+    return buf.getvalue()
+
+
+@pytest.fixture(params=["local", "object"])
+def storage(request, tmp_path, monkeypatch):
+    if request.param == "local":
+        backend = LocalStorage(str(tmp_path))
+    else:
+        backend = ObjectStorage(LocalObjectStore(str(tmp_path)), "audio", part_size=S3_MIN_PART_BYTES)
+    monkeypatch.setattr(storage_module, "_storage", backend)
+    return backend
+
+
+def test_wav_duration_from_header():
+    data = make_wav(2.5)
+    assert wav_duration(data[:44], len(data)) == pytest.approx(2.5, abs=0.01)
+    assert wav_duration(b"ID3\x03" + bytes(40), 1000) is None
+
+
+def test_resumable_upload_completes_and_sets_audio_path(storage, seed):
+    dictation_id = seed().dictation_id
+    data = make_wav(400)  # 6.4 MB: two parts on object storage
+    r = client.post(f"/dictations/{dictation_id}/audio/uploads", json={"content_type": "audio/wav", "total_size": len(data)})
+    assert r.status_code == 201, r.text
+    upload = r.json()
+    url = f"/dictations/{dictation_id}/audio/uploads/{upload['upload_id']}"
+    chunk = max(upload["min_chunk_bytes"], 1024 * 1024)
+
+    assert client.patch(url, content=data[:chunk], headers={"Upload-Offset": "0"}).json()["received"] == chunk
+    # A retried chunk (wrong offset) is refused; the client resumes from `received`
+    r = client.patch(url, content=data[:chunk], headers={"Upload-Offset": "0"})
+    assert r.status_code == 409
+    offset = client.get(url).json()["received"]
+    while offset < len(data):
+        r = client.patch(url, content=data[offset:offset + chunk], headers={"Upload-Offset": str(offset)})
+        assert r.status_code == 200, r.text
+        offset = r.json()["received"]
+
+    r = client.post(f"{url}/complete", json={})
+    assert r.status_code == 200, r.text
+    assert r.json()["duration_sec"] == 400 and r.json()["size"] == len(data)
+    with SessionLocal() as db:
+        dictation = db.get(models.Dictation, dictation_id)
+        assert dictation.audio_path.endswith(".wav") and dictation.duration_sec == 400
+    assert client.post(f"{url}/complete", json={}).status_code == 409
+
+    r = client.get(f"/dictations/{dictation_id}/audio")
+    assert r.status_code == 200 and r.content == data
+    assert r.headers["accept-ranges"] == "bytes" and r.headers["content-type"] == "audio/x-wav"
+
+
+def test_streamed_put_and_range_requests(storage, seed):
+    dictation_id = seed().dictation_id
+    data = bytes(range(256)) * 400
+
+    def body():
+        for i in range(0, len(data), 10000):
+            yield data[i:i + 10000]
+
+    r = client.put(f"/dictations/{dictation_id}/audio", params={"duration_sec": 7, "filename": "note.mp3"}, content=body())
+    assert r.status_code == 200, r.text
+    assert r.json()["duration_sec"] == 7 and r.json()["audio_path"].endswith(".mp3")
+
+    url = f"/dictations/{dictation_id}/audio"
+    r = client.get(url, headers={"Range": "bytes=100-199"})
+    assert r.status_code == 206 and r.content == data[100:200]
+    assert r.headers["content-range"] == f"bytes 100-199/{len(data)}"
+    assert client.get(url, headers={"Range": "bytes=-10"}).content == data[-10:]
+    assert client.get(url, headers={"Range": f"bytes={len(data) - 5}-"}).content == data[-5:]
+    r = client.get(url, headers={"Range": f"bytes={len(data)}-"})
+    assert r.status_code == 416 and r.headers["content-range"] == f"bytes */{len(data)}"
+    assert client.get(url, headers={"Range": "bytes=0-1,5-6"}).status_code == 200  # multi-range: whole file
+
+
+def test_upload_errors(storage, seed):
+    dictation_id = seed().dictation_id
+    assert client.get(f"/dictations/{dictation_id}/audio").status_code == 404
+    assert client.post("/dictations/999999999/audio/uploads", json={}).status_code == 404
+    upload = client.post(f"/dictations/{dictation_id}/audio/uploads", json={"total_size": 10}).json()
+    url = f"/dictations/{dictation_id}/audio/uploads/{upload['upload_id']}"
+    assert client.patch(url, content=b"x" * 11, headers={"Upload-Offset": "0"}).status_code == 413
+    assert client.post(f"{url}/complete", json={}).status_code == 400
+    assert client.delete(url).status_code == 204
+    assert client.patch(url, content=b"x", headers={"Upload-Offset": "0"}).status_code == 409
+
+
+def test_upload_without_total_size_declares_its_final_chunk(storage, seed):
+    dictation_id = seed().dictation_id
+    data = bytes(range(256)) * (S3_MIN_PART_BYTES // 256) + b"tail" * 1000
+    upload = client.post(f"/dictations/{dictation_id}/audio/uploads", json={"filename": "note.mp3"}).json()
+    url = f"/dictations/{dictation_id}/audio/uploads/{upload['upload_id']}"
+    chunk = upload["min_chunk_bytes"] or S3_MIN_PART_BYTES
+    assert client.patch(url, content=data[:chunk], headers={"Upload-Offset": "0"}).status_code == 200
+    if isinstance(storage, ObjectStorage):
+        # A short chunk that is not declared final would leave a part below the minimum
+        r = client.patch(url, content=data[chunk:], headers={"Upload-Offset": str(chunk)})
+        assert r.status_code == 400
+
+    def tail():
+        yield data[chunk:]  # chunked transfer encoding: no Content-Length
+
+    r = client.patch(url, content=tail(), headers={"Upload-Offset": str(chunk), "Upload-Final": "true"})
+    assert r.status_code == 200, r.text
+    assert r.json()["received"] == r.json()["total_size"] == len(data)
+    assert client.patch(url, content=b"x", headers={"Upload-Offset": str(len(data))}).status_code == 413
+    assert client.post(f"{url}/complete", json={}).json()["size"] == len(data)
+    assert client.get(f"/dictations/{dictation_id}/audio").content == data
+
+
+def test_malformed_content_length_is_rejected(storage, seed):
+    dictation_id = seed().dictation_id
+    upload = client.post(f"/dictations/{dictation_id}/audio/uploads", json={}).json()
+    url = f"/dictations/{dictation_id}/audio/uploads/{upload['upload_id']}"
+    r = client.patch(url, headers={"Upload-Offset": "0", "Content-Length": "abc"})
+    assert r.status_code == 400
@@ -0,0 +1,26 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+from app.bootstrap import SCHEMA_VERSION, SchemaVersionError, bootstrap, verify_schema_version
+from app.main import app
+
+
+def test_bootstrap_is_idempotent_and_records_version(tmp_path):
+    fresh = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    with pytest.raises(SchemaVersionError):
+        verify_schema_version(fresh)
+
+    assert bootstrap(fresh) == SCHEMA_VERSION
+    assert bootstrap(fresh) == SCHEMA_VERSION
+    assert verify_schema_version(fresh) == SCHEMA_VERSION
+    indexes = {i["name"] for i in inspect(fresh).get_indexes("dictations")}
+    assert "ix_dictations_hospital_id_id" in indexes
+
+
+def test_startup_only_verifies_schema_and_reports_timings():
+    with TestClient(app) as client:
+        r = client.get("/admin/startup")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["schema_version"] == SCHEMA_VERSION
+    assert body["total_ms"] >= body["checks_ms"] >= 0
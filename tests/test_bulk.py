@@ -0,0 +1,56 @@
+import json
+import uuid
+from fastapi.testclient import TestClient
+from app import models
+from app.database import SessionLocal
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_bulk_create_json_array_reports_per_row_results():
+    codes = [f"BULK_{uuid.uuid4().hex[:8]}" for _ in range(3)]
+    rows = [
+        {"name": "Bulk A", "code": codes[0]},
+        {"code": codes[1]},  # missing required name
+        {"name": "Bulk C", "code": codes[2]},
+    ]
+    r = client.post("/hospitals/bulk", json=rows)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["received"] == 3
+    assert data["written"] == 2
+    assert data["failed"] == 1
+    assert [row["index"] for row in data["results"]] == [0, 1, 2]
+    assert data["results"][0]["id"] is not None
+    assert data["results"][1]["id"] is None and data["results"][1]["error"]
+    assert data["rows_per_sec"] > 0
+
+
+def test_bulk_ndjson_upserts_on_unique_key():
+    code = f"BULK_{uuid.uuid4().hex[:8]}"
+    body = json.dumps({"name": "First", "code": code}) + "\n"
+    r = client.post("/hospitals/bulk", content=body, headers={"content-type": "application/x-ndjson"})
+    assert r.status_code == 200
+    first_id = r.json()["results"][0]["id"]
+
+    body = json.dumps({"name": "Renamed", "code": code}) + "\n"
+    r2 = client.post("/hospitals/bulk", content=body, headers={"content-type": "application/x-ndjson"})
+    assert r2.status_code == 200
+    assert r2.json()["results"][0]["id"] == first_id
+
+
+def test_bulk_upsert_keeps_omitted_fields():
+    code = f"BULK_{uuid.uuid4().hex[:8]}"
+    r = client.post("/hospitals/bulk", json=[{"name": "First", "code": code, "city": "Pune"}])
+    hospital_id = r.json()["results"][0]["id"]
+    r = client.post("/hospitals/bulk", json=[{"name": "Renamed", "code": code}])
+    assert r.json()["results"][0]["id"] == hospital_id
+    with SessionLocal() as db:
+        hospital = db.get(models.Hospital, hospital_id)
+        assert (hospital.name, hospital.city) == ("Renamed", "Pune")
+
+
+def test_bulk_rejects_malformed_body():
+    r = client.post("/hospitals/bulk", content="{not json", headers={"content-type": "application/json"})
+    assert r.status_code == 400
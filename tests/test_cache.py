@@ -0,0 +1,78 @@
+import time
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from app.cache import LRUCache, MemoryStore, SharedCache, caches
+from app.database import engine
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_lru_evicts_least_recently_used_and_expires():
+    cache = LRUCache(maxsize=2, ttl=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", "a" was used more recently
+    assert cache.get("b") is None
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    info = cache.info()
+    assert info["hits"] == 1
+    assert info["misses"] == 2
+    assert info["evictions"] == 1
+    assert info["expirations"] == 1
+
+
+def test_shared_cache_round_trip_and_invalidation():
+    store = MemoryStore()
+    writer = SharedCache(store, ttl=60)
+    reader = SharedCache(store, ttl=60)  # e.g. another worker
+    writer.set("hospitals:1", {"id": 1, "name": "Shared"})
+    assert reader.get("hospitals:1") == {"id": 1, "name": "Shared"}
+    writer.delete("hospitals:1")
+    assert reader.get("hospitals:1") is None
+
+
+def test_entries_failing_the_valid_predicate_are_dropped_as_misses():
+    for cache in (LRUCache(maxsize=10, ttl=0), SharedCache(MemoryStore(), ttl=0)):
+        cache.set("doctors:1", [1, "compiled"])
+        assert cache.get("doctors:1", valid=lambda e: e[0] == 1) == [1, "compiled"]
+        assert cache.get("doctors:1", valid=lambda e: e[0] == 2) is None
+        assert cache.get("doctors:1") is None  # the stale entry is gone
+        info = cache.info()
+        assert (info["hits"], info["misses"]) == (1, 2)
+
+
+def test_router_reads_through_cache_and_update_invalidates():
+    r = client.post("/hospitals/", json={"name": "Cached", "code": f"CACHE_{uuid.uuid4().hex[:8]}"})
+    assert r.status_code == 201
+    hosp = r.json()
+    cache = caches["hospitals"]
+    cache.set(hosp["id"], {**hosp, "name": "From cache"})
+
+    r = client.get(f"/hospitals/{hosp['id']}")
+    assert r.status_code == 200
+    assert r.json()["name"] == "From cache"
+
+    assert client.put(f"/hospitals/{hosp['id']}", json={"name": "Renamed"}).status_code == 200
+    assert cache.get(hosp["id"]) is None
+
+    stats = client.get("/admin/cache").json()
+    assert stats["hospitals"]["hits"] >= 1
+    assert stats["hospitals"]["invalidations"] >= 1
+
+
+def test_get_after_update_reloads_through_the_get_proc():
+    if engine.dialect.name != "postgresql":
+        pytest.skip("GET /{id} requires the Get{Entity} stored procedure (PostgreSQL)")
+    r = client.post("/hospitals/", json={"name": "Cached", "code": f"CACHE_{uuid.uuid4().hex[:8]}"})
+    hosp = r.json()
+    assert client.get(f"/hospitals/{hosp['id']}").json()["name"] == "Cached"
+    assert caches["hospitals"].get(hosp["id"]) is not None
+
+    assert client.put(f"/hospitals/{hosp['id']}", json={"name": "Renamed"}).status_code == 200
+    r = client.get(f"/hospitals/{hosp['id']}")
+    assert r.status_code == 200
+    assert r.json()["name"] == "Renamed"
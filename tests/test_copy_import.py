@@ -0,0 +1,87 @@
+import io
+import json
+import uuid
+from app import models
+from app.copy_import import import_records, read_records
+from app.database import SessionLocal, engine
+
+
+def test_csv_import_inserts_updates_and_rejects(seed):
+    seeded = seed()
+    dictation_id, doctor_id = seeded.dictation_id, seeded.doctor_id
+    with SessionLocal() as db:
+        existing = models.SNOMEDAnnotation(dictation_id=dictation_id, doctor_id=doctor_id, snomed_concept_id=1, term="Old", category="finding")
+        db.add(existing)
+        db.commit()
+        existing_id = existing.id
+
+    data = "\n".join([
+        "id,dictation_id,doctor_id,snomed_concept_id,term,extra",
+        f",{dictation_id},{doctor_id},22298006,Myocardial infarction,\"{{\"\"rank\"\": 1}}\"",
+        f",{dictation_id},{doctor_id},38341003,Hypertension,",
+        f"{existing_id},,,,Updated,",
+        f",999999999,{doctor_id},1,Orphan,",
+        f",{dictation_id},{doctor_id},,Missing concept,",
+    ])
+    report = import_records(engine, "snomed_annotations", read_records(io.StringIO(data), "csv"), chunk_rows=2)
+    summary = report.summary()
+    assert (summary["received"], summary["inserted"], summary["updated"], summary["rejected"]) == (5, 2, 1, 2)
+    assert sorted(r["line"] for r in report.rejected) == [5, 6]
+
+    with SessionLocal() as db:
+        rows = db.query(models.SNOMEDAnnotation).filter_by(dictation_id=dictation_id).order_by(models.SNOMEDAnnotation.id).all()
+        assert [r.term for r in rows] == ["Updated", "Myocardial infarction", "Hypertension"]
+        assert rows[0].category == "finding" and rows[0].snomed_concept_id == 1  # COALESCE keeps unset columns
+        assert rows[1].extra == {"rank": 1}
+
+
+def test_ndjson_dictations_upsert_on_dictation_number(seed):
+    seeded = seed(dictations=0)
+    doctor_id, hospital_id, department_id = seeded.doctor_id, seeded.hospital_id, seeded.department_id
+    number = f"D-{uuid.uuid4().hex[:8]}"
+    base = {"hospital_id": hospital_id, "department_id": department_id, "doctor_id": doctor_id, "dictation_number": number}
+    lines = [
+        json.dumps({**base, "status": "recorded"}),
+        "not json",
+        json.dumps({**base, "status": "transcribed", "duration_sec": 42}),
+    ]
+    report = import_records(engine, "dictations", read_records(io.StringIO("\n".join(lines)), "ndjson"))
+    assert [r["line"] for r in report.rejected] == [2, 1]  # bad JSON, then superseded by line 3
+    assert report.inserted == 1
+
+    lines = [
+        json.dumps({**base, "status": "signed"}),
+        json.dumps({**base, "status": "recorded", "dictation_number": f"D-{uuid.uuid4().hex[:8]}"}),
+    ]
+    report = import_records(engine, "dictations", read_records(io.StringIO("\n".join(lines)), "ndjson"))
+    # The existing dictation_number is an update; the new one an insert
+    assert (report.inserted, report.updated) == (1, 1) and not report.rejected
+    with SessionLocal() as db:
+        rows = db.query(models.Dictation).filter_by(dictation_number=number).all()
+        assert len(rows) == 1
+        assert (rows[0].status, rows[0].duration_sec) == ("signed", None)
+
+
+def test_id_rows_that_would_take_another_rows_key_are_rejected(seed):
+    seeded = seed(dictations=0)
+    doctor_id, hospital_id, department_id = seeded.doctor_id, seeded.hospital_id, seeded.department_id
+    base = {"hospital_id": hospital_id, "department_id": department_id, "doctor_id": doctor_id, "status": "recorded"}
+    taken, fresh, claimed = (f"D-{uuid.uuid4().hex[:8]}" for _ in range(3))
+    with SessionLocal() as db:
+        rows = [models.Dictation(**base, dictation_number=taken)] + [models.Dictation(**base) for _ in range(3)]
+        db.add_all(rows)
+        db.commit()
+        ids = [row.id for row in rows]
+
+    records = [
+        (1, {**base, "dictation_number": fresh}),
+        (2, {"id": ids[1], "dictation_number": taken}),
+        (3, {"id": ids[2], "dictation_number": claimed}),
+        (4, {"id": ids[3], "dictation_number": claimed, "status": "signed"}),
+    ]
+    report = import_records(engine, "dictations", iter(records))
+    assert [r["line"] for r in report.rejected] == [2, 3]
+    assert (report.inserted, report.updated) == (1, 1)
+    with SessionLocal() as db:
+        assert [db.get(models.Dictation, i).dictation_number for i in ids] == [taken, None, None, claimed]
+        assert db.query(models.Dictation).filter_by(dictation_number=fresh).count() == 1
@@ -0,0 +1,32 @@
+from app import models
+from app.crud_plans import EntityPlan
+
+
+def test_plan_compiles_save_and_get_statements_once():
+    plan = EntityPlan(models.Hospital)
+    assert plan.save_proc == "SaveHospital"
+    assert plan.columns[0] == "name"
+    assert "id" not in plan.columns and "created_at" not in plan.columns
+    assert str(plan.save_stmt).startswith("SELECT * FROM SaveHospital(CAST(:p_id AS bigint), CAST(:p_name AS text)")
+    assert str(plan.get_stmt) == "SELECT * FROM GetHospital(CAST(:p_id AS bigint))"
+
+
+def test_cast_types_match_stored_proc_signatures():
+    stmt = str(EntityPlan(models.Dictation).save_stmt)
+    assert "CAST(:p_duration_sec AS integer)" in stmt
+    assert "CAST(:p_hospital_id AS bigint)" in stmt
+    assert "CAST(:p_date_of_birth AS date)" in str(EntityPlan(models.Patient).save_stmt)
+    # Photos live in doctor_photos, so no image bytes go through SaveDoctor
+    assert "p_photo" not in str(EntityPlan(models.Doctor).save_stmt)
+
+
+def test_bind_fills_every_proc_parameter():
+    plan = EntityPlan(models.Doctor)
+    params = plan.bind({"hospital_id": 1, "first_name": "Alice", "unknown": "ignored"}, item_id=7)
+    assert params["p_id"] == 7
+    assert params["p_hospital_id"] == 1
+    assert params["p_first_name"] == "Alice"
+    # fields absent from the payload (e.g. userid, custom_vocab) still bind, as NULL
+    assert params["p_userid"] is None
+    assert "p_unknown" not in params
+    assert len(params) == len(plan.columns) + 1
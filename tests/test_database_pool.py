@@ -0,0 +1,38 @@
+from fastapi.testclient import TestClient
+from app import database
+from app.database import PoolMetrics, engine_kwargs
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_engine_kwargs_apply_pool_settings_to_postgres_only():
+    pg = engine_kwargs("postgresql://u:p@localhost/db")
+    assert pg["echo"] is False
+    assert pg["pool_size"] == database.DB_POOL_SIZE
+    assert pg["max_overflow"] == database.DB_MAX_OVERFLOW
+    assert pg["pool_recycle"] == database.DB_POOL_RECYCLE
+    assert "statement_timeout" in pg["connect_args"]["options"]
+
+    lite = engine_kwargs("sqlite:///./test.db")
+    assert "pool_size" not in lite and "connect_args" not in lite
+
+
+def test_pool_metrics_histogram_and_peak():
+    metrics = PoolMetrics()
+    metrics.record_checkout(0.0005, 1)
+    metrics.record_checkout(0.2, 3)
+    metrics.record_timeout()
+    snap = metrics.snapshot(database.engine.pool)
+    assert snap["checkouts"] == 2
+    assert snap["timeouts"] == 1
+    assert snap["peak_checked_out"] == 3
+    assert snap["wait_histogram"]["<1ms"] == 1
+    assert snap["wait_histogram"]["<500ms"] == 1
+
+
+def test_db_pool_endpoint_reports_checkouts():
+    client.get("/hospitals/")
+    r = client.get("/admin/db-pool")
+    assert r.status_code == 200
+    assert r.json()["checkouts"] >= 1
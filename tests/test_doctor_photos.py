@@ -0,0 +1,87 @@
+import base64
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text
+from app import models
+from app.doctor_photos import ensure_doctor_photos, sniff_content_type
+from app.main import app
+
+client = TestClient(app)
+
+# 1x1 transparent PNG
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+
+def test_doctor_row_has_no_photo_column():
+    assert "photo" not in models.Doctor.__table__.c
+
+
+def test_put_get_and_delete_photo(seed):
+    doctor_id = seed(dictations=0).doctor_id
+    assert client.get(f"/doctors/{doctor_id}/photo").status_code == 404
+
+    r = client.put(f"/doctors/{doctor_id}/photo", content=PNG, headers={"Content-Type": "image/png"})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["content_type"] == "image/png" and body["size"] == len(PNG)
+    # 1x1 needs no thumbnail (and Pillow is optional)
+    assert body["thumbnail"] is False
+
+    r = client.get(f"/doctors/{doctor_id}/photo")
+    assert r.status_code == 200
+    assert r.content == PNG
+    assert r.headers["content-type"] == "image/png"
+    assert r.headers["etag"] == body["etag"]
+    assert "max-age" in r.headers["cache-control"]
+
+    r = client.get(f"/doctors/{doctor_id}/photo", headers={"If-None-Match": body["etag"]})
+    assert r.status_code == 304 and r.content == b""
+
+    # Without a stored thumbnail the photo itself is served
+    r = client.get(f"/doctors/{doctor_id}/photo", params={"size": "thumb"})
+    assert r.status_code == 200 and r.content == PNG
+
+    assert client.delete(f"/doctors/{doctor_id}/photo").status_code == 204
+    assert client.get(f"/doctors/{doctor_id}/photo").status_code == 404
+    assert client.delete(f"/doctors/{doctor_id}/photo").status_code == 404
+
+
+def test_put_rejects_non_images_and_unknown_doctors(seed):
+    doctor_id = seed(dictations=0).doctor_id
+    r = client.put(f"/doctors/{doctor_id}/photo", content=b"not an image", headers={"Content-Type": "image/png"})
+    assert r.status_code == 415
+    assert client.put("/doctors/999999999/photo", content=PNG).status_code == 404
+    assert client.put(f"/doctors/{doctor_id}/photo", headers={"Content-Length": "abc"}).status_code == 400
+
+
+def test_replacing_a_photo_changes_its_etag(seed):
+    doctor_id = seed(dictations=0).doctor_id
+    first = client.put(f"/doctors/{doctor_id}/photo", content=PNG).json()["etag"]
+    gif = b"GIF89a" + bytes(32)
+    second = client.put(f"/doctors/{doctor_id}/photo", content=gif).json()["etag"]
+    assert first != second
+    r = client.get(f"/doctors/{doctor_id}/photo", headers={"If-None-Match": first})
+    assert r.status_code == 200 and r.content == gif
+    assert r.headers["content-type"] == "image/gif"
+
+
+def test_sniff_content_type():
+    assert sniff_content_type(PNG) == "image/png"
+    assert sniff_content_type(b"\xff\xd8\xff\xe0rest") == "image/jpeg"
+    assert sniff_content_type(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == "image/webp"
+    assert sniff_content_type(b"%PDF-1.7") is None
+
+
+def test_legacy_photo_column_is_moved_out(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE doctors ADD COLUMN photo BLOB"))
+        conn.execute(text("INSERT INTO doctors (id, hospital_id, userid, photo) VALUES (1, 1, 1, :photo), (2, 1, 1, NULL)"), {"photo": PNG})
+        ensure_doctor_photos(conn)
+        ensure_doctor_photos(conn)  # idempotent once the column is gone
+    assert "photo" not in {c["name"] for c in inspect(engine).get_columns("doctors")}
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT doctor_id, content_type, data FROM doctor_photos")).all()
+    assert [(r.doctor_id, r.content_type, bytes(r.data)) for r in rows] == [(1, "image/png", PNG)]
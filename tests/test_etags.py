@@ -0,0 +1,62 @@
+import uuid
+from fastapi.testclient import TestClient
+from app import etags, models, schemas
+from app.database import SessionLocal
+from app.main import app
+
+client = TestClient(app)
+
+
+def current_etag(dictation_id):
+    with SessionLocal() as db:
+        return etags.row_etag(models.Dictation, db.get(models.Dictation, dictation_id))
+
+
+def test_if_none_match_matching():
+    assert not etags.matches(type("R", (), {"headers": {}})(), 'W/"a"')
+    req = type("R", (), {"headers": {"if-none-match": '"x", W/"a"'}})()
+    assert etags.matches(req, 'W/"a"')
+    assert not etags.matches(req, 'W/"b"')
+
+
+def test_conditional_get_single_dictation_returns_304_until_it_changes(seed):
+    dictation_id = seed(dictation_number=f"ETAG-{uuid.uuid4().hex[:8]}").dictation_id
+    etag = current_etag(dictation_id)
+
+    r = client.get(f"/dictations/{dictation_id}", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+    assert r.content == b""
+
+    assert client.put(f"/dictations/{dictation_id}", json={"status": "transcribed"}).status_code == 200
+    assert current_etag(dictation_id) != etag
+
+    r = client.get("/dictations/999999999", headers={"If-None-Match": etag})
+    assert r.status_code == 404
+
+
+def test_conditional_page_uses_version_probe(seed):
+    seeded = seed(dictation_number=f"ETAG-{uuid.uuid4().hex[:8]}")
+    hospital_id, dictation_id = seeded.hospital_id, seeded.dictation_id
+    r = client.get("/dictations/page", params={"hospital_id": hospital_id})
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+
+    r = client.get("/dictations/page", params={"hospital_id": hospital_id}, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+    client.put(f"/dictations/{dictation_id}", json={"status": "signed"})
+    r = client.get("/dictations/page", params={"hospital_id": hospital_id}, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+    assert r.json()["items"][0]["status"] == "signed"
+
+
+def test_unversioned_etag_covers_only_response_fields():
+    fields = etags.response_fields(schemas.UserOut)
+    user = models.User(id=1, name="ETag User", email="etag@example.com", password="old")
+    before = etags.row_etag(models.User, user, fields)
+    user.password = "new"
+    assert etags.row_etag(models.User, user, fields) == before
+    user.name = "Renamed"
+    assert etags.row_etag(models.User, user, fields) != before
@@ -0,0 +1,48 @@
+import csv
+import io
+import json
+from app import export, models
+from app.database import SessionLocal
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+def create_annotations(seed, count):
+    seeded = seed()
+    with SessionLocal() as db:
+        db.add_all([
+            models.SNOMEDAnnotation(dictation_id=seeded.dictation_id, doctor_id=seeded.doctor_id, snomed_concept_id=230690007 + i, term=f"Stroke {i}", extra={"i": i})
+            for i in range(count)
+        ])
+        db.commit()
+    return seeded.hospital_id
+
+
+def test_ndjson_export_streams_all_rows_in_batches(monkeypatch, seed):
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 2)
+    hospital_id = create_annotations(seed, 5)
+    create_annotations(seed, 1)  # another hospital, must not leak into the export
+    r = client.get("/snomed_annotations/export", params={"hospital_id": hospital_id})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["term"] for row in rows] == [f"Stroke {i}" for i in range(5)]
+    assert rows[0]["extra"] == {"i": 0}
+
+    r = client.get("/snomed_annotations/export", params={"hospital_id": hospital_id, "after_id": rows[2]["id"]})
+    assert len(r.text.splitlines()) == 2
+
+
+def test_csv_export_and_created_at_range(seed):
+    hospital_id = create_annotations(seed, 3)
+    r = client.get("/snomed_annotations/export", params={"hospital_id": hospital_id, "format": "csv"})
+    assert r.status_code == 200
+    reader = list(csv.DictReader(io.StringIO(r.text)))
+    assert len(reader) == 3
+    assert json.loads(reader[0]["extra"]) == {"i": 0}
+
+    r = client.get("/snomed_annotations/export", params={"hospital_id": hospital_id, "created_from": "2999-01-01T00:00:00"})
+    assert r.text == ""
+    assert client.get("/snomed_annotations/export", params={"format": "xml"}).status_code == 422
@@ -0,0 +1,58 @@
+from decimal import Decimal
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app import models, schemas
+from app.database import SessionLocal
+from app.fast_json import RowEncoder, dumps
+from app.main import app
+from app.router_factory import create_crud_router
+
+client = TestClient(app)
+
+# Same entity through the default (validating) path, for comparison
+plain_app = FastAPI()
+plain_app.include_router(create_crud_router(
+    model=models.SNOMEDAnnotation,
+    create_schema=schemas.SNOMEDAnnotationCreate,
+    update_schema=schemas.SNOMEDAnnotationUpdate,
+    out_schema=schemas.SNOMEDAnnotationOut,
+    prefix="snomed_annotations",
+))
+plain_client = TestClient(plain_app)
+
+
+def create_annotations(seed, count):
+    seeded = seed()
+    with SessionLocal() as db:
+        db.add_all([
+            models.SNOMEDAnnotation(
+                dictation_id=seeded.dictation_id, doctor_id=seeded.doctor_id, snomed_concept_id=22298006 + i,
+                term=f"Term {i}", confidence=Decimal("0.875"), extra={"rank": i},
+            )
+            for i in range(count)
+        ])
+        db.commit()
+    return seeded.hospital_id
+
+
+def test_row_encoder_projects_out_schema_fields():
+    encoder = RowEncoder(schemas.HospitalOut)
+    row = encoder.row({"id": 1, "name": "A", "password": "secret"})
+    assert "password" not in row and row["code"] is None
+    assert dumps({"c": Decimal("0.5")}) == b'{"c":0.5}'
+
+
+def test_fast_json_matches_the_validating_path(seed):
+    hospital_id = create_annotations(seed, 5)
+    params = {"hospital_id": hospital_id, "limit": 3}
+    fast = client.get("/snomed_annotations/page", params=params)
+    plain = plain_client.get("/snomed_annotations/page", params=params)
+    assert fast.status_code == plain.status_code == 200
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.headers["etag"] == plain.headers["etag"]
+    assert fast.json() == plain.json()
+    assert len(fast.json()["items"]) == 3
+
+    fast = client.get("/snomed_annotations/", params={"hospital_id": hospital_id})
+    plain = plain_client.get("/snomed_annotations/", params={"hospital_id": hospital_id})
+    assert fast.json() == plain.json()
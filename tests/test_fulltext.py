@@ -0,0 +1,142 @@
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app import models
+from app.database import SessionLocal, engine
+from app.fulltext import ensure_fulltext
+from app.main import app
+
+client = TestClient(app)
+
+
+def add_transcription(db, seeded, text):
+    dictation = models.Dictation(hospital_id=seeded.hospital_id, department_id=seeded.department_id,
+                                 doctor_id=seeded.doctor_id, status="transcribed")
+    db.add(dictation)
+    db.flush()
+    row = models.Transcription(dictation_id=dictation.id, doctor_id=seeded.doctor_id, raw_text=text)
+    db.add(row)
+    db.flush()
+    return row.id
+
+
+def search(**params):
+    r = client.get("/search", params=params)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_search_ranks_highlights_and_filters_transcriptions(seed):
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    a, b = seed(dictations=0), seed(dictations=0)
+    with SessionLocal() as db:
+        once = add_transcription(db, a, f"Chest film shows {word} in the left lower lobe, otherwise clear.")
+        twice = add_transcription(db, a, f"{word} {word} pattern noted; follow-up {word} advised.")
+        other = add_transcription(db, b, f"Prior study also mentions {word}.")
+        add_transcription(db, b, "Unrelated normal study.")
+        db.commit()
+    hospital_a, doctor_b = a.hospital_id, b.doctor_id
+
+    body = search(q=word)
+    assert [item["id"] for item in body["items"]][0] == twice  # more occurrences rank higher
+    assert {item["id"] for item in body["items"]} == {once, twice, other}
+    assert body["next_cursor"] is None
+    assert f"<mark>{word}</mark>" in body["items"][0]["snippet"]
+
+    assert {item["id"] for item in search(q=word, hospital_id=hospital_a)["items"]} == {once, twice}
+    assert [item["id"] for item in search(q=f"{word} prior", doctor_id=doctor_b)["items"]] == [other]
+    # Every word must match
+    assert search(q=f"{word} pneumothorax")["items"] == []
+
+
+def test_search_pages_through_results_with_a_cursor(seed):
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    seeded = seed(dictations=0)
+    with SessionLocal() as db:
+        ids = {add_transcription(db, seeded, f"Finding {word} number {i}.") for i in range(5)}
+        db.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": word, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        body = search(**params)
+        assert len(body["items"]) <= 2
+        seen.extend(item["id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) and set(seen) == ids
+    assert client.get("/search", params={"q": word, "cursor": "nope"}).status_code == 400
+
+
+def test_search_index_follows_updates_and_deletes(seed):
+    word, replacement = f"zq{uuid.uuid4().hex[:8]}", f"zq{uuid.uuid4().hex[:8]}"
+    seeded = seed(dictations=0)
+    with SessionLocal() as db:
+        item_id = add_transcription(db, seeded, f"Initial {word} report.")
+        db.commit()
+    assert [item["id"] for item in search(q=word)["items"]] == [item_id]
+
+    r = client.put(f"/transcriptions/{item_id}", json={"raw_text": f"Corrected {replacement} report."})
+    assert r.status_code == 200, r.text
+    assert search(q=word)["items"] == []
+    assert [item["id"] for item in search(q=replacement)["items"]] == [item_id]
+
+    with SessionLocal() as db:
+        db.delete(db.get(models.Transcription, item_id))
+        db.commit()
+    assert search(q=replacement)["items"] == []
+
+
+def test_bootstrap_rebuilds_the_fts_index_only_when_it_is_out_of_sync(seed):
+    if engine.dialect.name != "sqlite":
+        pytest.skip("FTS5 tables are SQLite only")
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    seeded = seed(dictations=0)
+    with SessionLocal() as db:
+        item_id = add_transcription(db, seeded, f"Indexed {word} report.")
+        db.commit()
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with engine.begin() as conn:
+            ensure_fulltext(conn)
+        assert not [s for s in statements if "'rebuild'" in s]
+        with engine.begin() as conn:
+            conn.exec_driver_sql("INSERT INTO transcriptions_fts(transcriptions_fts) VALUES ('delete-all')")
+        assert search(q=word)["items"] == []
+        with engine.begin() as conn:
+            ensure_fulltext(conn)
+        assert [s for s in statements if "'rebuild'" in s]
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert [item["id"] for item in search(q=word)["items"]] == [item_id]
+
+
+def test_search_clinical_documents_and_rejects_unknown_entities(seed):
+    word = f"zq{uuid.uuid4().hex[:8]}"
+    seeded = seed(status="signed")
+    with SessionLocal() as db:
+        patient = models.Patient(hospital_id=seeded.hospital_id, first_name="A", last_name="B")
+        db.add(patient)
+        db.flush()
+        document = models.ClinicalDocument(dictation_id=seeded.dictation_id, hospital_id=seeded.hospital_id,
+                                           department_id=seeded.department_id, doctor_id=seeded.doctor_id,
+                                           patient_id=patient.id, status="final", final_text=f"Assessment: {word} resolved.")
+        db.add(document)
+        db.commit()
+        document_id = document.id
+
+    body = search(q=word, entity="clinical_documents")
+    assert [item["id"] for item in body["items"]] == [document_id]
+    assert search(q=word)["items"] == []  # transcriptions are a separate index
+    assert client.get("/search", params={"q": word, "entity": "patients"}).status_code == 400
+    assert search(q="!!!")["items"] == []
@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import text
+from app import models
+from app.database import engine
+
+# (table, leading columns) of every hot lookup; each must be served by an index
+HOT_PATHS = [
+    ("departments", ["hospital_id", "id"]),
+    ("doctors", ["hospital_id", "id"]),
+    ("patients", ["hospital_id", "id"]),
+    ("encounters", ["hospital_id", "id"]),
+    ("encounters", ["hospital_id", "created_at"]),
+    ("encounters", ["patient_id"]),
+    ("dictations", ["hospital_id", "id"]),
+    ("dictations", ["hospital_id", "created_at"]),
+    ("dictations", ["doctor_id", "id"]),
+    ("dictations", ["patient_id"]),
+    ("dictations", ["encounter_id"]),
+    ("transcriptions", ["dictation_id"]),
+    ("transcriptions", ["doctor_id", "id"]),
+    ("snomed_annotations", ["dictation_id"]),
+    ("snomed_annotations", ["snomed_concept_id"]),
+    ("snomed_annotations", ["doctor_id", "id"]),
+    ("clinical_documents", ["hospital_id", "id"]),
+    ("clinical_documents", ["hospital_id", "created_at"]),
+    ("clinical_documents", ["dictation_id"]),
+    ("clinical_documents", ["patient_id"]),
+    ("snomed_descriptions", ["concept_id"]),
+    ("snomed_is_a", ["destination_id"]),
+    ("snomed_closure", ["descendant_id"]),
+]
+
+# Queries the routers issue; the plan must not fall back to a full scan
+HOT_QUERIES = [
+    "SELECT * FROM dictations WHERE hospital_id = 1 AND id > 0 ORDER BY id LIMIT 100",
+    "SELECT * FROM dictations WHERE hospital_id = 1 AND created_at >= '2024-01-01'",
+    "SELECT * FROM transcriptions WHERE dictation_id = 1",
+    "SELECT * FROM snomed_annotations WHERE snomed_concept_id = 22298006",
+    "SELECT * FROM snomed_annotations WHERE dictation_id IN (SELECT id FROM dictations WHERE hospital_id = 1)",
+    "SELECT * FROM snomed_annotations WHERE snomed_concept_id IN (SELECT descendant_id FROM snomed_closure WHERE ancestor_id = 73211009)",
+    "SELECT * FROM clinical_documents WHERE patient_id = 1",
+    "SELECT * FROM doctors WHERE hospital_id = 1 AND is_active = true",
+]
+
+
+def _leading_columns(table):
+    return [[c.name for c in index.columns] for index in models.Base.metadata.tables[table].indexes]
+
+
+@pytest.mark.parametrize("table,columns", HOT_PATHS)
+def test_hot_path_is_indexed(table, columns):
+    assert any(cols[:len(columns)] == columns for cols in _leading_columns(table)), f"{table}{columns} lost its index"
+
+
+def test_active_doctors_partial_index():
+    index = next(i for i in models.Doctor.__table__.indexes if i.name == "ix_doctors_hospital_id_active")
+    assert index.dialect_options["postgresql"]["where"] is not None
+
+
+@pytest.mark.parametrize("sql", HOT_QUERIES)
+def test_hot_query_plan_uses_index(sql):
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            steps = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql.replace('= true', '= 1')}"))]
+            # SEARCH = index lookup; SCAN = reads the whole table (or a whole index)
+            assert not any(step.startswith("SCAN") for step in steps), steps
+        elif engine.dialect.name == "postgresql":
+            # Empty test tables favour seq scans; disable them so only a missing index can cause one
+            conn.execute(text("SET LOCAL enable_seqscan = off"))
+            plan = "\n".join(row[0] for row in conn.execute(text(f"EXPLAIN {sql}")))
+            assert "Seq Scan" not in plan, plan
+        else:
+            pytest.skip(f"No plan check for {engine.dialect.name}")
@@ -0,0 +1,129 @@
+from fastapi.testclient import TestClient
+from app import jobs, models
+from app.database import SessionLocal
+from app.jobs import claim, process, reclaim_stale, run_pool, run_worker, stub_transcriber
+from app.main import app
+
+client = TestClient(app)
+
+AUDIO_PATH = "dictations/test.wav"
+
+
+def dictation_state(dictation_id):
+    with SessionLocal() as db:
+        status = db.get(models.Dictation, dictation_id).status
+        texts = [t.raw_text for t in db.query(models.Transcription).filter_by(dictation_id=dictation_id)]
+        return status, texts
+
+
+def failing_for(dictation_id, times):
+    calls = []
+
+    def transcriber(request):
+        if request["id"] == dictation_id and len(calls) < times:
+            calls.append(request["id"])
+            raise RuntimeError("model server unavailable")
+        return stub_transcriber(request)
+
+    return transcriber
+
+
+def test_enqueue_and_transcribe(seed):
+    dictation_id = seed(audio_path=AUDIO_PATH).dictation_id
+    r = client.post(f"/dictations/{dictation_id}/transcription-jobs")
+    assert r.status_code == 202, r.text
+    job = r.json()
+    assert job["status"] == "queued" and job["attempts"] == 0
+    # At most one active job per dictation
+    assert client.post(f"/dictations/{dictation_id}/transcription-jobs").json()["id"] == job["id"]
+    assert dictation_state(dictation_id) == ("queued", [])
+    assert client.get("/admin/transcription-jobs").json()["queued"] >= 1
+
+    run_worker(stub_transcriber, idle_exit=True)
+
+    job = client.get(f"/transcription-jobs/{job['id']}").json()
+    assert job["status"] == "done" and job["attempts"] == 1 and job["transcription_id"]
+    expected = stub_transcriber({"id": dictation_id, "audio_path": AUDIO_PATH})["raw_text"]
+    assert dictation_state(dictation_id) == ("transcribed", [expected])
+
+
+def test_enqueue_requires_audio(seed):
+    assert client.post(f"/dictations/{seed().dictation_id}/transcription-jobs").status_code == 409
+    assert client.post("/dictations/999999999/transcription-jobs").status_code == 404
+
+
+def test_failed_attempt_is_retried_after_backoff(monkeypatch, seed):
+    monkeypatch.setattr(jobs, "JOB_BACKOFF_BASE_SEC", 0)
+    dictation_id = seed(audio_path=AUDIO_PATH).dictation_id
+    client.post(f"/dictations/{dictation_id}/transcription-jobs")
+    run_worker(failing_for(dictation_id, 1), idle_exit=True)
+    job = client.get(f"/dictations/{dictation_id}/transcription-jobs").json()[0]
+    assert job["status"] == "done" and job["attempts"] == 2
+    assert dictation_state(dictation_id)[0] == "transcribed"
+
+
+def test_job_fails_after_max_attempts(monkeypatch, seed):
+    monkeypatch.setattr(jobs, "JOB_BACKOFF_BASE_SEC", 0)
+    monkeypatch.setattr(jobs, "JOB_MAX_ATTEMPTS", 2)
+    dictation_id = seed(audio_path=AUDIO_PATH).dictation_id
+    client.post(f"/dictations/{dictation_id}/transcription-jobs")
+    run_worker(failing_for(dictation_id, 10), idle_exit=True)
+    job = client.get(f"/dictations/{dictation_id}/transcription-jobs").json()[0]
+    assert job["status"] == "failed" and job["attempts"] == 2
+    assert "model server unavailable" in job["last_error"]
+    assert dictation_state(dictation_id) == ("failed", [])
+    # A new job can be queued once the previous one has finished
+    assert client.post(f"/dictations/{dictation_id}/transcription-jobs").json()["id"] != job["id"]
+
+
+def test_expired_claim_is_reclaimed_and_the_old_worker_cannot_finish(seed):
+    run_worker(stub_transcriber, idle_exit=True)  # drain jobs left by other tests
+    dictation_id = seed(audio_path=AUDIO_PATH).dictation_id
+    client.post(f"/dictations/{dictation_id}/transcription-jobs")
+    with SessionLocal() as db:
+        [job] = claim(db, "worker-a", limit=10)
+        assert claim(db, "worker-b") == []
+        assert dictation_state(dictation_id)[0] == "transcribing"
+        assert reclaim_stale(db, lease_sec=-1) == 1
+        assert process(db, job, stub_transcriber, "worker-a") == "lost"
+        [again] = claim(db, "worker-b")
+        assert again.id == job.id and again.attempts == 2
+        assert process(db, again, stub_transcriber, "worker-b") == "done"
+    assert dictation_state(dictation_id)[0] == "transcribed"
+    assert len(dictation_state(dictation_id)[1]) == 1
+
+
+def test_enqueue_recorded_and_process_pool(seed):
+    ids = seed(dictations=4, audio_path=AUDIO_PATH).dictation_ids
+    no_audio = seed().dictation_id
+    with SessionLocal() as db:
+        assert jobs.enqueue_recorded(db) >= 4
+    assert run_pool(workers=2, idle_exit=True) >= 4
+    for dictation_id in ids:
+        assert dictation_state(dictation_id)[0] == "transcribed"
+    assert dictation_state(no_audio) == ("recorded", [])
+
+
+def test_failed_store_releases_the_job(monkeypatch, seed):
+    monkeypatch.setattr(jobs, "JOB_BACKOFF_BASE_SEC", 0)
+    run_worker(stub_transcriber, idle_exit=True)  # drain jobs left by other tests
+    no_text, deleted = seed(dictations=2, audio_path=AUDIO_PATH).dictation_ids
+    for dictation_id in (no_text, deleted):
+        client.post(f"/dictations/{dictation_id}/transcription-jobs")
+
+    def transcriber(request):
+        if request["id"] == deleted:
+            with SessionLocal() as db:
+                db.delete(db.get(models.Dictation, deleted))
+                db.commit()
+            return stub_transcriber(request)
+        return {"raw_text": None}
+
+    with SessionLocal() as db:
+        claimed = {job.dictation_id: job for job in claim(db, "worker-a", limit=10)}
+        assert process(db, claimed[no_text], transcriber, "worker-a") == "queued"
+        # The job goes with its dictation where foreign keys cascade (PostgreSQL)
+        assert process(db, claimed[deleted], transcriber, "worker-a") in ("queued", "lost")
+        job = db.get(models.TranscriptionJob, claimed[no_text].id)
+        assert job.locked_by is None and "IntegrityError" in job.last_error
+    assert dictation_state(no_text) == ("queued", [])
@@ -0,0 +1,51 @@
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.pagination import decode_cursor, encode_cursor
+
+client = TestClient(app)
+
+
+def create_hospital():
+    r = client.post("/hospitals/", json={"name": "Paging Hospital", "code": f"PAGE_{uuid.uuid4().hex[:8]}"})
+    assert r.status_code == 201
+    return r.json()
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor(42)) == 42
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_keyset_pages_are_stable_and_scoped_to_hospital():
+    hosp = create_hospital()
+    other = create_hospital()
+    client.post("/patients/", json={"hospital_id": other["id"], "first_name": "Other"})
+    created = []
+    for i in range(5):
+        r = client.post("/patients/", json={"hospital_id": hosp["id"], "first_name": f"P{i}"})
+        assert r.status_code == 201
+        created.append(r.json()["id"])
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "hospital_id": hosp["id"]}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/patients/page", params=params)
+        assert r.status_code == 200
+        body = r.json()
+        seen.extend(p["id"] for p in body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted(created)
+
+
+def test_page_rejects_bad_cursor_and_unsupported_filter():
+    assert client.get("/patients/page", params={"cursor": "%%%"}).status_code == 400
+    assert client.get("/users/page", params={"hospital_id": 1}).status_code == 400
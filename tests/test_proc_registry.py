@@ -0,0 +1,51 @@
+from app.proc_registry import ProcRegistry
+
+
+class FakeConn:
+    """Stands in for a Session/Connection; counts catalog round trips."""
+
+    def __init__(self, names):
+        self.names = names
+        self.calls = 0
+
+    def execute(self, stmt):
+        self.calls += 1
+        return [(n,) for n in self.names]
+
+
+def test_lookups_are_served_from_memory():
+    conn = FakeConn(["savehospital", "gethospital"])
+    registry = ProcRegistry(ttl=0)
+
+    assert registry.exists(conn, "SaveHospital")
+    assert registry.exists(conn, "GetHospital")
+    assert not registry.exists(conn, "SaveClinic")
+    assert conn.calls == 1
+
+    stats = registry.stats()
+    assert stats["refreshes"] == 1
+    assert stats["misses"] == 1
+    assert stats["hits"] == 2
+
+
+def test_invalidate_and_ttl_trigger_reload():
+    conn = FakeConn(["savehospital"])
+    registry = ProcRegistry(ttl=0)
+    assert not registry.exists(conn, "GetHospital")
+
+    conn.names.append("gethospital")
+    registry.invalidate()
+    assert registry.exists(conn, "GetHospital")
+    assert conn.calls == 2
+
+    expiring = ProcRegistry(ttl=1e-9)
+    expiring.exists(conn, "GetHospital")
+    expiring.exists(conn, "GetHospital")
+    assert expiring.refreshes == 2
+
+
+def test_rejects_non_identifiers_without_touching_catalog():
+    conn = FakeConn(["savehospital"])
+    registry = ProcRegistry()
+    assert not registry.exists(conn, "SaveHospital; DROP TABLE hospitals")
+    assert conn.calls == 0
@@ -0,0 +1,132 @@
+import os
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app import models
+from app.database import SessionLocal, engine
+from app.main import app
+from app.snomed import ConceptIndex, load_rf2, reload_concept_index
+from app.snomed_search import TermIndex, escape_like, reload_search_index
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "snomed")
+
+client = TestClient(app)
+
+
+def load_fixture():
+    stats = load_rf2(FIXTURES, engine)
+    reload_concept_index()
+    reload_search_index()
+    return stats
+
+
+def test_rf2_loader_keeps_active_components_only():
+    stats = load_fixture()
+    assert (stats["concepts"], stats["is_a"]) == (10, 10)
+    assert stats["closure"] == 41  # 10 self pairs + 31 ancestor pairs
+    assert stats["descriptions"] == 25
+    # Idempotent: a reload replaces the previous release
+    assert load_fixture()["concepts"] == 10
+
+
+def test_concept_lookup_uses_language_refset_preferred_term():
+    load_fixture()
+    r = client.get("/snomed/concepts/22298006")
+    assert r.status_code == 200
+    body = r.json()
+    assert body["preferred_term"] == "Myocardial infarction"
+    assert body["fsn"] == "Myocardial infarction (disorder)"
+    assert [p["id"] for p in body["parents"]] == [251061000, 414545008]
+    # No preferred synonym in the refset: first synonym
+    assert client.get("/snomed/concepts/230690007").json()["preferred_term"] == "Cerebrovascular accident"
+    assert client.get("/snomed/concepts/999000001").status_code == 404
+
+
+def test_ancestors_are_nearest_first_and_unique():
+    load_fixture()
+    r = client.get("/snomed/concepts/22298006/ancestors")
+    assert r.status_code == 200
+    ids = [a["id"] for a in r.json()["ancestors"]]
+    assert ids[:2] == [251061000, 414545008]
+    assert ids.index(404684003) < ids.index(64572001)  # reached through the shorter path first
+    assert len(ids) == len(set(ids)) == 7
+    assert client.get("/snomed/concepts/138875005/ancestors").json()["ancestors"] == []
+    assert client.get("/snomed/concepts/1/ancestors").status_code == 404
+
+
+def test_concept_index_without_database():
+    index = ConceptIndex([(1, "Root", "Root (root)"), (5, "Child", "Child (x)")], [(5, 1), (5, 99)])
+    assert index.position(3) is None
+    assert index.concept(5)["parents"] == [{"id": 1, "preferred_term": "Root"}]
+    assert index.ancestors(5) == [{"id": 1, "preferred_term": "Root"}]
+
+
+def search(**params):
+    r = client.get("/snomed/search", params=params)
+    assert r.status_code == 200
+    return r.json()["results"]
+
+
+def test_search_ranks_prefix_word_prefix_and_fuzzy_matches():
+    load_fixture()
+    results = search(q="myocardial")
+    assert [r["concept_id"] for r in results] == [251061000, 22298006]  # both preferred: shorter first
+    assert results[1]["preferred_term"] == "Myocardial infarction"
+    # Word prefix, any order
+    assert search(q="infarc myo")[0]["term"] == "Myocardial infarction"
+    # A typo still finds the concept through trigrams
+    fuzzy = search(q="hypertensiv disordr")
+    assert fuzzy[0]["concept_id"] == 38341003 and fuzzy[0]["match"] == "fuzzy"
+    assert search(q="stro", limit=1) == [{"concept_id": 230690007, "term": "Stroke", "match": "prefix",
+                                           "source": "snomed", "score": 1.0, "preferred_term": "Cerebrovascular accident"}]
+    assert client.get("/snomed/search", params={"q": "x", "limit": 500}).status_code == 422
+
+
+def test_search_includes_doctor_custom_vocab_synonyms(seed):
+    load_fixture()
+    doctor_id = seed(dictations=0, doctor={"custom_vocab": {"synonyms": {"Heart event": 22298006, "bad": "x"}}}).doctor_id
+
+    results = search(q="heart", doctor_id=doctor_id)
+    assert results[0] == {"concept_id": 22298006, "term": "Heart event", "match": "prefix", "source": "doctor",
+                          "score": 1.0, "preferred_term": "Myocardial infarction"}
+    # "Heart attack" (shorter) before "Heart disease", both before the word-prefix match
+    assert [r["concept_id"] for r in search(q="heart")] == [22298006, 56265001, 414545008]
+    assert client.get("/snomed/search", params={"q": "heart", "doctor_id": 999999}).status_code == 404
+
+
+def test_term_index_limits_and_normalization():
+    index = TermIndex([(1, "Type-2 diabetes", "Type 2 diabetes", True), (2, "Diabetic foot", "Diabetic foot", True)])
+    assert [r["concept_id"] for r in index.search("TYPE 2")] == [1]
+    assert [r["concept_id"] for r in index.search("diab", limit=1)] == [2]  # shorter term first
+    assert index.search("  ") == []
+
+
+def test_descendant_of_filters_annotations_and_dictations_through_the_closure(seed):
+    load_fixture()
+    seeded = seed(dictations=3)
+    with SessionLocal() as db:
+        for dictation_id, concept_id in zip(seeded.dictation_ids, (22298006, 38341003, 230690007)):
+            db.add(models.SNOMEDAnnotation(dictation_id=dictation_id, doctor_id=seeded.doctor_id, snomed_concept_id=concept_id, term="t"))
+        db.commit()
+    hospital_id, dictation_ids = seeded.hospital_id, seeded.dictation_ids
+
+    # Heart disease: myocardial infarction (via ischemic heart disease), not hypertension or stroke
+    r = client.get("/snomed_annotations/", params={"descendant_of": 56265001, "hospital_id": hospital_id})
+    assert r.status_code == 200
+    assert [a["snomed_concept_id"] for a in r.json()] == [22298006]
+    # Disorder of cardiovascular system covers both heart disease and hypertension; self included
+    r = client.get("/snomed_annotations/page", params={"descendant_of": 49601007, "hospital_id": hospital_id})
+    assert sorted(a["snomed_concept_id"] for a in r.json()["items"]) == [22298006, 38341003]
+    r = client.get("/dictations/", params={"descendant_of": 64572001, "hospital_id": hospital_id})
+    assert [d["id"] for d in r.json()] == dictation_ids
+    r = client.get("/snomed_annotations/export", params={"descendant_of": 230690007, "hospital_id": hospital_id})
+    assert len(r.text.splitlines()) == 1
+    assert client.get("/hospitals/", params={"descendant_of": 64572001}).status_code == 400
+
+
+def test_escape_like_makes_wildcards_literal():
+    assert escape_like(r"50%_off\x") == r"50\%\_off\\x"
+    # Same LIKE ... ESCAPE semantics as the pg_trgm backend's ILIKE
+    match = text("SELECT :term LIKE :pattern ESCAPE '\\'")
+    with engine.connect() as conn:
+        assert conn.execute(match, {"term": "a_b", "pattern": f"%{escape_like('_')}%"}).scalar()
+        assert not conn.execute(match, {"term": "abc", "pattern": f"%{escape_like('_')}%"}).scalar()
@@ -0,0 +1,136 @@
+from sqlalchemy import update
+from app import models
+from app.database import SessionLocal
+from app.snomed import SYNONYM
+from app.tagger import DictionaryTagger, WordAutomaton, run_stage, tokenize
+
+MI, INFARCTION, CHEST_PAIN, HTN, ACS = 910000001, 910000002, 910000003, 910000004, 910000005
+
+ROWS = [
+    (MI, "Myocardial infarction", True, "Myocardial infarction (disorder)"),
+    (MI, "Heart attack", False, "Myocardial infarction (disorder)"),
+    (INFARCTION, "Infarction", True, "Infarction (morphologic abnormality)"),
+    (CHEST_PAIN, "Chest pain", True, "Chest pain (finding)"),
+    (HTN, "Hypertensive disorder", True, "Hypertensive disorder (disorder)"),
+    (HTN, "HT", False, "Hypertensive disorder (disorder)"),
+    (ACS, "Acute coronary syndrome", True, "Acute coronary syndrome (disorder)"),
+]
+
+
+def spans(tagger, text, synonyms=()):
+    return [(s["term"], s["concept_id"]) for s in tagger.tag(text, synonyms)]
+
+
+def test_automaton_finds_whole_word_matches_in_one_pass():
+    automaton = WordAutomaton([(("a", "b", "c"), "abc"), (("b", "c"), "bc"), (("c",), "c"), (("b", "d"), "bd")])
+    found = list(automaton.matches("x a b c b d".split()))
+    # Every pattern ending at each word, longest first, found through failure links
+    assert found == [(1, 3, "abc"), (2, 3, "bc"), (3, 3, "c"), (4, 5, "bd")]
+    assert list(automaton.matches("a b x c".split())) == [(3, 3, "c")]
+
+
+def test_dictionary_tagger_prefers_leftmost_longest_spans():
+    tagger = DictionaryTagger(ROWS)
+    text = "Pt with acute myocardial  infarction, no chest-pain; HT noted. Heart attacks denied."
+    tagged = tagger.tag(text)
+    assert [(s["term"], s["concept_id"]) for s in tagged] == [
+        ("myocardial  infarction", MI), ("chest-pain", CHEST_PAIN),
+    ]
+    first = tagged[0]
+    assert text[first["start_char"]:first["end_char"]] == "myocardial  infarction"
+    assert first["category"] == "disorder" and first["confidence"] == 0.9
+    # Terms shorter than TAGGER_MIN_TERM_CHARS ("HT") and partial words ("attacks") do not match
+    assert ("HT", HTN) not in spans(tagger, text)
+    assert spans(tagger, "old infarction") == [("infarction", INFARCTION)]
+
+
+def test_shorter_match_is_kept_next_to_an_overlapping_longer_one():
+    tagger = DictionaryTagger([
+        (CHEST_PAIN, "Chest pain", True, "Chest pain (finding)"),
+        (MI, "Pain radiating", True, "Pain radiating (finding)"),
+        (HTN, "Radiating", True, "Radiating (qualifier value)"),
+    ])
+    assert spans(tagger, "chest pain radiating") == [("chest pain", CHEST_PAIN), ("radiating", HTN)]
+
+
+def test_doctor_synonyms_extend_and_override_the_dictionary():
+    tagger = DictionaryTagger(ROWS)
+    synonyms = [("MI", MI), ("infarction", MI), ("bp high", HTN)]
+    assert spans(tagger, "MI with old infarction, BP high", synonyms) == [
+        ("MI", MI), ("infarction", MI), ("BP high", HTN),
+    ]
+    tagged = tagger.tag("MI", synonyms)[0]
+    assert tagged["confidence"] == 0.95 and tagged["category"] == "disorder"
+
+
+def test_tokenize_keeps_offsets():
+    assert tokenize("Chest-pain, 2d") == [("chest", 0, 5), ("pain", 6, 10), ("2d", 12, 14)]
+
+
+def seed_dictionary():
+    with SessionLocal() as db:
+        for concept_id in {r[0] for r in ROWS}:
+            fsn = next(r[3] for r in ROWS if r[0] == concept_id)
+            db.merge(models.SnomedConcept(id=concept_id, fsn=fsn, preferred_term=fsn.split(" (")[0]))
+        for i, (concept_id, term, preferred, _) in enumerate(ROWS):
+            db.merge(models.SnomedDescription(id=920000000 + i, concept_id=concept_id, term=term, type_id=SYNONYM, preferred=preferred))
+        db.commit()
+
+
+def create_transcriptions(seed, texts, custom_vocab=None):
+    seeded = seed(doctor={"custom_vocab": custom_vocab}, status="transcribed")
+    with SessionLocal() as db:
+        rows = [models.Transcription(dictation_id=seeded.dictation_id, doctor_id=seeded.doctor_id, raw_text=text) for text in texts]
+        db.add_all(rows)
+        db.commit()
+        return [row.id for row in rows]
+
+
+def annotations(transcription_id):
+    with SessionLocal() as db:
+        return [
+            (a.term, a.snomed_concept_id, a.start_char, a.end_char, a.model_used)
+            for a in db.query(models.SNOMEDAnnotation).filter_by(transcription_id=transcription_id).order_by(models.SNOMEDAnnotation.start_char)
+        ]
+
+
+def test_stage_tags_new_transcriptions_once(seed):
+    seed_dictionary()
+    first, second = create_transcriptions(
+        seed, ["Acute coronary syndrome last year, chest pain today.", "Known ACS."], custom_vocab={"synonyms": {"ACS": ACS}},
+    )
+    stats = run_stage(tagger=DictionaryTagger.from_db(), settle_sec=0)
+    assert stats["documents"] >= 2 and stats["docs_per_sec"] > 0
+    assert annotations(first) == [
+        ("Acute coronary syndrome", ACS, 0, 23, "dictionary"), ("chest pain", CHEST_PAIN, 35, 45, "dictionary"),
+    ]
+    assert annotations(second) == [("ACS", ACS, 6, 9, "dictionary")]
+
+    # Nothing pending; a reset cursor skips transcriptions this model already tagged
+    assert run_stage(tagger=DictionaryTagger.from_db(), settle_sec=0)["documents"] == 0
+    with SessionLocal() as db:
+        db.execute(update(models.PipelineCursor).values(last_id=0))
+        db.commit()
+    run_stage(tagger=DictionaryTagger.from_db(), settle_sec=0)
+    assert len(annotations(first)) == 2
+
+
+def test_stage_leaves_unsettled_transcriptions_for_later(seed):
+    seed_dictionary()
+    [pending] = create_transcriptions(seed, ["chest pain"])
+    run_stage(tagger=DictionaryTagger.from_db(), settle_sec=3600)
+    assert annotations(pending) == []
+    run_stage(tagger=DictionaryTagger.from_db(), settle_sec=0)
+    assert [a[0] for a in annotations(pending)] == ["chest pain"]
+
+
+def test_stage_with_process_pool(seed):
+    seed_dictionary()
+    ids = create_transcriptions(
+        seed, [f"Case {i}: acute coronary syndrome and chest pain, known ACS" for i in range(6)], custom_vocab={"synonyms": {"ACS": ACS}},
+    )
+    stats = run_stage(workers=2, settle_sec=0)
+    assert stats["documents"] >= 6
+    # Workers compile the doctor's vocabulary themselves from (doctor id, vocab_version)
+    for transcription_id in ids:
+        assert [a[1] for a in annotations(transcription_id)] == [ACS, CHEST_PAIN, ACS]
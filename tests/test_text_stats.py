@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from app import models
+from app.bootstrap import bootstrap
+from app.copy_import import import_records
+from app.database import SessionLocal, engine
+from app.main import app
+from app.text_stats import count_words, rebuild_text_stats
+
+client = TestClient(app)
+
+
+def daily(**params):
+    r = client.get("/stats/transcriptions/daily", params=params)
+    assert r.status_code == 200, r.text
+    return r.json()["items"]
+
+
+def test_count_words():
+    assert count_words("  Chest pain,\n radiating\tto the left arm. ") == 7
+    assert count_words("") == count_words("   ") == count_words(None) == 0
+
+
+def test_counts_are_computed_on_write_and_client_values_ignored(seed):
+    seeded = seed()
+    dictation_id, doctor_id = seeded.dictation_id, seeded.doctor_id
+    r = client.post("/transcriptions/", json={"dictation_id": dictation_id, "doctor_id": doctor_id,
+                                              "raw_text": "Patient reports  chest pain.", "word_count": 99})
+    assert r.status_code in (200, 201), r.text
+    body = r.json()
+    assert (body["word_count"], body["char_count"]) == (4, 28)
+
+    r = client.put(f"/transcriptions/{body['id']}", json={"raw_text": "Chest pain resolved"})
+    assert (r.json()["word_count"], r.json()["char_count"]) == (3, 19)
+
+
+def test_daily_rollup_follows_inserts_updates_deletes_and_annotations(seed):
+    seeded = seed()
+    dictation_id, doctor_id, hospital_id = seeded.dictation_id, seeded.doctor_id, seeded.hospital_id
+    with SessionLocal() as db:
+        first = models.Transcription(dictation_id=dictation_id, doctor_id=doctor_id, raw_text="one two three")
+        second = models.Transcription(dictation_id=dictation_id, doctor_id=doctor_id, raw_text="four five")
+        db.add_all([first, second])
+        db.flush()
+        db.add(models.SNOMEDAnnotation(dictation_id=dictation_id, doctor_id=doctor_id, snomed_concept_id=22298006, term="MI"))
+        db.commit()
+        second_id = second.id
+
+    [row] = daily(doctor_id=doctor_id)
+    assert row["day"] == datetime.now(timezone.utc).date().isoformat()
+    assert (row["transcriptions"], row["words"], row["chars"], row["annotations"]) == (2, 5, 22, 1)
+    assert row["avg_words"] == 2.5 and row["annotations_per_1000_words"] == 200.0
+
+    with SessionLocal() as db:
+        db.get(models.Transcription, second_id).raw_text = "four five six seven"
+        db.commit()
+    assert daily(doctor_id=doctor_id)[0]["words"] == 7
+    with SessionLocal() as db:
+        db.delete(db.get(models.Transcription, second_id))
+        db.commit()
+    [row] = daily(hospital_id=hospital_id)
+    assert (row["transcriptions"], row["words"], row["chars"]) == (1, 3, 13)
+    assert daily(doctor_id=doctor_id, since="2000-01-01", until="2000-12-31") == []
+
+
+def test_bulk_imports_and_rebuild_agree_with_the_triggers(seed):
+    seeded = seed()
+    dictation_id, doctor_id = seeded.dictation_id, seeded.doctor_id
+    records = [{"dictation_id": dictation_id, "doctor_id": doctor_id, "raw_text": f"word {'x ' * i}"} for i in range(10)]
+    report = import_records(engine, "transcriptions", iter(enumerate(records, 1)), chunk_rows=4)
+    assert report.inserted == 10
+    [before] = daily(doctor_id=doctor_id)
+    assert (before["transcriptions"], before["words"]) == (10, 55)
+
+    with engine.begin() as conn:
+        rebuild_text_stats(conn)
+    assert daily(doctor_id=doctor_id) == [before]
+    # Re-running bootstrap keeps the rollup (it only backfills an empty one)
+    bootstrap(engine)
+    assert daily(doctor_id=doctor_id) == [before]
+
+
+def test_word_count_only_put_is_recomputed_and_delete_balances_the_rollup(seed):
+    seeded = seed()
+    dictation_id, doctor_id = seeded.dictation_id, seeded.doctor_id
+    r = client.post("/transcriptions/", json={"dictation_id": dictation_id, "doctor_id": doctor_id, "raw_text": "one two three"})
+    transcription_id = r.json()["id"]
+    r = client.put(f"/transcriptions/{transcription_id}", json={"word_count": 999})
+    assert r.status_code == 200, r.text
+    with SessionLocal() as db:
+        assert db.get(models.Transcription, transcription_id).word_count == 3
+    assert daily(doctor_id=doctor_id)[0]["words"] == 3
+
+    with SessionLocal() as db:
+        db.delete(db.get(models.Transcription, transcription_id))
+        db.commit()
+    [row] = daily(doctor_id=doctor_id)
+    assert (row["transcriptions"], row["words"], row["chars"]) == (0, 0, 0)
@@ -0,0 +1,75 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from app import models
+from app.database import SessionLocal
+from app.main import app
+from app.vocab import VocabMatchers, vocab_matchers
+
+client = TestClient(app)
+
+MI, HTN = 22298006, 38341003
+
+
+def vocab_version(doctor_id):
+    with SessionLocal() as db:
+        return db.get(models.Doctor, doctor_id).vocab_version
+
+
+def tag(doctor_id, text, **params):
+    r = client.post(f"/doctors/{doctor_id}/vocab/tag", json={"text": text}, params=params)
+    assert r.status_code == 200, r.text
+    return [(s["term"], s["concept_id"]) for s in r.json()["spans"]]
+
+
+def test_trigger_bumps_vocab_version_only_when_custom_vocab_changes(seed):
+    doctor_id = seed(dictations=0, doctor={"custom_vocab": {"synonyms": {"MI": MI}}}).doctor_id
+    assert vocab_version(doctor_id) == 0
+    with SessionLocal() as db:
+        db.execute(update(models.Doctor).where(models.Doctor.id == doctor_id).values(first_name="Asha"))
+        db.execute(update(models.Doctor).where(models.Doctor.id == doctor_id).values(custom_vocab={"synonyms": {"MI": MI}}))
+        db.commit()
+    assert vocab_version(doctor_id) == 0
+    with SessionLocal() as db:
+        db.execute(update(models.Doctor).where(models.Doctor.id == doctor_id).values(custom_vocab={"synonyms": {"BP high": HTN}}))
+        db.commit()
+    assert vocab_version(doctor_id) == 1
+
+
+def test_compiled_vocabulary_is_reused_until_its_version_changes(seed):
+    doctor_id = seed(dictations=0, doctor={"custom_vocab": {"synonyms": {"MI": MI}}}).doctor_id
+    matchers = VocabMatchers(maxsize=10)
+    with SessionLocal() as db:
+        first = matchers.get(db, doctor_id)
+        assert matchers.get(db, doctor_id) is first
+        assert matchers.stats()["compiles"] == 1
+        # Written behind the router's back: the version probe still sees it
+        db.execute(update(models.Doctor).where(models.Doctor.id == doctor_id).values(custom_vocab={"synonyms": {"BP high": HTN}}))
+        db.commit()
+        second = matchers.get(db, doctor_id)
+        assert second is not first and len(second) == 1
+        stats = matchers.stats()
+        # The stale entry counts as a miss, not a hit
+        assert (stats["compiles"], stats["hits"], stats["misses"]) == (2, 1, 2)
+        assert matchers.get(db, 999999999) is None
+
+
+def test_tag_endpoint_follows_put_to_custom_vocab(seed):
+    doctor_id = seed(dictations=0, doctor={"custom_vocab": {"synonyms": {"MI": MI, "heart attack": MI}}}).doctor_id
+    text = "Old MI, HT. Heart  attack in 2019."
+    assert tag(doctor_id, text) == [("MI", MI), ("Heart  attack", MI)]
+    compiles = vocab_matchers().stats()["compiles"]
+    assert tag(doctor_id, "MI") == [("MI", MI)]
+    assert vocab_matchers().stats()["compiles"] == compiles
+
+    r = client.put(f"/doctors/{doctor_id}", json={"custom_vocab": {"synonyms": {"HT": HTN}}})
+    assert r.status_code == 200, r.text
+    assert vocab_version(doctor_id) == 1
+    assert tag(doctor_id, text) == [("HT", HTN)]
+    assert client.get("/admin/vocab-cache").json()["compiles"] == compiles + 1
+
+
+def test_tag_endpoint_errors(seed):
+    assert client.post("/doctors/999999999/vocab/tag", json={"text": "MI"}).status_code == 404
+    doctor_id = seed(dictations=0).doctor_id
+    assert tag(doctor_id, "MI") == []
+    assert client.post(f"/doctors/{doctor_id}/vocab/tag", json={"text": "x" * 20001}).status_code == 400